@@ -1,19 +1,33 @@
 """Définition des commandes slash Discord."""
 
+import asyncio
+from datetime import datetime
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-from alita.modules import portfolio, yahoo_finance, ollama_client
-from alita.modules.weather import get_weather
-from alita.briefing.generator import generer_briefing, get_config_value
-from alita.briefing.templates import build_portfolio_list_embed
-from alita.database.db import get_session
+from alita.config import Config
+from alita.modules import moto_score, portfolio, weather, yahoo_finance, ollama_client
+from alita.modules.health import verifier_tout
+from alita.modules.llm_queue import file_llm
+from alita.briefing.cibles import ajouter_cible, retirer_cible, lister_cibles, masquer_webhook
+from alita.briefing.generator import (
+    generer_briefing, get_config_value, invalider_portfolio, previsions_trajet, renvoyer_briefing,
+)
+from alita.briefing.telemetry import stats_etapes
+from alita.briefing.templates import build_moto_semaine_embed, build_portfolio_list_embed, build_section_meteo
+from alita.bot.progression import MessageProgressif
+from alita.database.db import get_session, get_pool_stats
 from alita.database.models import ConfigDB
 from alita.utils.logger import logger
 from alita.utils.helpers import format_prix, format_pourcentage
 
 
+# Titres des analyses LLM affichées en streaming par /briefing now
+LIBELLES_STREAMING = {"analyse_cac40": "Analyse CAC40", "alertes": "Alertes portfolio"}
+
+
 class PortfolioCog(commands.Cog):
     """Commandes de gestion du portfolio."""
 
@@ -51,6 +65,8 @@ class PortfolioCog(commands.Cog):
                 return
 
             result = portfolio.ajouter_action(ticker, nom, prix_achat, quantite)
+            if result["ok"]:
+                invalider_portfolio()
             color = 0x2ECC71 if result["ok"] else 0xE74C3C
             embed = discord.Embed(description=result["message"], color=color)
             await interaction.followup.send(embed=embed)
@@ -61,6 +77,8 @@ class PortfolioCog(commands.Cog):
                 return
 
             result = portfolio.retirer_action(ticker)
+            if result["ok"]:
+                invalider_portfolio()
             color = 0x2ECC71 if result["ok"] else 0xE74C3C
             embed = discord.Embed(description=result["message"], color=color)
             await interaction.followup.send(embed=embed)
@@ -100,7 +118,7 @@ class PortfolioCog(commands.Cog):
 class ConfigCog(commands.Cog):
     """Commandes de configuration."""
 
-    PARAMS_VALIDES = {"meteo_ville", "briefing_heure", "moto_seuil_vent", "moto_seuil_pluie"}
+    PARAMS_VALIDES = {"meteo_ville", "briefing_heure", "moto_seuil_vent", "moto_seuil_pluie", "moto_trajet"}
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
@@ -140,6 +158,8 @@ class ConfigCog(commands.Cog):
                 )
                 return
 
+            # Le géocodage des nouvelles villes peut dépasser le délai de réponse Discord
+            await interaction.response.defer()
             try:
                 with get_session() as session:
                     config = session.query(ConfigDB).filter_by(cle=parametre).first()
@@ -152,13 +172,58 @@ class ConfigCog(commands.Cog):
                 if parametre == "briefing_heure" and hasattr(self.bot, "scheduler"):
                     self.bot.scheduler.reschedule(valeur)
 
+                description = f"✅ `{parametre}` = `{valeur}`"
+                # Nouvelles villes géocodées maintenant plutôt qu'au prochain briefing
+                if parametre in ("meteo_ville", "moto_trajet"):
+                    villes = [valeur] if parametre == "meteo_ville" else moto_score.parser_trajet(valeur)
+                    positions = await asyncio.to_thread(weather.invalider_geocodage, villes)
+                    for ville, position in positions.items():
+                        if position:
+                            description += f"\n📍 {ville} : {position['nom']} ({position['lat']}, {position['lon']})"
+                        else:
+                            description += f"\n⚠️ {ville} introuvable, résolution laissée à OpenWeather"
+
                 embed = discord.Embed(
-                    description=f"✅ `{parametre}` = `{valeur}`",
+                    description=description,
                     color=0x2ECC71,
                 )
-                await interaction.response.send_message(embed=embed)
+                await interaction.followup.send(embed=embed)
             except Exception as e:
-                await interaction.response.send_message(f"❌ Erreur : {e}")
+                await interaction.followup.send(f"❌ Erreur : {e}")
+
+
+class MotoCog(commands.Cog):
+    """Commandes du score moto."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="moto", description="Score moto du trajet")
+    @app_commands.describe(periode="today pour aujourd'hui, week pour les 5 prochains jours")
+    @app_commands.choices(periode=[
+        app_commands.Choice(name="today", value="today"),
+        app_commands.Choice(name="week", value="week"),
+    ])
+    async def moto_cmd(self, interaction: discord.Interaction, periode: str = "today"):
+        await interaction.response.defer()
+        ville = get_config_value("meteo_ville", "Marseille")
+        trajet = moto_score.parser_trajet(get_config_value("moto_trajet", "")) or [ville]
+
+        try:
+            if periode == "week":
+                # Prévisions complètes (5 jours / 3 h), une requête par étape et par tranche
+                previsions = await previsions_trajet(trajet, heures=5 * 24)
+                embed = build_moto_semaine_embed(moto_score.scores_par_jour(previsions), trajet)
+            else:
+                meteo, previsions = await asyncio.gather(
+                    asyncio.to_thread(weather.get_weather, ville), previsions_trajet(trajet),
+                )
+                embed = build_section_meteo(meteo, moto_score.calculer_score_moto(meteo, previsions))
+        except Exception as e:
+            logger.error("Erreur /moto %s : %s", periode, e)
+            await interaction.followup.send(f"❌ Erreur : {e}")
+            return
+        await interaction.followup.send(embed=embed)
 
 
 class TestCog(commands.Cog):
@@ -167,19 +232,48 @@ class TestCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    @app_commands.command(name="briefing", description="Force la génération du briefing")
-    @app_commands.describe(action="now pour forcer")
-    async def briefing_cmd(self, interaction: discord.Interaction, action: str = "now"):
+    @app_commands.command(name="briefing", description="Force la génération ou le renvoi du briefing")
+    @app_commands.describe(
+        action="now pour forcer, resend pour renvoyer un briefing stocké",
+        date="Date du briefing à renvoyer (JJ/MM/AAAA, défaut : le plus récent)",
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="now", value="now"),
+        app_commands.Choice(name="resend", value="resend"),
+    ])
+    async def briefing_cmd(self, interaction: discord.Interaction, action: str = "now", date: str = None):
+        if action == "resend":
+            jour = None
+            if date:
+                try:
+                    jour = datetime.strptime(date, "%d/%m/%Y").date()
+                except ValueError:
+                    await interaction.response.send_message("❌ Usage : `/briefing resend [JJ/MM/AAAA]`")
+                    return
+
+            await interaction.response.defer()
+            result = await renvoyer_briefing(jour)
+            await interaction.followup.send(result["message"])
+            return
+
         if action != "now":
-            await interaction.response.send_message("Usage : `/briefing now`")
+            await interaction.response.send_message("Usage : `/briefing now` ou `/briefing resend [date]`")
             return
 
         await interaction.response.defer()
-        await interaction.followup.send("⏳ Génération du briefing en cours...")
+        entete = "⏳ Génération du briefing en cours..."
+        message = await interaction.followup.send(entete, wait=True)
+        # Les analyses LLM s'affichent au fil de leur génération
+        progression = MessageProgressif(message, entete, libelles=LIBELLES_STREAMING)
+        progression.demarrer()
 
         try:
-            result = await generer_briefing()
+            # Les sections encore fraîches (briefing planifié récent...) sont réutilisées
+            result = await generer_briefing(reutiliser=True, progression=progression.maj)
             embeds = result.get("embeds", [])
+            await progression.terminer(
+                f"✅ Briefing généré en {result['total_ms'] / 1000:.1f}s" if embeds else entete
+            )
 
             if embeds:
                 await interaction.followup.send(embeds=embeds)
@@ -188,10 +282,15 @@ class TestCog(commands.Cog):
                         f"⚠️ Briefing généré avec {len(result['erreurs'])} erreur(s) : "
                         + ", ".join(result["erreurs"])
                     )
+                if result.get("complement"):
+                    complement = await result["complement"]
+                    if complement and complement["embeds"]:
+                        await interaction.followup.send(embeds=complement["embeds"])
             else:
                 await interaction.followup.send("❌ Impossible de générer le briefing")
         except Exception as e:
             logger.error("Erreur /briefing now : %s", e)
+            await progression.terminer(entete)
             await interaction.followup.send(f"❌ Erreur : {e}")
 
     @app_commands.command(name="test", description="Tests de connexion")
@@ -227,7 +326,7 @@ class TestCog(commands.Cog):
                 await interaction.followup.send(f"❌ Impossible de récupérer les données pour {ticker}")
 
         elif service == "ollama":
-            result = ollama_client.test_ollama()
+            result = await ollama_client.test_ollama()
             color = 0x2ECC71 if result["ok"] else 0xE74C3C
             emoji = "✅" if result["ok"] else "❌"
             embed = discord.Embed(
@@ -236,8 +335,30 @@ class TestCog(commands.Cog):
                 color=color,
             )
             embed.add_field(name="Modèle", value=result["modele"], inline=True)
+            embed.add_field(name="En mémoire", value="✅" if result["charge"] else "—", inline=True)
             await interaction.followup.send(embed=embed)
 
+    @app_commands.command(name="health", description="État de toutes les dépendances")
+    @app_commands.describe(force="Ignorer les résultats récents en cache")
+    async def health_cmd(self, interaction: discord.Interaction, force: bool = False):
+        await interaction.response.defer()
+        resultats = await verifier_tout(force)
+
+        nb_ok = sum(r["ok"] for r in resultats)
+        embed = discord.Embed(
+            title=f"🩺 Santé des dépendances ({nb_ok}/{len(resultats)})",
+            color=0x2ECC71 if nb_ok == len(resultats) else 0xE74C3C,
+        )
+        for r in resultats:
+            embed.add_field(
+                name=f"{'✅' if r['ok'] else '❌'} {r['nom']} · {r['latence_ms']} ms",
+                value=r["message"][:1024],
+                inline=False,
+            )
+        if any(r["cache"] for r in resultats):
+            embed.set_footer(text=f"Résultats de moins de {Config.HEALTH_CACHE_TTL}s réutilisés (force pour resonder)")
+        await interaction.followup.send(embed=embed)
+
     @app_commands.command(name="logs", description="Affiche les derniers logs")
     async def logs_cmd(self, interaction: discord.Interaction):
         try:
@@ -257,9 +378,180 @@ class TestCog(commands.Cog):
             await interaction.response.send_message(f"❌ Erreur lecture logs : {e}")
 
 
+class CiblesCog(commands.Cog):
+    """Commandes de gestion des cibles de livraison du briefing."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="cible", description="Cibles de livraison du briefing")
+    @app_commands.describe(
+        action="Action à effectuer",
+        nom="Nom de la cible",
+        webhook_url="URL du webhook Discord (pour add)",
+        sections="Sections envoyées, séparées par des virgules (défaut : toutes)",
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="add", value="add"),
+        app_commands.Choice(name="remove", value="remove"),
+        app_commands.Choice(name="list", value="list"),
+    ])
+    async def cible_cmd(
+        self,
+        interaction: discord.Interaction,
+        action: str,
+        nom: str = None,
+        webhook_url: str = None,
+        sections: str = None,
+    ):
+        # Réponses éphémères : les URLs de webhook sont des secrets
+        await interaction.response.defer(ephemeral=True)
+
+        if action == "add":
+            if not nom or not webhook_url:
+                await interaction.followup.send("❌ Usage : `/cible add <nom> <webhook_url> [sections]`")
+                return
+            result = ajouter_cible(nom, webhook_url, sections)
+            await interaction.followup.send(result["message"])
+
+        elif action == "remove":
+            if not nom:
+                await interaction.followup.send("❌ Usage : `/cible remove <nom>`")
+                return
+            result = retirer_cible(nom)
+            await interaction.followup.send(result["message"])
+
+        elif action == "list":
+            try:
+                cibles = lister_cibles()
+            except Exception as e:
+                await interaction.followup.send(f"❌ Erreur : {e}")
+                return
+
+            if not cibles:
+                await interaction.followup.send("Aucune cible configurée : le briefing est livré à `DISCORD_WEBHOOK_URL`.")
+                return
+
+            embed = discord.Embed(title="📬 Cibles de livraison", color=0x3498DB)
+            for cible in cibles:
+                embed.add_field(
+                    name=cible["nom"],
+                    value=(
+                        f"Sections : {', '.join(cible['sections']) if cible['sections'] else 'toutes'}\n"
+                        f"`{masquer_webhook(cible['webhook_url'])}`"
+                    ),
+                    inline=False,
+                )
+            await interaction.followup.send(embed=embed)
+
+
+class StatsCog(commands.Cog):
+    """Commandes de statistiques internes."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="stats", description="Statistiques internes")
+    @app_commands.describe(
+        sujet="Statistiques à afficher",
+        jours="Fenêtre d'analyse en jours (pour briefing)",
+    )
+    @app_commands.choices(sujet=[
+        app_commands.Choice(name="pool", value="pool"),
+        app_commands.Choice(name="briefing", value="briefing"),
+        app_commands.Choice(name="llm", value="llm"),
+    ])
+    async def stats_cmd(self, interaction: discord.Interaction, sujet: str, jours: int = 30):
+        if sujet == "briefing":
+            await interaction.response.defer()
+            try:
+                stats = stats_etapes(jours)
+            except Exception as e:
+                await interaction.followup.send(f"❌ Erreur : {e}")
+                return
+
+            if not stats:
+                await interaction.followup.send(f"Aucun timing de briefing sur les {jours} derniers jours.")
+                return
+
+            lignes = [f"{'Étape':<14}{'n':>4}{'p50':>8}{'p95':>8}{'max':>8}  retards/err"]
+            for st in stats:
+                lignes.append(
+                    f"{st['etape']:<14}{st['n']:>4}{st['p50_ms']:>8}{st['p95_ms']:>8}{st['max_ms']:>8}"
+                    f"  {st['retards']}/{st['erreurs']}"
+                )
+            embed = discord.Embed(
+                title=f"⏱️ Durée des étapes du briefing ({jours} j, ms)",
+                description="```\n" + "\n".join(lignes)[:4000] + "\n```",
+                color=0x3498DB,
+            )
+            await interaction.followup.send(embed=embed)
+
+        elif sujet == "pool":
+            stats = get_pool_stats()
+            embed = discord.Embed(title="🗄️ Pool de connexions DB", color=0x3498DB)
+            embed.add_field(
+                name="Connexions",
+                value=(
+                    f"En cours : **{stats['en_cours']}** (pic {stats['pic_en_cours']})\n"
+                    f"Disponibles : {stats.get('disponibles', 'N/A')} / {stats.get('taille', 'N/A')}\n"
+                    f"Overflow : {stats.get('overflow', 0)} (pic {stats['pic_overflow']})"
+                ),
+                inline=True,
+            )
+            embed.add_field(
+                name="Attente checkout",
+                value=(
+                    f"p50 : {stats['attente_p50_ms']} ms\n"
+                    f"p95 : {stats['attente_p95_ms']} ms\n"
+                    f"max : {stats['attente_max_ms']} ms"
+                ),
+                inline=True,
+            )
+            embed.add_field(
+                name="Événements",
+                value=(
+                    f"Checkouts : {stats['checkouts']}\n"
+                    f"Connexions créées : {stats['connexions_creees']}\n"
+                    f"Invalidations : {stats['invalidations']} (+{stats['invalidations_douces']} douces)\n"
+                    f"Timeouts : {stats['timeouts']}"
+                ),
+                inline=True,
+            )
+            await interaction.response.send_message(embed=embed)
+
+        elif sujet == "llm":
+            stats = file_llm.snapshot()
+            embed = discord.Embed(title="🧠 File des générations Ollama", color=0x3498DB)
+            embed.add_field(
+                name="Occupation",
+                value=(
+                    f"En cours : **{stats['actifs']}** / {stats['capacite']}\n"
+                    f"En attente : {sum(stats['en_attente'].values())} (pic {stats['pic_attente']})\n"
+                    f"Durée typique : {stats['duree_estimee_s']} s\n"
+                    f"Annulées : {stats['annules']}"
+                ),
+                inline=False,
+            )
+            for nom, st in stats["priorites"].items():
+                embed.add_field(
+                    name=nom.capitalize(),
+                    value=(
+                        f"En attente : {stats['en_attente'][nom]}\n"
+                        f"Traitées : {st['traites']}\n"
+                        f"Attente p50/p95 : {st['attente_p50_ms']}/{st['attente_p95_ms']} ms"
+                    ),
+                    inline=True,
+                )
+            await interaction.response.send_message(embed=embed)
+
+
 async def setup_commands(bot: commands.Bot):
     """Enregistre tous les cogs de commandes."""
     await bot.add_cog(PortfolioCog(bot))
     await bot.add_cog(ConfigCog(bot))
+    await bot.add_cog(MotoCog(bot))
     await bot.add_cog(TestCog(bot))
+    await bot.add_cog(CiblesCog(bot))
+    await bot.add_cog(StatsCog(bot))
     logger.info("Commandes Discord enregistrées")
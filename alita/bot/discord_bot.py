@@ -1,19 +1,53 @@
 """Bot Discord principal."""
 
+import asyncio
+
 import discord
+from discord import app_commands
 from discord.ext import commands
 
 from alita.config import Config
 from alita.bot.commands import setup_commands
 from alita.briefing.scheduler import BriefingScheduler
-from alita.database.db import test_connection
+from alita.database.db import attendre_db, init_schema, warmup_pool
+from alita.utils.chrono import Chronometre
+from alita.utils.http import close_http_session
+from alita.utils.workers import fermer_workers
 from alita.utils.logger import logger
 
 
+# Commandes sans accès DB, utilisables pendant la préparation de la base
+COMMANDES_SANS_DB = {"health", "test"}
+# Attente max (s) de la DB par une commande : Discord exige une réponse en 3 s
+ATTENTE_DB_COMMANDE = 2.0
+
+
+class ArbreCommandes(app_commands.CommandTree):
+    """Arbre des commandes slash : les commandes DB attendent que le schéma soit prêt.
+
+    Les commandes sont synchronisées et le gateway connecté pendant la
+    préparation de la DB ; une commande reçue avant la fin de init_schema
+    attend brièvement, puis reçoit un message d'attente plutôt qu'une erreur SQL.
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        commande = interaction.command
+        if commande is None or commande.qualified_name.split()[0] in COMMANDES_SANS_DB:
+            return True
+
+        etat = await self.client.attendre_db_prete(ATTENTE_DB_COMMANDE)
+        if etat:
+            return True
+        message = ("⏳ Base de données en cours de démarrage, réessayez dans quelques secondes"
+                   if etat is None else "❌ Base de données indisponible")
+        await interaction.response.send_message(message, ephemeral=True)
+        return False
+
+
 class AlitaBot(commands.Bot):
     """Bot Discord Alita avec scheduler intégré."""
 
-    def __init__(self):
+    def __init__(self, chrono: Chronometre | None = None):
         intents = discord.Intents.default()
         intents.message_content = True
 
@@ -21,31 +55,81 @@ class AlitaBot(commands.Bot):
             command_prefix="!",
             intents=intents,
             description="Alita - Briefing matinal automatisé",
+            tree_cls=ArbreCommandes,
         )
 
         self.scheduler: BriefingScheduler | None = None
+        self.chrono = chrono or Chronometre()
+        self.db_indisponible = False
+        self._db_prete: asyncio.Task | None = None
+        self._sync_commandes: asyncio.Task | None = None
 
     async def setup_hook(self):
-        """Appelé au démarrage du bot."""
+        """Appelé au démarrage du bot, avant la connexion au gateway.
+
+        La DB et la synchronisation des commandes sont lancées en tâches de fond
+        pour se dérouler pendant la connexion au gateway.
+        """
+        self.chrono.arreter("login")
+
         # Enregistrer les commandes slash
         await setup_commands(self)
 
-        # Synchroniser les commandes avec Discord
+        self._db_prete = asyncio.create_task(self._preparer_db())
+        self._sync_commandes = asyncio.create_task(self._synchroniser_commandes())
+        self.chrono.demarrer("gateway")
+
+    async def _preparer_db(self) -> bool:
+        """Attend la DB, crée les tables manquantes puis préchauffe le pool."""
+        with self.chrono.mesurer("db"):
+            if not await attendre_db():
+                return False
+            try:
+                await asyncio.to_thread(init_schema)
+            except Exception as e:
+                logger.error("Erreur création des tables manquantes : %s", e)
+            await asyncio.to_thread(warmup_pool)
+        return True
+
+    async def attendre_db_prete(self, timeout: float) -> bool | None:
+        """Attend au plus `timeout` s la préparation de la DB.
+
+        Retourne True si elle est prête, False si elle est indisponible, None
+        si elle est toujours en préparation.
+        """
+        if self._db_prete is None:
+            return None
+        if self._db_prete.cancelled():
+            return False
         try:
-            synced = await self.tree.sync()
-            logger.info("%d commandes synchronisées avec Discord", len(synced))
-        except Exception as e:
-            logger.error("Erreur sync commandes : %s", e)
+            # shield : l'expiration n'annule pas la préparation partagée
+            return await asyncio.wait_for(asyncio.shield(self._db_prete), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _synchroniser_commandes(self):
+        """Synchronise les commandes slash avec Discord."""
+        with self.chrono.mesurer("commandes"):
+            try:
+                synced = await self.tree.sync()
+                logger.info("%d commandes synchronisées avec Discord", len(synced))
+            except Exception as e:
+                logger.error("Erreur sync commandes : %s", e)
 
     async def on_ready(self):
-        """Appelé quand le bot est connecté et prêt."""
+        """Appelé quand le bot est connecté et prêt (aussi après une reconnexion)."""
         logger.info("Bot connecté en tant que %s (ID: %s)", self.user.name, self.user.id)
+        self.chrono.arreter("gateway")
 
-        # Tester la connexion DB
-        if test_connection():
-            logger.info("Connexion DB OK")
-        else:
-            logger.error("Connexion DB échouée !")
+        if self.scheduler is not None:
+            return
+
+        # La DB est nécessaire au scheduler (heure du briefing en config)
+        if not await self._db_prete:
+            logger.error("Connexion DB échouée, arrêt du bot")
+            self.db_indisponible = True
+            await self.close()
+            return
 
         # Démarrer le scheduler
         self.scheduler = BriefingScheduler(self.loop)
@@ -59,7 +143,8 @@ class AlitaBot(commands.Bot):
             )
         )
 
-        logger.info("Alita Bot prêt !")
+        await self._sync_commandes
+        logger.info("Alita Bot prêt ! Démarrage : %s", self.chrono.resume())
 
     async def on_command_error(self, ctx, error):
         """Gestion globale des erreurs de commandes."""
@@ -69,19 +154,29 @@ class AlitaBot(commands.Bot):
 
     async def close(self):
         """Nettoyage à l'arrêt du bot."""
+        for tache in (self._db_prete, self._sync_commandes):
+            if tache and not tache.done():
+                tache.cancel()
         if self.scheduler:
             self.scheduler.stop()
+        await close_http_session()
+        fermer_workers()
         await super().close()
         logger.info("Bot arrêté proprement")
 
 
-def run_bot():
-    """Lance le bot Discord."""
+def run_bot(chrono: Chronometre | None = None) -> bool:
+    """Lance le bot Discord.
+
+    Retourne False si le bot s'est arrêté faute de base de données.
+    """
     token = Config.DISCORD_BOT_TOKEN
 
     if not token:
         logger.error("DISCORD_BOT_TOKEN non défini !")
         raise ValueError("DISCORD_BOT_TOKEN manquant dans la configuration")
 
-    bot = AlitaBot()
+    bot = AlitaBot(chrono)
+    bot.chrono.demarrer("login")
     bot.run(token, log_handler=None)  # On gère nos propres logs
+    return not bot.db_indisponible
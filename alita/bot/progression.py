@@ -0,0 +1,86 @@
+"""Message Discord mis à jour progressivement pendant une génération LLM."""
+
+import asyncio
+from typing import Optional
+
+import discord
+
+from alita.utils.logger import logger
+
+# Limite Discord du contenu d'un message (marge pour l'en-tête)
+LIMITE_MESSAGE = 2000
+
+
+class MessageProgressif:
+    """Édite un message au fil d'une génération, sans dépasser un rythme d'éditions.
+
+    `maj` (callback de streaming, appelé sur l'event loop) ne fait que
+    mémoriser le texte partiel. Une tâche périodique édite le message au plus toutes les `intervalle` secondes, et seulement
+    si le contenu a changé (rate limit des éditions Discord).
+
+    Args:
+        message: Message à éditer (followup envoyé avec wait=True)
+        entete: Première ligne, toujours affichée
+        libelles: Titre affiché pour chaque clé de `maj` (ex: nom d'étape)
+        intervalle: Délai minimal (s) entre deux éditions
+    """
+
+    def __init__(self, message: discord.WebhookMessage, entete: str,
+                 libelles: Optional[dict] = None, intervalle: float = 1.5):
+        self.message = message
+        self.entete = entete
+        self.libelles = libelles or {}
+        self.intervalle = intervalle
+        self._textes: dict[str, str] = {}
+        self._affiche = ""
+        self._tache: Optional[asyncio.Task] = None
+
+    def maj(self, cle: str, texte: str):
+        """Mémorise le texte partiel de `cle` (non bloquant)."""
+        self._textes[cle] = texte
+
+    def contenu(self) -> str:
+        """Contenu du message : en-tête puis fin du texte partiel de chaque clé."""
+        textes = dict(self._textes)
+        if not textes:
+            return self.entete
+        place = (LIMITE_MESSAGE - len(self.entete) - 20) // len(textes)
+        blocs = [self.entete]
+        for cle, texte in textes.items():
+            titre = f"**{self.libelles.get(cle, cle)}** ✍️"
+            texte = texte.strip()
+            reste = place - len(titre) - 2
+            if len(texte) > reste:
+                texte = "…" + texte[-max(reste - 1, 0):]
+            blocs.append(f"{titre}\n{texte}")
+        return "\n\n".join(blocs)[:LIMITE_MESSAGE]
+
+    async def _editer(self, contenu: str):
+        if contenu == self._affiche:
+            return
+        try:
+            await self.message.edit(content=contenu)
+            self._affiche = contenu
+        except discord.HTTPException as e:
+            logger.warning("Édition du message de progression échouée : %s", e)
+
+    async def _boucle(self):
+        while True:
+            await asyncio.sleep(self.intervalle)
+            await self._editer(self.contenu())
+
+    def demarrer(self):
+        """Lance les éditions périodiques."""
+        if self._tache is None:
+            self._tache = asyncio.create_task(self._boucle())
+
+    async def terminer(self, contenu: str):
+        """Arrête les éditions et affiche le contenu final."""
+        if self._tache is not None:
+            self._tache.cancel()
+            try:
+                await self._tache
+            except asyncio.CancelledError:
+                pass
+            self._tache = None
+        await self._editer(contenu)
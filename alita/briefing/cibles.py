@@ -0,0 +1,115 @@
+"""Gestion des cibles de livraison du briefing."""
+
+import re
+
+from alita.config import Config
+from alita.database.db import get_session
+from alita.database.models import DeliveryTarget
+from alita.briefing.templates import SECTIONS
+from alita.utils.logger import logger
+
+# Nom de la cible implicite construite depuis DISCORD_WEBHOOK_URL
+CIBLE_DEFAUT = "defaut"
+
+# Même format que celui accepté par discord.Webhook.from_url
+RE_WEBHOOK = re.compile(r"^https://(?:\w+\.)?discord(?:app)?\.com/api/webhooks/[0-9]{17,20}/[A-Za-z0-9.\-_]{60,}$")
+
+
+def parser_sections(texte: str | None) -> list[str] | None:
+    """Convertit "marche,meteo" en liste de sections (None = toutes).
+
+    Lève ValueError si une section est inconnue.
+    """
+    if not texte or texte.strip().lower() in ("", "toutes", "all"):
+        return None
+    sections = [s.strip().lower() for s in texte.split(",") if s.strip()]
+    inconnues = [s for s in sections if s not in SECTIONS]
+    if inconnues:
+        raise ValueError(f"Sections inconnues : {', '.join(inconnues)} (valides : {', '.join(SECTIONS)})")
+    return sections
+
+
+def masquer_webhook(url: str) -> str:
+    """Masque le token d'une URL de webhook pour l'affichage."""
+    base, _, _ = url.rstrip("/").rpartition("/")
+    return f"{base}/•••" if base else "•••"
+
+
+def ajouter_cible(nom: str, webhook_url: str, sections: str | None = None) -> dict:
+    """Ajoute (ou réactive) une cible de livraison.
+
+    Retourne un dict avec : ok, message
+    """
+    if not RE_WEBHOOK.match(webhook_url.strip()):
+        return {"ok": False, "message": "❌ URL de webhook Discord invalide"}
+    try:
+        filtre = parser_sections(sections)
+    except ValueError as e:
+        return {"ok": False, "message": f"❌ {e}"}
+
+    nom = nom.strip().lower()
+    webhook_url = webhook_url.strip()
+    try:
+        with get_session() as session:
+            cible = session.query(DeliveryTarget).filter_by(nom=nom).first()
+            if cible and cible.actif:
+                return {"ok": False, "message": f"❌ La cible `{nom}` existe déjà"}
+            if cible:
+                cible.webhook_url = webhook_url
+                cible.sections = filtre
+                cible.actif = True
+            else:
+                session.add(DeliveryTarget(nom=nom, webhook_url=webhook_url, sections=filtre, actif=True))
+
+        logger.info("Cible de livraison ajoutée : %s (%s)", nom, ", ".join(filtre) if filtre else "toutes sections")
+        return {
+            "ok": True,
+            "message": f"✅ Cible `{nom}` ajoutée ({', '.join(filtre) if filtre else 'toutes les sections'})",
+        }
+    except Exception as e:
+        logger.error("Erreur ajout cible : %s", e)
+        return {"ok": False, "message": f"❌ Erreur : {e}"}
+
+
+def retirer_cible(nom: str) -> dict:
+    """Désactive une cible de livraison (soft delete, l'historique est conservé)."""
+    nom = nom.strip().lower()
+    try:
+        with get_session() as session:
+            cible = session.query(DeliveryTarget).filter_by(nom=nom, actif=True).first()
+            if not cible:
+                return {"ok": False, "message": f"❌ Cible `{nom}` introuvable"}
+            cible.actif = False
+
+        logger.info("Cible de livraison retirée : %s", nom)
+        return {"ok": True, "message": f"✅ Cible `{nom}` retirée"}
+    except Exception as e:
+        logger.error("Erreur retrait cible : %s", e)
+        return {"ok": False, "message": f"❌ Erreur : {e}"}
+
+
+def lister_cibles() -> list[dict]:
+    """Retourne les cibles actives (id, nom, webhook_url, sections)."""
+    with get_session() as session:
+        cibles = session.query(DeliveryTarget).filter_by(actif=True).order_by(DeliveryTarget.nom).all()
+        return [
+            {"id": c.id, "nom": c.nom, "webhook_url": c.webhook_url, "sections": c.sections}
+            for c in cibles
+        ]
+
+
+def charger_cibles() -> list[dict]:
+    """Cibles de livraison du briefing.
+
+    Sans cible en DB (ou DB indisponible), le briefing est livré au seul
+    DISCORD_WEBHOOK_URL, comme avant l'introduction des cibles.
+    """
+    try:
+        cibles = lister_cibles()
+    except Exception as e:
+        logger.error("Erreur chargement cibles de livraison : %s", e)
+        cibles = []
+
+    if not cibles and Config.DISCORD_WEBHOOK_URL:
+        cibles = [{"id": None, "nom": CIBLE_DEFAUT, "webhook_url": Config.DISCORD_WEBHOOK_URL, "sections": None}]
+    return cibles
@@ -0,0 +1,90 @@
+"""Envoi asynchrone des messages via webhook Discord."""
+
+import asyncio
+import time
+
+import aiohttp
+import discord
+
+from alita.config import Config
+from alita.utils.helpers import delai_backoff
+from alita.utils.http import get_http_session
+from alita.utils.logger import logger
+
+
+async def envoyer_webhook(webhook_url: str, embeds: list[discord.Embed], username: str,
+                          max_tentatives: int | None = None) -> bool:
+    """Envoie des embeds via webhook, sans bloquer l'event loop.
+
+    discord.py retente déjà lui-même les rate limits (429) et les erreurs
+    serveur (5xx) : une HTTPException qui remonte est définitive. Seules les
+    erreurs réseau (connexion, timeout) sont retentées ici, avec backoff
+    exponentiel.
+
+    Retourne True si l'envoi est réussi.
+    """
+    max_tentatives = max_tentatives or Config.WEBHOOK_MAX_TENTATIVES
+    session = await get_http_session()
+    try:
+        webhook = discord.Webhook.from_url(webhook_url, session=session)
+    except ValueError as e:
+        logger.error("URL de webhook invalide : %s", e)
+        return False
+
+    for tentative in range(max_tentatives):
+        try:
+            await webhook.send(username=username, embeds=embeds, wait=True)
+            return True
+        except discord.HTTPException as e:
+            logger.error("Erreur envoi webhook : %s", e)
+            return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            delai = delai_backoff(tentative, 1.0, 30.0)
+            logger.warning("Erreur réseau webhook (%s), nouvel essai dans %.1fs", e, delai)
+
+        if tentative + 1 < max_tentatives:
+            await asyncio.sleep(delai)
+
+    logger.error("Envoi webhook abandonné après %d tentatives", max_tentatives)
+    return False
+
+
+def filtrer_sections(sections: list[tuple], filtre: list[str] | None) -> list[discord.Embed]:
+    """Embeds des sections retenues par le filtre d'une cible (None = toutes)."""
+    return [embed for nom, embed in sections if not filtre or nom in filtre]
+
+
+async def livrer_cibles(sections: list[tuple], cibles: list[dict], username: str = "Alita Briefing") -> list[dict]:
+    """Envoie un briefing déjà rendu à toutes les cibles en parallèle.
+
+    Chaque cible est un dict (id, nom, webhook_url, sections). Une cible dont
+    le filtre ne retient aucune section est ignorée.
+
+    Retourne une liste de dicts (target_id, cible, ok, nb_embeds, duree_ms, erreur).
+    """
+    async def livrer(cible: dict) -> dict | None:
+        embeds = filtrer_sections(sections, cible.get("sections"))
+        if not embeds:
+            return None
+        debut = time.perf_counter()
+        try:
+            ok = await envoyer_webhook(cible["webhook_url"], embeds, username=username)
+            erreur = None if ok else "Échec envoi webhook"
+        except Exception as e:
+            ok, erreur = False, str(e)
+        duree_ms = (time.perf_counter() - debut) * 1000
+        if ok:
+            logger.info("Briefing livré à %s (%d embeds, %.0f ms)", cible["nom"], len(embeds), duree_ms)
+        else:
+            logger.error("Échec livraison briefing à %s : %s", cible["nom"], erreur)
+        return {
+            "target_id": cible.get("id"),
+            "cible": cible["nom"],
+            "ok": ok,
+            "nb_embeds": len(embeds),
+            "duree_ms": round(duree_ms),
+            "erreur": erreur,
+        }
+
+    statuts = await asyncio.gather(*(livrer(c) for c in cibles))
+    return [s for s in statuts if s is not None]
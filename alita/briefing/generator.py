@@ -1,19 +1,51 @@
 """Orchestration de la génération du briefing matinal."""
 
+import asyncio
+import time
 import traceback
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Callable, Optional
 
 import discord
+import pytz
 import requests
 
 from alita.config import Config
 from alita.database.db import get_session
-from alita.database.models import BriefingLog, ConfigDB
-from alita.modules import yahoo_finance, weather, moto_score, ollama_client, portfolio
+from alita.database.models import BriefingDelivery, BriefingLog, BriefingPayload, ConfigDB
+from alita.modules import yahoo_finance, weather, moto_score, news_dedup, ollama_client, portfolio
+from alita.modules.llm_queue import PRIORITE_BRIEFING, contexte_llm
 from alita.modules.news_api import NewsAPI
-from alita.briefing.templates import build_briefing_embed
+from alita.briefing.cibles import charger_cibles
+from alita.briefing.delivery import envoyer_webhook, livrer_cibles
+from alita.briefing.payload import serialiser_sections, deserialiser_sections
+from alita.briefing.pipeline import Etape, MemoEtapes, executer_pipeline
+from alita.briefing.telemetry import enregistrer_timings
+from alita.briefing.templates import (
+    FOOTER, FOOTER_COMPLEMENT,
+    build_section_marche, build_section_analyse, build_section_portfolio,
+    build_section_alertes, build_section_meteo, build_section_news,
+    build_section_indisponible,
+)
 from alita.utils.logger import logger
 from alita.utils.helpers import tronquer
+from alita.utils.workers import executer_worker
+
+# Étapes dont dépend chaque section du briefing
+SECTIONS_ETAPES = {
+    "marche": ("cac40",),
+    "portfolio": ("portfolio",),
+    "alertes": ("portfolio", "historique", "alertes"),
+    "meteo": ("config", "meteo", "previsions", "moto"),
+    "news": ("articles", "news"),
+}
+
+# Résultats récents des étapes, réutilisés par /briefing now
+_memo_etapes = MemoEtapes()
+
+# Tâches d'envoi des compléments en cours (référence gardée jusqu'à la fin)
+_taches_complement: set[asyncio.Task] = set()
 
 
 def get_config_value(cle: str, defaut: str = "") -> str:
@@ -26,175 +58,418 @@ def get_config_value(cle: str, defaut: str = "") -> str:
         return defaut
 
 
-async def generer_briefing() -> dict:
-    """Génère le briefing complet.
+def _cac40_vide() -> dict:
+    return {"top_gainers": [], "top_losers": [], "performance_globale": 0}
 
-    Retourne un dict avec : ok, embeds, erreurs
-    """
-    erreurs = []
-    logger.info("=== Début génération briefing ===")
 
-    # 1. Données CAC40
+def _portfolio_vide() -> dict:
+    return {"actions": [], "total_investi": 0, "total_actuel": 0, "gain_total": 0, "gain_pct": 0}
+
+
+async def _etape_cac40(entrees: dict) -> dict:
     logger.info("Récupération données CAC40...")
-    try:
-        cac40_data = yahoo_finance.get_cac40_movers()
-    except Exception as e:
-        logger.error("Erreur CAC40 : %s", e)
-        cac40_data = {"top_gainers": [], "top_losers": [], "performance_globale": 0}
-        erreurs.append(f"CAC40 : {e}")
-
-    # 2. Analyse LLM du CAC40 (avec fallback)
-    analyse_cac40_text = None
-    if cac40_data.get("top_gainers"):
-        logger.info("Génération analyse CAC40 via Ollama...")
-        try:
-            analyse_cac40_text = ollama_client.analyse_cac40(
-                cac40_data["performance_globale"],
-                cac40_data["top_gainers"],
-                cac40_data["top_losers"],
-            )
-        except Exception as e:
-            logger.warning("Ollama CAC40 échoué (fallback sans analyse) : %s", e)
-            erreurs.append(f"Ollama CAC40 : {e}")
+    return await executer_worker(yahoo_finance.get_cac40_movers)
+
+
+def _streaming(progression: Optional[Callable[[str, str], None]], etape: str) -> Optional[Callable[[str], None]]:
+    """Callback de streaming LLM relayant le texte partiel d'une étape."""
+    if progression is None:
+        return None
+    return lambda texte: progression(etape, texte)
+
+
+async def _etape_analyse_cac40(entrees: dict, progression: Optional[Callable] = None) -> Optional[str]:
+    cac40_data = entrees["cac40"]
+    if not cac40_data.get("top_gainers"):
+        return None
+    logger.info("Génération analyse CAC40 via Ollama...")
+    return await ollama_client.analyse_cac40(
+        cac40_data["performance_globale"],
+        cac40_data["top_gainers"],
+        cac40_data["top_losers"],
+        on_token=_streaming(progression, "analyse_cac40"),
+    )
 
-    if not analyse_cac40_text:
-        analyse_cac40_text = "*Analyse IA indisponible*"
 
-    # 3. Portfolio
+def _etape_portfolio(entrees: dict) -> dict:
     logger.info("Récupération portfolio...")
-    try:
-        portfolio_data = portfolio.get_portfolio_pour_briefing()
-    except Exception as e:
-        logger.error("Erreur portfolio : %s", e)
-        portfolio_data = {"actions": [], "total_investi": 0, "total_actuel": 0, "gain_total": 0, "gain_pct": 0}
-        erreurs.append(f"Portfolio : {e}")
-
-    # 4. Alertes LLM sur portfolio (avec fallback)
-    alertes_text = None
-    if portfolio_data.get("actions"):
-        logger.info("Génération alertes portfolio via Ollama...")
-        try:
-            # Préparer les données pour le LLM
-            pf_summary = "\n".join(
-                f"{a['ticker']} ({a['nom']}) : {a['quantite']}x, achat {a['prix_achat']}€, "
-                f"actuel {a['prix_actuel']}€, variation jour {a['variation_jour']:+.2f}%"
-                for a in portfolio_data["actions"]
-            )
+    return portfolio.get_portfolio_pour_briefing()
+
+
+def invalider_portfolio():
+    """Oublie le portfolio mémorisé après un ajout ou un retrait de position.
+
+    L'historique et les analyses qui en dépendent sont recalculés avec lui.
+    """
+    _memo_etapes.oublier("portfolio")
+
+
+async def _etape_historique(entrees: dict) -> dict:
+    """Historique 5j pour chaque action du portfolio."""
+    tickers = [a["ticker"] for a in entrees["portfolio"].get("actions", [])]
+    return await executer_worker(yahoo_finance.get_tickers_history, tickers, "5d")
+
+
+async def _etape_alertes(entrees: dict, progression: Optional[Callable] = None) -> Optional[str]:
+    portfolio_data = entrees["portfolio"]
+    if not portfolio_data.get("actions"):
+        return None
+    logger.info("Génération alertes portfolio via Ollama...")
+    return await ollama_client.analyse_portfolio_alertes(
+        portfolio_data["actions"], entrees["historique"], on_token=_streaming(progression, "alertes"),
+    )
+
+
+async def _etape_analyses(entrees: dict, progression: Optional[Callable] = None) -> Optional[dict]:
+    """Analyse CAC40 et alertes en une requête Ollama (mode combiné).
+
+    Retourne None si Ollama n'a produit aucune des deux analyses : comme pour
+    les étapes séparées, ce résultat n'est pas mémorisé.
+    """
+    logger.info("Génération des analyses via Ollama (requête combinée)...")
+    analyses = await ollama_client.analyses_briefing(
+        entrees["cac40"],
+        entrees["portfolio"].get("actions", []),
+        entrees["historique"],
+        on_token=progression,
+    )
+    if not any(analyses.values()):
+        return None
+    return analyses
 
-            # Historique 5j pour chaque action
-            hist_summary = ""
-            for a in portfolio_data["actions"]:
-                hist = yahoo_finance.get_ticker_history(a["ticker"], "5d")
-                if hist:
-                    hist_lines = ", ".join(f"{h['date']}: {h['cloture']}€" for h in hist)
-                    hist_summary += f"{a['ticker']} : {hist_lines}\n"
 
-            alertes_text = ollama_client.analyse_portfolio_alertes(pf_summary, hist_summary)
-        except Exception as e:
-            logger.warning("Ollama alertes échoué : %s", e)
-            erreurs.append(f"Ollama alertes : {e}")
+def _extraire_analyse(cle: str) -> Callable:
+    """Étape extrayant une analyse du résultat combiné."""
+    async def extraire(entrees: dict) -> Optional[str]:
+        return (entrees["analyses"] or {}).get(cle)
+    return extraire
 
-    # 5. Météo
+
+def _etapes_llm(progression: Optional[Callable], budget_llm: float) -> list[Etape]:
+    """Étapes des analyses LLM.
+
+    En mode combiné, une seule requête attend marché et portfolio, puis ses
+    deux parties alimentent les étapes analyse_cac40 et alertes. Sinon,
+    chaque analyse démarre dès que ses propres données sont prêtes.
+    """
+    if Config.LLM_ANALYSE_COMBINEE:
+        return [
+            # Budget doublé : repli possible sur deux appels si la réponse JSON est illisible
+            Etape("analyses", partial(_etape_analyses, progression=progression),
+                  ("cac40", "portfolio", "historique"), defaut=dict, libelle="Ollama",
+                  budget=2 * budget_llm, fraicheur=60 * 60),
+            Etape("analyse_cac40", _extraire_analyse("analyse_cac40"), ("analyses",), budget=5),
+            Etape("alertes", _extraire_analyse("alertes"), ("analyses",), budget=5),
+        ]
+    return [
+        Etape("analyse_cac40", partial(_etape_analyse_cac40, progression=progression), ("cac40",),
+              libelle="Ollama CAC40", budget=budget_llm, fraicheur=60 * 60),
+        Etape("alertes", partial(_etape_alertes, progression=progression), ("portfolio", "historique"),
+              libelle="Ollama alertes", budget=budget_llm, fraicheur=60 * 60),
+    ]
+
+
+def _etape_config(entrees: dict) -> dict:
     ville = get_config_value("meteo_ville", "Marseille")
+    return {
+        "ville": ville,
+        # Sans trajet configuré, le score moto porte sur la seule ville météo
+        "trajet": moto_score.parser_trajet(get_config_value("moto_trajet", "")) or [ville],
+        "seuil_vent": float(get_config_value("moto_seuil_vent", "20")),
+        "seuil_pluie": float(get_config_value("moto_seuil_pluie", "50")),
+    }
+
+
+def _config_defaut() -> dict:
+    return {"ville": "Marseille", "trajet": ["Marseille"], "seuil_vent": 20.0, "seuil_pluie": 50.0}
+
+
+def _etape_meteo(entrees: dict) -> Optional[dict]:
+    ville = entrees["config"]["ville"]
     logger.info("Récupération météo pour %s...", ville)
-    try:
-        meteo_data = weather.get_weather(ville)
-    except Exception as e:
-        logger.error("Erreur météo : %s", e)
-        meteo_data = None
-        erreurs.append(f"Météo : {e}")
+    return weather.get_weather(ville)
 
-    # 5b. Prévisions horaires pour le score moto
-    hourly_forecast = None
-    try:
-        hourly_forecast = weather.get_hourly_forecast(ville, hours=12)
-    except Exception as e:
-        logger.warning("Prévisions horaires indisponibles : %s", e)
-
-    # 6. Score moto (avec prévisions 8h-19h)
-    seuil_vent = float(get_config_value("moto_seuil_vent", "20"))
-    seuil_pluie = float(get_config_value("moto_seuil_pluie", "50"))
-    moto_data = moto_score.calculer_score_moto(meteo_data, hourly_forecast, seuil_vent, seuil_pluie)
-
-    # 6b. Actualités (fallback gracieux si API indisponible)
-    world_news = []
-    tech_news = []
-    if Config.NEWSAPI_KEY:
-        news_api = NewsAPI(Config.NEWSAPI_KEY)
-        try:
-            logger.info("Récupération actualités...")
-            world_news = news_api.get_top_headlines(category="general", max_results=2)
-            tech_news = news_api.get_tech_ai_news(max_results=2)
-        except Exception as e:
-            logger.warning("Actualités indisponibles : %s", e)
-    else:
+
+async def previsions_trajet(trajet: list[str], heures: int = 12) -> Optional[list]:
+    """Prévisions des `heures` prochaines heures de chaque étape du trajet (en parallèle), combinées."""
+    previsions = await asyncio.gather(
+        *(asyncio.to_thread(weather.get_hourly_forecast, lieu, heures) for lieu in trajet)
+    )
+    return moto_score.combiner_previsions(trajet, previsions)
+
+
+async def _etape_previsions(entrees: dict) -> Optional[list]:
+    """Prévisions horaires des étapes du trajet pour le score moto."""
+    return await previsions_trajet(entrees["config"]["trajet"])
+
+
+def _etape_moto(entrees: dict) -> dict:
+    """Score moto (avec prévisions 8h-19h)."""
+    config = entrees["config"]
+    return moto_score.calculer_score_moto(
+        entrees["meteo"], entrees["previsions"], config["seuil_vent"], config["seuil_pluie"],
+    )
+
+
+def _news_vides() -> dict:
+    return {"monde": [], "tech": []}
+
+
+def _etape_articles(entrees: dict, planifie: bool = False) -> dict:
+    """Articles candidats de NewsAPI (fallback gracieux si API indisponible).
+
+    Avec NEWS_POOL, chaque catégorie est surdemandée : le briefing y puise les
+    articles inédits. `planifie` ouvre la réserve du quota NewsAPI.
+    """
+    if not Config.NEWSAPI_KEY:
         logger.debug("NEWSAPI_KEY non configurée, section actualités ignorée")
+        return _news_vides()
+
+    logger.info("Récupération actualités...")
+    news_api = NewsAPI(Config.NEWSAPI_KEY)
+    nombre = Config.NEWS_POOL if Config.NEWS_POOL > 0 else 2
+    return {
+        "monde": news_api.get_top_headlines(category="general", max_results=nombre, planifie=planifie),
+        "tech": news_api.get_tech_ai_news(max_results=nombre, planifie=planifie),
+    }
+
+
+def _etape_news(entrees: dict) -> dict:
+    """Actualités du briefing : articles candidats sans les doublons déjà livrés.
+
+    Jamais mémorisée : un article livré entre-temps est écarté même si les
+    candidats viennent du mémo.
+    """
+    monde = news_dedup.filtrer_articles(entrees["articles"]["monde"], 2)
+    return {"monde": monde, "tech": news_dedup.filtrer_articles(entrees["articles"]["tech"], 2, deja=monde)}
+
+
+async def marquer_news_livrees(result: dict):
+    """Mémorise les actualités d'un briefing livré aux cibles (écartées des prochains briefings).
 
-    # 7. Construction des embeds
+    Réservé à la livraison planifiée : un aperçu /briefing now n'est pas une livraison.
+    """
+    news = (result.get("resultats") or {}).get("news") or {}
+    articles = news.get("monde", []) + news.get("tech", [])
+    if articles:
+        await asyncio.to_thread(news_dedup.enregistrer_livres, articles)
+
+
+def construire_etapes(progression: Optional[Callable[[str, str], None]] = None,
+                      planifie: bool = False) -> list[Etape]:
+    """Graphe des étapes du briefing.
+
+    Les sources indépendantes (marché, portfolio, météo, actualités) démarrent
+    ensemble ; les analyses LLM démarrent dès que leurs données sont prêtes.
+    Chaque étape a un budget de latence (s) et une fenêtre de fraîcheur (s)
+    pendant laquelle son résultat peut être réutilisé par un briefing à la demande.
+    `progression(etape, texte)` reçoit le texte partiel des analyses LLM en streaming.
+    `planifie` signale le briefing planifié aux sources à quota (NewsAPI).
+    """
+    budget_llm = Config.OLLAMA_TIMEOUT + 10
+    return [
+        Etape("cac40", _etape_cac40, defaut=_cac40_vide, libelle="CAC40",
+              budget=90, fraicheur=15 * 60),
+        Etape("portfolio", _etape_portfolio, defaut=_portfolio_vide, libelle="Portfolio",
+              budget=45, fraicheur=10 * 60),
+        Etape("historique", _etape_historique, ("portfolio",), defaut=dict, libelle="Historique portfolio",
+              budget=45, fraicheur=6 * 3600),
+        *_etapes_llm(progression, budget_llm),
+        Etape("config", _etape_config, defaut=_config_defaut, libelle="Configuration", budget=10),
+        Etape("meteo", _etape_meteo, ("config",), libelle="Météo", budget=20, fraicheur=30 * 60),
+        Etape("previsions", _etape_previsions, ("config",), budget=20, fraicheur=60 * 60),
+        Etape("moto", _etape_moto, ("config", "meteo", "previsions"), libelle="Score moto",
+              budget=5, fraicheur=60 * 60),
+        Etape("articles", partial(_etape_articles, planifie=planifie), defaut=_news_vides,
+              budget=20, fraicheur=60 * 60),
+        Etape("news", _etape_news, ("articles",), defaut=_news_vides, budget=5),
+    ]
+
+
+def _section_en_retard(section: str, en_retard: set) -> bool:
+    return any(e in en_retard for e in SECTIONS_ETAPES[section])
+
+
+def rendre_sections(r: dict, en_retard: set = frozenset()) -> list[tuple[str, discord.Embed]]:
+    """Rend les sections du briefing dans l'ordre d'affichage.
+
+    Les sections dont une étape est en retard sont remplacées par un placeholder.
+    Retourne une liste de (nom de section, embed).
+    """
+    def retard(section: str) -> bool:
+        return _section_en_retard(section, en_retard)
+
+    sections = [
+        ("marche", build_section_marche(
+            r.get("cac40", {}),
+            r.get("analyse_cac40") or "*Analyse IA indisponible*",
+            en_retard=retard("marche"),
+            analyse_en_retard="analyse_cac40" in en_retard,
+        )),
+        ("portfolio", build_section_indisponible("💼 Portfolio Personnel") if retard("portfolio")
+            else build_section_portfolio(r["portfolio"])),
+        ("alertes", build_section_indisponible("🚨 Alertes & Points d'Attention") if retard("alertes")
+            else build_section_alertes(r["alertes"])),
+        ("meteo", build_section_indisponible("🌦️ Météo & Score Moto") if retard("meteo")
+            else build_section_meteo(r["meteo"], r["moto"])),
+        ("news", build_section_indisponible("📰 Actualités du jour") if retard("news")
+            else build_section_news(r["news"]["monde"], r["news"]["tech"])),
+    ]
+    sections = [(nom, embed) for nom, embed in sections if embed is not None]
+
+    # Footer sur le dernier embed
+    sections[-1][1].set_footer(text=FOOTER)
+    return sections
+
+
+def rendre_complement(r: dict, en_retard: set) -> list[tuple[str, discord.Embed]]:
+    """Rend uniquement les sections qui étaient en retard lors de l'envoi principal."""
+    sections = []
+    if _section_en_retard("marche", en_retard):
+        sections.append(("marche", build_section_marche(r["cac40"], r["analyse_cac40"] or "*Analyse IA indisponible*")))
+    elif "analyse_cac40" in en_retard and r["analyse_cac40"]:
+        sections.append(("marche", build_section_analyse(r["analyse_cac40"])))
+    if _section_en_retard("portfolio", en_retard):
+        sections.append(("portfolio", build_section_portfolio(r["portfolio"])))
+    if _section_en_retard("alertes", en_retard):
+        sections.append(("alertes", build_section_alertes(r["alertes"])))
+    if _section_en_retard("meteo", en_retard):
+        sections.append(("meteo", build_section_meteo(r["meteo"], r["moto"])))
+    if _section_en_retard("news", en_retard):
+        sections.append(("news", build_section_news(r["news"]["monde"], r["news"]["tech"])))
+
+    sections = [(nom, embed) for nom, embed in sections if embed is not None]
+    if sections:
+        sections[-1][1].set_footer(text=FOOTER_COMPLEMENT)
+    return sections
+
+
+async def _attendre_complement(suite: asyncio.Task, en_retard: set) -> Optional[dict]:
+    """Attend la fin des étapes en retard et rend les sections correspondantes.
+
+    Retourne un dict avec : embeds, sections, sections_completes, erreurs (None si abandon).
+    """
+    try:
+        complet = await asyncio.wait_for(suite, Config.BRIEFING_SUITE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error("Sections en retard abandonnées après %ds : %s",
+                     Config.BRIEFING_SUITE_TIMEOUT, ", ".join(sorted(en_retard)))
+        return None
+
+    r = complet["resultats"]
+    sections = rendre_complement(r, en_retard)
+    return {
+        "embeds": [embed for _, embed in sections],
+        "sections": sections,
+        "sections_completes": rendre_sections(r),
+        "erreurs": complet["erreurs"],
+    }
+
+
+async def generer_briefing(delai: Optional[float] = None, reutiliser: bool = False,
+                           progression: Optional[Callable[[str, str], None]] = None,
+                           planifie: bool = False) -> dict:
+    """Génère le briefing complet en respectant l'échéance de livraison.
+
+    Les sections en retard sont remplacées par un placeholder ; la tâche
+    `complement` (None si rien n'est en retard) retourne leurs embeds une fois prêts.
+    Avec `reutiliser`, seules les étapes dont le dernier résultat est périmé
+    sont recalculées (briefing à la demande). `progression(etape, texte)` est
+    appelé sur l'event loop avec le texte partiel des analyses LLM.
+    `planifie` est réservé au briefing planifié (réserve du quota NewsAPI).
+
+    Retourne un dict avec : ok, embeds, sections, erreurs, chrono, total_ms,
+    en_retard, echecs, complement, resultats (sorties des étapes)
+    """
+    delai = Config.BRIEFING_DEADLINE if delai is None else delai
+    logger.info("=== Début génération briefing (échéance %ds) ===", delai)
+    execution = await executer_pipeline(construire_etapes(progression, planifie), delai,
+                                        memo=_memo_etapes, reutiliser=reutiliser)
+    erreurs = execution["erreurs"]
+    en_retard = execution["en_retard"]
+
+    # Construction des embeds
     logger.info("Construction des embeds Discord...")
-    embeds = build_briefing_embed(
-        cac40_data=cac40_data,
-        analyse_cac40=analyse_cac40_text,
-        portfolio_data=portfolio_data,
-        alertes=alertes_text,
-        meteo=meteo_data,
-        moto_score=moto_data,
-        world_news=world_news,
-        tech_news=tech_news,
-    )
+    sections = rendre_sections(execution["resultats"], en_retard)
+    embeds = [embed for _, embed in sections]
+
+    complement = None
+    if en_retard:
+        complement = asyncio.create_task(_attendre_complement(execution["suite"], en_retard))
 
-    logger.info("=== Briefing généré avec succès (%d embeds, %d erreurs) ===", len(embeds), len(erreurs))
+    logger.info("=== Briefing généré avec succès (%d embeds, %d erreurs, %d étapes en retard) ===",
+                len(embeds), len(erreurs), len(en_retard))
 
     return {
-        "ok": len(erreurs) == 0,
+        "ok": len(erreurs) == 0 and not en_retard,
         "embeds": embeds,
+        "sections": sections,
         "erreurs": erreurs,
+        "chrono": execution["chrono"],
+        "total_ms": execution["chrono"].total() * 1000,
+        "en_retard": en_retard,
+        "echecs": execution["echecs"],
+        "complement": complement,
+        "resultats": execution["resultats"],
     }
 
 
-async def envoyer_briefing_webhook(embeds: list[discord.Embed]) -> bool:
-    """Envoie le briefing via Discord webhook.
+async def livrer_briefing(sections: list[tuple[str, discord.Embed]]) -> list[dict]:
+    """Livre un briefing rendu à toutes les cibles configurées, en parallèle.
 
-    Retourne True si l'envoi est réussi.
+    Retourne le statut de chaque cible (voir delivery.livrer_cibles).
     """
-    webhook_url = Config.DISCORD_WEBHOOK_URL
+    cibles = await asyncio.to_thread(charger_cibles)
+    if not cibles:
+        logger.error("Aucune cible de livraison (DISCORD_WEBHOOK_URL ou /cible add)")
+        return []
+    return await livrer_cibles(sections, cibles)
 
-    if not webhook_url:
-        logger.error("DISCORD_WEBHOOK_URL non configuré")
-        return False
 
-    try:
-        webhook = discord.SyncWebhook.from_url(webhook_url)
-        webhook.send(
-            username="Alita Briefing",
-            embeds=embeds,
-        )
-        logger.info("Briefing envoyé via webhook")
-        return True
-    except Exception as e:
-        logger.error("Erreur envoi webhook : %s", e)
-        return False
+def _erreurs_livraison(livraisons: list[dict]) -> list[str]:
+    if not livraisons:
+        return ["Aucune cible livrée"]
+    return [f"Livraison {l['cible']} : {l['erreur']}" for l in livraisons if not l["ok"]]
 
 
 async def run_briefing():
-    """Exécute le briefing complet : génération + envoi + log."""
-    try:
-        result = await generer_briefing()
-        embeds = result.get("embeds", [])
+    """Exécute le briefing complet : génération + envoi + log.
 
-        if embeds:
-            envoi_ok = await envoyer_briefing_webhook(embeds)
-        else:
-            envoi_ok = False
+    Ses générations Ollama passent avant celles des commandes à la demande.
+    """
+    try:
+        echeance = time.monotonic() + Config.BRIEFING_DEADLINE
+        with contexte_llm(PRIORITE_BRIEFING, echeance):
+            result = await generer_briefing(planifie=True)
+        sections = result.get("sections", [])
+
+        # Rendu une seule fois, livré à toutes les cibles
+        livraisons = await livrer_briefing(sections) if sections else []
+        erreurs_envoi = _erreurs_livraison(livraisons)
+        envoi_ok = not erreurs_envoi
+        if any(l["ok"] for l in livraisons):
+            await marquer_news_livrees(result)
 
         # Log en DB
-        contenu = f"{len(embeds)} embeds, erreurs: {result.get('erreurs', [])}"
-        log_briefing(
+        nb_livrees = sum(l["ok"] for l in livraisons)
+        contenu = (f"{len(sections)} embeds, {nb_livrees}/{len(livraisons)} cibles, "
+                   f"erreurs: {result.get('erreurs', [])}")
+        briefing_id = log_briefing(
             statut="SUCCESS" if envoi_ok else "ERREUR",
             contenu=contenu,
-            erreur="; ".join(result.get("erreurs", [])) if not envoi_ok else None,
+            erreur="; ".join(result.get("erreurs", []) + erreurs_envoi) if not envoi_ok else None,
+            sections=sections,
+            livraisons=livraisons,
         )
 
+        if result.get("complement"):
+            # Timings enregistrés une fois les étapes en retard terminées
+            tache = asyncio.create_task(_envoyer_complement(result, briefing_id))
+            _taches_complement.add(tache)
+            tache.add_done_callback(_taches_complement.discard)
+        elif briefing_id:
+            _enregistrer_timings_briefing(result, briefing_id)
+
         if result.get("erreurs"):
             logger.warning("Briefing envoyé avec %d erreurs : %s", len(result["erreurs"]), result["erreurs"])
 
@@ -209,8 +484,53 @@ async def run_briefing():
             pass
 
 
-def log_briefing(statut: str, contenu: str = None, erreur: str = None):
-    """Enregistre un log de briefing en DB."""
+async def _envoyer_complement(result: dict, briefing_id: Optional[int]):
+    """Envoie les sections en retard puis remplace le briefing stocké par sa version complète."""
+    try:
+        resultat = await result["complement"]
+        if not resultat:
+            return
+        if resultat["sections"]:
+            await livrer_briefing(resultat["sections"])
+        if briefing_id:
+            mettre_a_jour_payload(briefing_id, resultat["sections_completes"])
+    except Exception as e:
+        logger.error("Erreur envoi complément briefing : %s", e)
+    finally:
+        if briefing_id:
+            _enregistrer_timings_briefing(result, briefing_id)
+
+
+def _enregistrer_timings_briefing(result: dict, briefing_id: int):
+    enregistrer_timings(
+        briefing_id,
+        result["chrono"],
+        en_retard=result.get("en_retard", set()),
+        echecs=result.get("echecs", set()),
+        total_ms=result.get("total_ms"),
+    )
+
+
+def mettre_a_jour_payload(briefing_id: int, sections: list[tuple[str, discord.Embed]]):
+    """Remplace les sections stockées d'un briefing."""
+    donnees, taille_brute = serialiser_sections(sections)
+    with get_session() as session:
+        payload = session.query(BriefingPayload).filter_by(briefing_id=briefing_id).first()
+        if payload:
+            payload.donnees = donnees
+            payload.taille_brute = taille_brute
+        else:
+            session.add(BriefingPayload(briefing_id=briefing_id, donnees=donnees, taille_brute=taille_brute))
+
+
+def log_briefing(statut: str, contenu: str = None, erreur: str = None,
+                 sections: list[tuple[str, discord.Embed]] = None,
+                 livraisons: list[dict] = None) -> Optional[int]:
+    """Enregistre un log de briefing en DB, avec ses sections rendues et le
+    statut de livraison par cible si fournis.
+
+    Retourne l'id du log ou None en cas d'erreur.
+    """
     try:
         with get_session() as session:
             log = BriefingLog(
@@ -219,9 +539,79 @@ def log_briefing(statut: str, contenu: str = None, erreur: str = None):
                 statut=statut,
                 message_erreur=erreur,
             )
+            if sections:
+                donnees, taille_brute = serialiser_sections(sections)
+                log.payload = BriefingPayload(donnees=donnees, taille_brute=taille_brute)
+            for livraison in livraisons or []:
+                log.livraisons.append(BriefingDelivery(
+                    target_id=livraison["target_id"],
+                    cible=livraison["cible"],
+                    statut="SUCCESS" if livraison["ok"] else "ERREUR",
+                    nb_embeds=livraison["nb_embeds"],
+                    duree_ms=livraison["duree_ms"],
+                    message_erreur=livraison["erreur"],
+                ))
             session.add(log)
+            session.flush()  # Pour obtenir l'ID
+            return log.id
     except Exception as e:
         logger.error("Erreur log briefing DB : %s", e)
+        return None
+
+
+def charger_briefing(jour: Optional[date] = None) -> Optional[tuple[int, list[tuple]]]:
+    """Charge le dernier briefing stocké (du jour donné, heure de Paris, si précisé).
+
+    Retourne (id du log, sections) ou None si aucun briefing n'est stocké.
+    """
+    with get_session() as session:
+        query = session.query(BriefingLog).join(BriefingPayload)
+        if jour:
+            tz = pytz.timezone(Config.TIMEZONE)
+            debut = tz.localize(datetime.combine(jour, datetime.min.time()))
+            debut_utc = debut.astimezone(pytz.utc).replace(tzinfo=None)
+            query = query.filter(
+                BriefingLog.date_envoi >= debut_utc,
+                BriefingLog.date_envoi < debut_utc + timedelta(days=1),
+            )
+        log = query.order_by(BriefingLog.date_envoi.desc()).first()
+        if not log:
+            return None
+        return log.id, deserialiser_sections(log.payload.donnees)
+
+
+async def renvoyer_briefing(jour: Optional[date] = None) -> dict:
+    """Renvoie à toutes les cibles un briefing déjà rendu, sans régénération.
+
+    Retourne un dict avec : ok, message
+    """
+    debut = time.perf_counter()
+    try:
+        stocke = charger_briefing(jour)
+    except Exception as e:
+        logger.error("Erreur chargement briefing stocké : %s", e)
+        return {"ok": False, "message": f"❌ Erreur : {e}"}
+
+    if not stocke:
+        quand = jour.strftime("%d/%m/%Y") if jour else "récent"
+        return {"ok": False, "message": f"❌ Aucun briefing stocké ({quand})"}
+
+    briefing_id, sections = stocke
+    livraisons = await livrer_briefing(sections)
+    erreurs_envoi = _erreurs_livraison(livraisons)
+    duree_ms = (time.perf_counter() - debut) * 1000
+
+    log_briefing(
+        statut="ERREUR" if erreurs_envoi else "SUCCESS",
+        contenu=f"Renvoi du briefing #{briefing_id} ({len(sections)} embeds)",
+        erreur="; ".join(erreurs_envoi) or None,
+        livraisons=livraisons,
+    )
+
+    if erreurs_envoi:
+        return {"ok": False, "message": f"❌ Échec du renvoi du briefing #{briefing_id} : {'; '.join(erreurs_envoi)}"}
+    logger.info("Briefing #%d renvoyé en %.0f ms", briefing_id, duree_ms)
+    return {"ok": True, "message": f"✅ Briefing #{briefing_id} renvoyé ({duree_ms:.0f} ms)"}
 
 
 async def envoyer_erreur_critique(erreur: str):
@@ -237,8 +627,5 @@ async def envoyer_erreur_critique(erreur: str):
     )
     embed.set_footer(text="Vérifiez les logs : /logs")
 
-    try:
-        webhook = discord.SyncWebhook.from_url(webhook_url)
-        webhook.send(username="Alita Alertes", embeds=[embed])
-    except Exception as e:
-        logger.error("Impossible d'envoyer l'alerte critique : %s", e)
+    if not await envoyer_webhook(webhook_url, [embed], username="Alita Alertes"):
+        logger.error("Impossible d'envoyer l'alerte critique")
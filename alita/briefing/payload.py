@@ -0,0 +1,25 @@
+"""Sérialisation compacte des sections d'un briefing (stockage et renvoi)."""
+
+import json
+import zlib
+
+import discord
+
+
+def serialiser_sections(sections: list[tuple[str, discord.Embed]]) -> tuple[bytes, int]:
+    """Sérialise les sections (nom, embed) en JSON compressé zlib.
+
+    Le nom de section est conservé pour appliquer les filtres des cibles au renvoi.
+    Retourne (données compressées, taille du JSON brut en octets).
+    """
+    brut = json.dumps(
+        [{"section": nom, "embed": embed.to_dict()} for nom, embed in sections],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return zlib.compress(brut, 6), len(brut)
+
+
+def deserialiser_sections(donnees: bytes) -> list[tuple[str, discord.Embed]]:
+    """Reconstruit les sections depuis les données produites par serialiser_sections."""
+    return [(d["section"], discord.Embed.from_dict(d["embed"])) for d in json.loads(zlib.decompress(donnees))]
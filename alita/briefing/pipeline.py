@@ -0,0 +1,223 @@
+"""Exécution concurrente des étapes du briefing selon leurs dépendances."""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import time
+from typing import Any, Callable, Optional
+
+from alita.utils.chrono import Chronometre
+from alita.utils.logger import logger
+
+
+class Etape:
+    """Une étape du briefing.
+
+    Args:
+        nom: Identifiant de l'étape (clé dans les résultats)
+        fonction: Reçoit le dict des résultats de ses dépendances. Les fonctions
+            synchrones sont exécutées dans un thread, les coroutines sur l'event loop.
+        dependances: Noms des étapes dont le résultat est nécessaire
+        defaut: Valeur (ou factory) utilisée si l'étape échoue
+        libelle: Libellé remonté dans les erreurs du briefing (None = échec silencieux)
+        budget: Durée max (s) de l'étape avant qu'elle soit considérée en retard
+        fraicheur: Durée (s) pendant laquelle un résultat mémorisé reste réutilisable
+            (None = jamais réutilisé)
+    """
+
+    def __init__(
+        self,
+        nom: str,
+        fonction: Callable[[dict], Any],
+        dependances: tuple = (),
+        defaut: Any = None,
+        libelle: Optional[str] = None,
+        budget: Optional[float] = None,
+        fraicheur: Optional[float] = None,
+    ):
+        self.nom = nom
+        self.fonction = fonction
+        self.dependances = tuple(dependances)
+        self.defaut = defaut
+        self.libelle = libelle
+        self.budget = budget
+        self.fraicheur = fraicheur
+
+    def valeur_defaut(self) -> Any:
+        return self.defaut() if callable(self.defaut) else self.defaut
+
+
+class MemoEtapes:
+    """Résultats récents des étapes, réutilisables tant qu'ils sont frais.
+
+    Un résultat n'est réutilisé que si l'étape reçoit exactement les mêmes
+    entrées : une dépendance recalculée différemment invalide ses dépendantes.
+    """
+
+    def __init__(self):
+        self._entrees: dict[str, tuple[str, float, Any]] = {}
+
+    @staticmethod
+    def empreinte(entrees: dict) -> str:
+        brut = json.dumps(entrees, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha1(brut.encode("utf-8")).hexdigest()
+
+    def lire(self, etape: Etape, empreinte: str) -> tuple[bool, Any]:
+        """Retourne (trouvé, valeur) pour un résultat frais aux mêmes entrées."""
+        entree = self._entrees.get(etape.nom)
+        if entree is None or etape.fraicheur is None:
+            return False, None
+        empreinte_memo, horodatage, valeur = entree
+        if empreinte_memo != empreinte or time.monotonic() - horodatage > etape.fraicheur:
+            return False, None
+        return True, valeur
+
+    def ecrire(self, etape: Etape, empreinte: str, valeur: Any):
+        # None = donnée indisponible (API en erreur...) : on retentera au prochain briefing
+        if etape.fraicheur is not None and valeur is not None:
+            self._entrees[etape.nom] = (empreinte, time.monotonic(), valeur)
+
+    def oublier(self, nom: str):
+        """Invalide le résultat d'une étape ; ses dépendantes suivront (entrées changées)."""
+        self._entrees.pop(nom, None)
+
+    def vider(self):
+        self._entrees.clear()
+
+
+def ordre_topologique(etapes: list[Etape]) -> list[Etape]:
+    """Trie les étapes pour que chacune suive ses dépendances.
+
+    Lève ValueError si une dépendance est inconnue ou circulaire.
+    """
+    par_nom = {e.nom: e for e in etapes}
+    ordre, en_cours, visitees = [], set(), set()
+
+    def visiter(etape: Etape):
+        if etape.nom in visitees:
+            return
+        if etape.nom in en_cours:
+            raise ValueError(f"Dépendance circulaire sur l'étape {etape.nom}")
+        en_cours.add(etape.nom)
+        for dep in etape.dependances:
+            if dep not in par_nom:
+                raise ValueError(f"Étape {etape.nom} : dépendance inconnue {dep}")
+            visiter(par_nom[dep])
+        en_cours.discard(etape.nom)
+        visitees.add(etape.nom)
+        ordre.append(etape)
+
+    for etape in etapes:
+        visiter(etape)
+    return ordre
+
+
+async def executer_pipeline(etapes: list[Etape], delai: Optional[float] = None,
+                            memo: Optional[MemoEtapes] = None, reutiliser: bool = False) -> dict:
+    """Exécute les étapes au plus tôt : chacune démarre dès que ses dépendances sont prêtes.
+
+    Les résultats réussis sont mémorisés dans `memo` ; avec `reutiliser`, une
+    étape dont le résultat mémorisé est encore frais n'est pas recalculée.
+
+    Une étape est en retard si elle dépasse son budget, si une de ses dépendances
+    est en retard, ou si elle n'est pas terminée après `delai` secondes. Les étapes
+    en retard sont abandonnées pour le résultat principal mais continuent de
+    tourner : la tâche `suite` se termine quand toutes les étapes sont finies.
+
+    Retourne un dict avec : resultats (étapes à l'heure), erreurs, chrono,
+    en_retard, echecs et reutilisees (noms d'étapes), suite (tâche retournant
+    resultats et erreurs complets)
+    """
+    resultats: dict[str, Any] = {}
+    erreurs: list[str] = []
+    echecs: set[str] = set()
+    reutilisees: set[str] = set()
+    chrono = Chronometre()
+    taches: dict[str, asyncio.Task] = {}
+    dans_budget: dict[str, asyncio.Future] = {}
+    a_temps: dict[str, asyncio.Task] = {}
+    loop = asyncio.get_running_loop()
+
+    async def executer(etape: Etape, entrees: dict) -> Any:
+        empreinte = MemoEtapes.empreinte(entrees) if memo is not None and etape.fraicheur else None
+        if reutiliser and empreinte:
+            trouve, valeur = memo.lire(etape, empreinte)
+            if trouve:
+                logger.debug("Étape %s réutilisée (résultat encore frais)", etape.nom)
+                reutilisees.add(etape.nom)
+                return valeur
+
+        with chrono.mesurer(etape.nom):
+            try:
+                if inspect.iscoroutinefunction(etape.fonction):
+                    valeur = await etape.fonction(entrees)
+                else:
+                    valeur = await asyncio.to_thread(etape.fonction, entrees)
+            except Exception as e:
+                logger.warning("Étape %s échouée : %s", etape.nom, e)
+                echecs.add(etape.nom)
+                if etape.libelle:
+                    erreurs.append(f"{etape.libelle} : {e}")
+                return etape.valeur_defaut()
+
+        if empreinte:
+            memo.ecrire(etape, empreinte, valeur)
+        return valeur
+
+    async def lancer(etape: Etape):
+        if etape.dependances:
+            await asyncio.gather(*(taches[d] for d in etape.dependances))
+        entrees = {d: resultats[d] for d in etape.dependances}
+
+        calcul = asyncio.ensure_future(executer(etape, entrees))
+        try:
+            valeur = await asyncio.wait_for(asyncio.shield(calcul), etape.budget)
+            dans_budget[etape.nom].set_result(True)
+        except asyncio.TimeoutError:
+            logger.warning("Étape %s hors budget (%.0fs), livrée en complément", etape.nom, etape.budget)
+            dans_budget[etape.nom].set_result(False)
+            valeur = await calcul
+
+        resultats[etape.nom] = valeur
+
+    async def suivre(etape: Etape) -> bool:
+        for dep in etape.dependances:
+            if not await a_temps[dep]:
+                return False
+        return await asyncio.shield(dans_budget[etape.nom])
+
+    for etape in ordre_topologique(etapes):
+        dans_budget[etape.nom] = loop.create_future()
+        taches[etape.nom] = asyncio.create_task(lancer(etape), name=f"briefing-{etape.nom}")
+        a_temps[etape.nom] = asyncio.create_task(suivre(etape))
+
+    await asyncio.wait(a_temps.values(), timeout=delai)
+    en_retard = {
+        nom for nom, t in a_temps.items()
+        if not t.done() or not t.result()
+    }
+    for t in a_temps.values():
+        t.cancel()
+
+    if en_retard:
+        logger.warning("Étapes en retard : %s", ", ".join(sorted(en_retard)))
+    if reutilisees:
+        logger.info("Étapes réutilisées : %s", ", ".join(sorted(reutilisees)))
+    logger.info("Étapes du briefing : %s", chrono.resume())
+
+    async def completer() -> dict:
+        await asyncio.gather(*taches.values())
+        if en_retard:
+            logger.info("Étapes en retard terminées : %s", chrono.resume())
+        return {"resultats": dict(resultats), "erreurs": list(erreurs)}
+
+    return {
+        "resultats": {nom: v for nom, v in resultats.items() if nom not in en_retard},
+        "erreurs": list(erreurs),
+        "chrono": chrono,
+        "en_retard": en_retard,
+        "echecs": echecs,
+        "reutilisees": reutilisees,
+        "suite": asyncio.create_task(completer()),
+    }
@@ -3,10 +3,13 @@
 import asyncio
 import threading
 import time
+from datetime import datetime, timedelta
 
 import schedule
 
+from alita.config import Config
 from alita.briefing.generator import run_briefing, get_config_value
+from alita.modules.ollama_client import precharger_modele
 from alita.utils.logger import logger
 
 
@@ -23,10 +26,30 @@ class BriefingScheduler:
         logger.info("⏰ Déclenchement briefing planifié")
         future = asyncio.run_coroutine_threadsafe(run_briefing(), self._loop)
         try:
-            future.result(timeout=300)  # 5 min max
+            # Échéance du briefing + marge d'envoi (les sections en retard partent en complément)
+            future.result(timeout=Config.BRIEFING_DEADLINE + 60)
         except Exception as e:
             logger.error("Erreur exécution briefing planifié : %s", e)
 
+    def _job_prechargement(self):
+        """Charge le modèle Ollama avant le briefing."""
+        future = asyncio.run_coroutine_threadsafe(precharger_modele(), self._loop)
+        try:
+            future.result(timeout=Config.OLLAMA_TIMEOUT + 10)
+        except Exception as e:
+            logger.error("Erreur préchargement Ollama : %s", e)
+
+    def _planifier(self, heure: str):
+        """(Re)planifie le briefing quotidien et le préchargement du modèle."""
+        schedule.clear()
+        schedule.every().day.at(heure).do(self._job)
+
+        if Config.OLLAMA_PRECHARGEMENT_AVANCE > 0:
+            avance = timedelta(minutes=Config.OLLAMA_PRECHARGEMENT_AVANCE)
+            heure_prechargement = (datetime.strptime(heure, "%H:%M") - avance).strftime("%H:%M")
+            schedule.every().day.at(heure_prechargement).do(self._job_prechargement)
+            logger.info("Préchargement Ollama planifié à %s", heure_prechargement)
+
     def _run_scheduler(self):
         """Boucle du scheduler dans un thread séparé."""
         while self._running:
@@ -36,9 +59,7 @@ class BriefingScheduler:
     def start(self):
         """Démarre le scheduler."""
         heure = get_config_value("briefing_heure", "07:30")
-
-        schedule.clear()
-        schedule.every().day.at(heure).do(self._job)
+        self._planifier(heure)
 
         self._running = True
         self._thread = threading.Thread(target=self._run_scheduler, daemon=True)
@@ -54,6 +75,5 @@ class BriefingScheduler:
 
     def reschedule(self, nouvelle_heure: str):
         """Replanifie le briefing à une nouvelle heure."""
-        schedule.clear()
-        schedule.every().day.at(nouvelle_heure).do(self._job)
+        self._planifier(nouvelle_heure)
         logger.info("Briefing replanifié à %s", nouvelle_heure)
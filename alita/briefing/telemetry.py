@@ -0,0 +1,74 @@
+"""Télémétrie des étapes du briefing (durées persistées et statistiques)."""
+
+from datetime import datetime, timedelta
+
+from alita.database.db import get_session
+from alita.database.models import BriefingLog, BriefingStageTiming
+from alita.utils.chrono import Chronometre
+from alita.utils.helpers import percentile
+from alita.utils.logger import logger
+
+# Pseudo-étape : durée totale jusqu'à l'envoi principal
+ETAPE_TOTAL = "total"
+
+
+def enregistrer_timings(briefing_id: int, chrono: Chronometre, en_retard: set = frozenset(),
+                        echecs: set = frozenset(), total_ms: float | None = None):
+    """Enregistre la durée de chaque étape terminée d'un briefing."""
+    lignes = []
+    for etape, duree_ms in chrono.durees().items():
+        if etape in en_retard:
+            statut = "RETARD"
+        elif etape in echecs:
+            statut = "ERREUR"
+        else:
+            statut = "OK"
+        lignes.append(BriefingStageTiming(briefing_id=briefing_id, etape=etape, duree_ms=round(duree_ms), statut=statut))
+
+    if total_ms is not None:
+        lignes.append(BriefingStageTiming(briefing_id=briefing_id, etape=ETAPE_TOTAL, duree_ms=round(total_ms),
+                                          statut="RETARD" if en_retard else "OK"))
+
+    try:
+        with get_session() as session:
+            session.add_all(lignes)
+    except Exception as e:
+        logger.error("Erreur enregistrement timings briefing #%d : %s", briefing_id, e)
+
+
+def stats_etapes(jours: int = 30) -> list[dict]:
+    """Percentiles de durée par étape sur les `jours` derniers jours.
+
+    Retourne une liste de dicts (etape, n, p50_ms, p95_ms, max_ms, retards, erreurs)
+    triée par p95 décroissant.
+    """
+    depuis = datetime.utcnow() - timedelta(days=jours)
+    with get_session() as session:
+        lignes = (
+            session.query(BriefingStageTiming.etape, BriefingStageTiming.duree_ms, BriefingStageTiming.statut)
+            .join(BriefingLog)
+            .filter(BriefingLog.date_envoi >= depuis)
+            .all()
+        )
+
+    par_etape: dict[str, dict] = {}
+    for etape, duree_ms, statut in lignes:
+        groupe = par_etape.setdefault(etape, {"durees": [], "retards": 0, "erreurs": 0})
+        groupe["durees"].append(duree_ms)
+        groupe["retards"] += statut == "RETARD"
+        groupe["erreurs"] += statut == "ERREUR"
+
+    stats = [
+        {
+            "etape": etape,
+            "n": len(g["durees"]),
+            "p50_ms": round(percentile(g["durees"], 50)),
+            "p95_ms": round(percentile(g["durees"], 95)),
+            "max_ms": max(g["durees"]),
+            "retards": g["retards"],
+            "erreurs": g["erreurs"],
+        }
+        for etape, g in par_etape.items()
+    ]
+    stats.sort(key=lambda s: s["p95_ms"], reverse=True)
+    return stats
@@ -6,24 +6,29 @@ from datetime import datetime
 from alita.utils.helpers import format_prix, format_pourcentage, couleur_variation
 
 
-def build_briefing_embed(
-    cac40_data: dict,
-    analyse_cac40: str,
-    portfolio_data: dict,
-    alertes: str,
-    meteo: dict,
-    moto_score: dict,
-    world_news: list = None,
-    tech_news: list = None,
-) -> list[discord.Embed]:
-    """Construit les embeds Discord pour le briefing matinal.
-
-    Retourne une liste d'embeds (Discord limite à 6000 chars par embed).
-    """
-    embeds = []
+# Noms des sections du briefing, dans l'ordre d'affichage
+SECTIONS = ("marche", "portfolio", "alertes", "meteo", "news")
+
+PLACEHOLDER_RETARD = "⏳ *Données indisponibles pour l'instant, envoyées en complément dès que prêtes.*"
+FOOTER = "Alita Bot v1.0 | ASMO-01 Homelab"
+FOOTER_COMPLEMENT = "⏱️ Complément du briefing | Alita Bot v1.0"
+JOURS_SEMAINE = ("Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim")
+
+
+def build_section_marche(cac40_data: dict, analyse_cac40: str, en_retard: bool = False,
+                         analyse_en_retard: bool = False) -> discord.Embed:
+    """Embed d'en-tête du briefing : résumé CAC40 et analyse IA."""
     maintenant = datetime.now().strftime("%d/%m/%Y à %H:%M")
 
-    # --- Embed 1 : Header + CAC40 ---
+    if en_retard:
+        embed_cac = discord.Embed(
+            title="📊 Briefing Matinal Alita",
+            description=f"*{maintenant}*",
+            color=0x95A5A6,
+        )
+        embed_cac.add_field(name="📈 CAC40", value=PLACEHOLDER_RETARD, inline=False)
+        return embed_cac
+
     embed_cac = discord.Embed(
         title="📊 Briefing Matinal Alita",
         description=f"*{maintenant}*",
@@ -49,16 +54,29 @@ def build_briefing_embed(
     embed_cac.add_field(name="📈 CAC40", value=cac_text[:1024], inline=False)
 
     # Analyse LLM
-    if analyse_cac40:
+    if analyse_en_retard:
+        embed_cac.add_field(name="🤖 Analyse IA", value=PLACEHOLDER_RETARD, inline=False)
+    elif analyse_cac40:
         embed_cac.add_field(
             name="🤖 Analyse IA",
             value=analyse_cac40[:1024],
             inline=False,
         )
 
-    embeds.append(embed_cac)
+    return embed_cac
+
 
-    # --- Embed 2 : Portfolio ---
+def build_section_analyse(analyse_cac40: str) -> discord.Embed:
+    """Embed autonome de l'analyse IA (envoyé en complément)."""
+    return discord.Embed(
+        title="🤖 Analyse IA du CAC40",
+        description=analyse_cac40[:4096],
+        color=0x3498DB,
+    )
+
+
+def build_section_portfolio(portfolio_data: dict) -> discord.Embed:
+    """Embed du portfolio personnel."""
     embed_pf = discord.Embed(
         title="💼 Portfolio Personnel",
         color=couleur_variation(portfolio_data.get("gain_total", 0)),
@@ -104,18 +122,22 @@ def build_briefing_embed(
     else:
         embed_pf.add_field(name="Info", value="Portfolio vide. Utilisez `/portfolio add` pour commencer.", inline=False)
 
-    embeds.append(embed_pf)
+    return embed_pf
 
-    # --- Embed 3 : Alertes ---
-    if alertes:
-        embed_alertes = discord.Embed(
-            title="🚨 Alertes & Points d'Attention",
-            description=alertes[:4096],
-            color=0xF39C12,
-        )
-        embeds.append(embed_alertes)
 
-    # --- Embed 4 : Météo + Moto ---
+def build_section_alertes(alertes: str) -> discord.Embed | None:
+    """Embed des alertes LLM (None si pas d'alertes)."""
+    if not alertes:
+        return None
+    return discord.Embed(
+        title="🚨 Alertes & Points d'Attention",
+        description=alertes[:4096],
+        color=0xF39C12,
+    )
+
+
+def build_section_meteo(meteo: dict, moto_score: dict) -> discord.Embed:
+    """Embed météo et score moto."""
     embed_meteo = discord.Embed(
         title="🌦️ Météo & Score Moto",
         color=0x3498DB,
@@ -154,37 +176,41 @@ def build_briefing_embed(
             inline=True,
         )
 
-    embeds.append(embed_meteo)
+    return embed_meteo
 
-    # --- Embed 5 : Actualités (si disponibles) ---
-    if world_news or tech_news:
-        embed_news = discord.Embed(
-            title="📰 Actualités du jour",
-            color=0x9B59B6,
-        )
 
-        if world_news:
-            world_field = ""
-            for article in world_news[:2]:
-                world_field += f"📰 **{article['title']}**\n"
-                world_field += f"_{article['source']}_\n"
-                world_field += f"[Lire l'article]({article['url']})\n\n"
-            embed_news.add_field(name="🌍 Actualités Mondiales", value=world_field[:1024], inline=False)
+def build_section_news(world_news: list = None, tech_news: list = None) -> discord.Embed | None:
+    """Embed des actualités (None si aucune)."""
+    if not world_news and not tech_news:
+        return None
 
-        if tech_news:
-            tech_field = ""
-            for article in tech_news[:2]:
-                tech_field += f"🤖 **{article['title']}**\n"
-                tech_field += f"_{article['source']}_\n"
-                tech_field += f"[Lire l'article]({article['url']})\n\n"
-            embed_news.add_field(name="🚀 Tech & IA", value=tech_field[:1024], inline=False)
+    embed_news = discord.Embed(
+        title="📰 Actualités du jour",
+        color=0x9B59B6,
+    )
+
+    if world_news:
+        world_field = ""
+        for article in world_news[:2]:
+            world_field += f"📰 **{article['title']}**\n"
+            world_field += f"_{article['source']}_\n"
+            world_field += f"[Lire l'article]({article['url']})\n\n"
+        embed_news.add_field(name="🌍 Actualités Mondiales", value=world_field[:1024], inline=False)
 
-        embeds.append(embed_news)
+    if tech_news:
+        tech_field = ""
+        for article in tech_news[:2]:
+            tech_field += f"🤖 **{article['title']}**\n"
+            tech_field += f"_{article['source']}_\n"
+            tech_field += f"[Lire l'article]({article['url']})\n\n"
+        embed_news.add_field(name="🚀 Tech & IA", value=tech_field[:1024], inline=False)
 
-    # Footer sur le dernier embed
-    embeds[-1].set_footer(text="Alita Bot v1.0 | ASMO-01 Homelab")
+    return embed_news
 
-    return embeds
+
+def build_section_indisponible(titre: str) -> discord.Embed:
+    """Embed de remplacement pour une section en retard."""
+    return discord.Embed(title=titre, description=PLACEHOLDER_RETARD, color=0x95A5A6)
 
 
 def build_portfolio_list_embed(portfolio_data: dict) -> discord.Embed:
@@ -221,3 +247,26 @@ def build_portfolio_list_embed(portfolio_data: dict) -> discord.Embed:
     )
 
     return embed
+
+
+def build_moto_semaine_embed(jours: list[dict], trajet: list[str]) -> discord.Embed:
+    """Embed du score moto 8h-19h des prochains jours."""
+    embed = discord.Embed(
+        title="🏍️ Score Moto - 5 jours",
+        description=f"📍 {' → '.join(trajet)}",
+        color=0x3498DB,
+    )
+    if not jours:
+        embed.description += "\n\nAucune prévision disponible sur la plage 8h-19h."
+        return embed
+
+    for jour in jours:
+        score = jour["score"]
+        barre = "🟩" * score + "⬜" * (10 - score)
+        # Détails limités à la pénalité principale pour garder l'embed lisible
+        embed.add_field(
+            name=f"{JOURS_SEMAINE[jour['date'].weekday()]} {jour['date'].strftime('%d/%m')}",
+            value=f"{barre} **{score}/10**\n{jour['verdict']}\n{jour['details'][0]}"[:1024],
+            inline=False,
+        )
+    return embed
@@ -12,6 +12,7 @@ class Config:
     # Discord
     DISCORD_BOT_TOKEN: str = os.getenv("DISCORD_BOT_TOKEN", "")
     DISCORD_WEBHOOK_URL: str = os.getenv("DISCORD_WEBHOOK_URL", "")
+    WEBHOOK_MAX_TENTATIVES: int = int(os.getenv("WEBHOOK_MAX_TENTATIVES", "4"))
 
     # Base de données
     DB_HOST: str = os.getenv("DB_HOST", "alita-db")
@@ -20,6 +21,13 @@ class Config:
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
     DB_NAME: str = os.getenv("DB_NAME", "alita_db")
 
+    # Pool de connexions DB
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
     @classmethod
     def get_db_url(cls) -> str:
         """Retourne l'URL de connexion SQLAlchemy."""
@@ -32,11 +40,47 @@ class Config:
     # APIs
     OPENWEATHER_API_KEY: str = os.getenv("OPENWEATHER_API_KEY", "")
     NEWSAPI_KEY: str = os.getenv("NEWSAPI_KEY", "")
+    # Quota NewsAPI (requêtes/jour UTC) et part réservée au briefing planifié
+    NEWSAPI_QUOTA_JOUR: int = int(os.getenv("NEWSAPI_QUOTA_JOUR", "100"))
+    NEWSAPI_RESERVE: int = int(os.getenv("NEWSAPI_RESERVE", "20"))
+    # Durée de fraîcheur (s) des actualités en cache, par requête
+    NEWS_TTL_HEADLINES: int = int(os.getenv("NEWS_TTL_HEADLINES", "3600"))
+    NEWS_TTL_TECH: int = int(os.getenv("NEWS_TTL_TECH", str(3 * 3600)))
+    # Articles demandés par requête (0 = 2 articles), parmi lesquels les inédits sont servis ; redemandés
+    # à l'expiration de NEWS_TTL_* (au plus tard à minuit), chaque appel comptant dans le quota
+    NEWS_POOL: int = int(os.getenv("NEWS_POOL", "20"))
+    # Doublons : similarité (0-1) à partir de laquelle un article est écarté, mémoire des articles livrés (jours)
+    NEWS_SIMILARITE: float = float(os.getenv("NEWS_SIMILARITE", "0.5"))
+    NEWS_DEDUP_JOURS: int = int(os.getenv("NEWS_DEDUP_JOURS", "3"))
 
     # Ollama
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "http://host.docker.internal:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "mistral:7b")
     OLLAMA_TIMEOUT: int = int(os.getenv("OLLAMA_TIMEOUT", "60"))
+    # Générations simultanées (aligner sur OLLAMA_NUM_PARALLEL du serveur)
+    OLLAMA_NUM_PARALLEL: int = int(os.getenv("OLLAMA_NUM_PARALLEL", "2"))
+    # Durée de maintien du modèle en mémoire après une requête (format Ollama : "30m", "-1"...)
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    # Préchargement du modèle N minutes avant le briefing (0 = désactivé)
+    OLLAMA_PRECHARGEMENT_AVANCE: int = int(os.getenv("OLLAMA_PRECHARGEMENT_AVANCE", "5"))
+    # Cache des réponses LLM : durée de vie (s, 0 = désactivé) et nombre max d'entrées
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", str(72 * 3600)))
+    LLM_CACHE_MAX: int = int(os.getenv("LLM_CACHE_MAX", "500"))
+    # Taille max (tokens estimés) des prompts : au-delà, les lignes sans signal sont omises
+    LLM_BUDGET_PROMPT: int = int(os.getenv("LLM_BUDGET_PROMPT", "1200"))
+    # Analyse CAC40 et alertes portfolio en une seule requête JSON (repli sur deux requêtes)
+    LLM_ANALYSE_COMBINEE: bool = os.getenv("LLM_ANALYSE_COMBINEE", "true").lower() in ("1", "true", "yes")
+
+    # Briefing : échéance de livraison et attente max des sections en retard (s)
+    BRIEFING_DEADLINE: int = int(os.getenv("BRIEFING_DEADLINE", "150"))
+    BRIEFING_SUITE_TIMEOUT: int = int(os.getenv("BRIEFING_SUITE_TIMEOUT", "600"))
+
+    # Processus worker pour les traitements lourds (0 = threads du bot)
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "0"))
+
+    # Sondes /health : timeout de chaque sonde et durée de validité des résultats (s)
+    HEALTH_TIMEOUT: float = float(os.getenv("HEALTH_TIMEOUT", "5"))
+    HEALTH_CACHE_TTL: int = int(os.getenv("HEALTH_CACHE_TTL", "30"))
 
     # Config générale
     TIMEZONE: str = os.getenv("TIMEZONE", "Europe/Paris")
@@ -0,0 +1,108 @@
+"""Cache persistant des appels externes (table api_cache).
+
+Les clés sont préfixées par domaine ("llm:", "geo:", ...) : l'expiration et la
+limite de taille s'appliquent par préfixe.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from alita.database.db import get_session
+from alita.database.models import ApiCache
+from alita.utils.logger import logger
+
+
+def _prefixe(cle: str) -> str:
+    return cle.split(":", 1)[0] + ":"
+
+
+def lire_cache(cle: str) -> Optional[Any]:
+    """Retourne la donnée en cache si elle n'a pas expiré, sinon None."""
+    with get_session() as session:
+        entree = session.query(ApiCache).filter(
+            ApiCache.cache_key == cle,
+            ApiCache.expires_at > datetime.utcnow(),
+        ).first()
+        return entree.data if entree else None
+
+
+def ecrire_cache(cle: str, data: Any, ttl: float, max_entrees: Optional[int] = None):
+    """Enregistre (ou remplace) une donnée pour `ttl` secondes.
+
+    Les entrées expirées du même préfixe sont purgées ; au-delà de
+    `max_entrees`, celles qui expirent le plus tôt sont évincées.
+    """
+    maintenant = datetime.utcnow()
+    expires_at = maintenant + timedelta(seconds=ttl)
+    prefixe = _prefixe(cle)
+
+    try:
+        with get_session() as session:
+            entree = session.query(ApiCache).filter_by(cache_key=cle).first()
+            if entree:
+                entree.data = data
+                entree.expires_at = expires_at
+            else:
+                session.add(ApiCache(cache_key=cle, data=data, expires_at=expires_at))
+    except IntegrityError:
+        # Écrite en parallèle par un autre appel : la valeur est équivalente
+        logger.debug("Entrée de cache %s déjà présente", cle)
+        return
+
+    with get_session() as session:
+        du_prefixe = session.query(ApiCache).filter(ApiCache.cache_key.like(f"{prefixe}%"))
+        du_prefixe.filter(ApiCache.expires_at <= maintenant).delete(synchronize_session=False)
+
+        if max_entrees:
+            excedent = du_prefixe.count() - max_entrees
+            if excedent > 0:
+                ids = [
+                    i for (i,) in du_prefixe.with_entities(ApiCache.id)
+                    .order_by(ApiCache.expires_at).limit(excedent)
+                ]
+                session.query(ApiCache).filter(ApiCache.id.in_(ids)).delete(synchronize_session=False)
+                logger.debug("Cache %s : %d entrées évincées", prefixe, len(ids))
+
+
+def incrementer_compteur(cle: str, limite: int, ttl: float) -> Optional[int]:
+    """Incrémente le compteur `cle` (créé pour `ttl` secondes) s'il est sous `limite`.
+
+    La ligne est verrouillée pendant l'incrément (plusieurs processus possibles).
+    Retourne la nouvelle valeur, ou None si la limite est atteinte.
+    """
+    maintenant = datetime.utcnow()
+    try:
+        with get_session() as session:
+            entree = session.query(ApiCache).filter_by(cache_key=cle).with_for_update().first()
+            if entree is None:
+                entree = ApiCache(cache_key=cle, data={"valeur": 0}, expires_at=maintenant + timedelta(seconds=ttl))
+                session.add(entree)
+            elif entree.expires_at <= maintenant:
+                entree.data = {"valeur": 0}
+                entree.expires_at = maintenant + timedelta(seconds=ttl)
+
+            valeur = entree.data.get("valeur", 0)
+            if valeur >= limite:
+                return None
+            entree.data = {"valeur": valeur + 1}
+            return valeur + 1
+    except IntegrityError:
+        # Compteur créé en parallèle : l'incrémenter
+        return incrementer_compteur(cle, limite, ttl)
+
+
+def supprimer_cache(cle: str) -> bool:
+    """Supprime une entrée. Retourne True si elle existait."""
+    with get_session() as session:
+        return session.query(ApiCache).filter_by(cache_key=cle).delete(synchronize_session=False) > 0
+
+
+def purger_cache(prefixe: Optional[str] = None) -> int:
+    """Supprime les entrées (du préfixe donné, sinon toutes). Retourne le nombre supprimé."""
+    with get_session() as session:
+        query = session.query(ApiCache)
+        if prefixe:
+            query = query.filter(ApiCache.cache_key.like(f"{prefixe}%"))
+        return query.delete(synchronize_session=False)
@@ -1,11 +1,14 @@
 """Connexion et gestion de la base de données."""
 
+import asyncio
 from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from alita.config import Config
+from alita.database.pool import PoolInstrumente, instrumenter_engine, pool_stats
 from alita.utils.logger import logger
+from alita.utils.helpers import delai_backoff
 
 # Engine global (initialisé au premier appel)
 _engine = None
@@ -18,15 +21,29 @@ def get_engine():
     if _engine is None:
         _engine = create_engine(
             Config.get_db_url(),
-            pool_size=5,
-            max_overflow=10,
-            pool_recycle=3600,
+            poolclass=PoolInstrumente,
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE,
+            pool_pre_ping=Config.DB_POOL_PRE_PING,
             echo=False,
         )
-        logger.info("Connexion DB établie : %s:%s/%s", Config.DB_HOST, Config.DB_PORT, Config.DB_NAME)
+        instrumenter_engine(_engine)
+        logger.info(
+            "Connexion DB établie : %s:%s/%s (pool %d+%d, pre-ping %s)",
+            Config.DB_HOST, Config.DB_PORT, Config.DB_NAME,
+            Config.DB_POOL_SIZE, Config.DB_MAX_OVERFLOW, Config.DB_POOL_PRE_PING,
+        )
     return _engine
 
 
+def get_pool_stats() -> dict:
+    """Retourne les statistiques d'utilisation du pool de connexions."""
+    pool = _engine.pool if _engine is not None else None
+    return pool_stats.snapshot(pool)
+
+
 def get_session_factory():
     """Retourne la factory de sessions."""
     global _SessionLocal
@@ -50,6 +67,12 @@ def get_session():
         session.close()
 
 
+def init_schema():
+    """Crée les tables manquantes (bases initialisées avec un ancien init.sql)."""
+    from alita.database.models import Base
+    Base.metadata.create_all(get_engine(), checkfirst=True)
+
+
 def test_connection() -> bool:
     """Teste la connexion à la base de données."""
     try:
@@ -62,3 +85,39 @@ def test_connection() -> bool:
     except Exception as e:
         logger.error("Erreur connexion DB : %s", e)
         return False
+
+
+async def attendre_db(max_tentatives: int = 30, delai_base: float = 0.25, delai_max: float = 5.0) -> bool:
+    """Attend que la base de données soit disponible (backoff exponentiel).
+
+    Les tests de connexion tournent dans un thread pour ne pas bloquer l'event loop.
+    """
+    for tentative in range(max_tentatives):
+        if await asyncio.to_thread(test_connection):
+            return True
+        delai = delai_backoff(tentative, delai_base, delai_max)
+        logger.info("Attente DB... tentative %d/%d (nouvel essai dans %.2fs)", tentative + 1, max_tentatives, delai)
+        await asyncio.sleep(delai)
+
+    logger.error("Impossible de se connecter à la DB après %d tentatives", max_tentatives)
+    return False
+
+
+def warmup_pool(nb_connexions: int | None = None) -> int:
+    """Pré-ouvre des connexions pour que les premières requêtes n'attendent pas.
+
+    Retourne le nombre de connexions ouvertes puis rendues au pool.
+    """
+    engine = get_engine()
+    nb_connexions = nb_connexions or engine.pool.size()
+    connexions = []
+    try:
+        for _ in range(nb_connexions):
+            connexions.append(engine.connect())
+    except Exception as e:
+        logger.warning("Préchauffage du pool DB incomplet : %s", e)
+    finally:
+        for conn in connexions:
+            conn.close()
+    logger.info("Pool DB préchauffé (%d connexions)", len(connexions))
+    return len(connexions)
@@ -3,7 +3,7 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Numeric, Boolean, DateTime, Text, JSON,
-    Enum, ForeignKey, Index, create_engine,
+    Enum, ForeignKey, Index, LargeBinary, create_engine,
 )
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -87,3 +87,70 @@ class BriefingLog(Base):
         nullable=False,
     )
     message_erreur = Column(Text)
+
+    payload = relationship("BriefingPayload", uselist=False, back_populates="briefing", cascade="all, delete-orphan")
+    timings = relationship("BriefingStageTiming", back_populates="briefing", cascade="all, delete-orphan")
+    livraisons = relationship("BriefingDelivery", back_populates="briefing", cascade="all, delete-orphan")
+
+
+class BriefingPayload(Base):
+    """Embeds rendus d'un briefing (JSON compressé zlib) pour renvoi sans régénération."""
+    __tablename__ = "briefings_payload"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    briefing_id = Column(Integer, ForeignKey("briefings_log.id", ondelete="CASCADE"), unique=True, nullable=False)
+    donnees = Column(LargeBinary(16 * 1024 * 1024), nullable=False)  # MEDIUMBLOB
+    taille_brute = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    briefing = relationship("BriefingLog", back_populates="payload")
+
+
+class BriefingStageTiming(Base):
+    """Durée de chaque étape d'un briefing."""
+    __tablename__ = "briefing_stage_timings"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    briefing_id = Column(Integer, ForeignKey("briefings_log.id", ondelete="CASCADE"), nullable=False, index=True)
+    etape = Column(String(50), nullable=False)
+    duree_ms = Column(Integer, nullable=False)
+    statut = Column(
+        Enum("OK", "ERREUR", "RETARD", name="statut_etape_enum"),
+        nullable=False,
+    )
+
+    briefing = relationship("BriefingLog", back_populates="timings")
+
+
+class DeliveryTarget(Base):
+    """Cibles de livraison du briefing (webhooks), avec filtre de sections optionnel."""
+    __tablename__ = "delivery_targets"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nom = Column(String(50), unique=True, nullable=False)
+    webhook_url = Column(String(255), nullable=False)
+    sections = Column(JSON)  # Liste de sections, NULL = toutes
+    actif = Column(Boolean, default=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DeliveryTarget {self.nom}>"
+
+
+class BriefingDelivery(Base):
+    """Statut de livraison d'un briefing pour chaque cible."""
+    __tablename__ = "briefings_delivery"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    briefing_id = Column(Integer, ForeignKey("briefings_log.id", ondelete="CASCADE"), nullable=False, index=True)
+    target_id = Column(Integer, ForeignKey("delivery_targets.id", ondelete="SET NULL"))
+    cible = Column(String(50), nullable=False)
+    statut = Column(
+        Enum("SUCCESS", "ERREUR", name="statut_enum"),
+        nullable=False,
+    )
+    nb_embeds = Column(Integer, nullable=False, default=0)
+    duree_ms = Column(Integer)
+    message_erreur = Column(Text)
+
+    briefing = relationship("BriefingLog", back_populates="livraisons")
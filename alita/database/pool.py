@@ -0,0 +1,116 @@
+"""Instrumentation du pool de connexions SQLAlchemy."""
+
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from alita.utils.helpers import percentile
+
+
+class StatsPool:
+    """Compteurs du pool alimentés par les événements SQLAlchemy."""
+
+    def __init__(self, nb_echantillons: int = 1000):
+        self._lock = threading.Lock()
+        self._attentes = deque(maxlen=nb_echantillons)
+        self.checkouts = 0
+        self.en_cours = 0
+        self.pic_en_cours = 0
+        self.pic_overflow = 0
+        self.connexions_creees = 0
+        self.invalidations = 0
+        self.invalidations_douces = 0
+        self.timeouts = 0
+
+    def enregistrer_attente(self, duree: float):
+        """Enregistre le temps (s) passé à obtenir une connexion."""
+        with self._lock:
+            self._attentes.append(duree)
+
+    def enregistrer_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connexions_creees += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.en_cours += 1
+            self.pic_en_cours = max(self.pic_en_cours, self.en_cours)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.en_cours = max(0, self.en_cours - 1)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations_douces += 1
+
+    def noter_overflow(self, overflow: int):
+        with self._lock:
+            self.pic_overflow = max(self.pic_overflow, overflow)
+
+    def snapshot(self, pool=None) -> dict:
+        """Retourne l'état courant des compteurs (latences en ms)."""
+        with self._lock:
+            attentes_ms = [a * 1000 for a in self._attentes]
+            stats = {
+                "checkouts": self.checkouts,
+                "en_cours": self.en_cours,
+                "pic_en_cours": self.pic_en_cours,
+                "pic_overflow": self.pic_overflow,
+                "connexions_creees": self.connexions_creees,
+                "invalidations": self.invalidations,
+                "invalidations_douces": self.invalidations_douces,
+                "timeouts": self.timeouts,
+                "attente_p50_ms": round(percentile(attentes_ms, 50), 2),
+                "attente_p95_ms": round(percentile(attentes_ms, 95), 2),
+                "attente_max_ms": round(max(attentes_ms, default=0), 2),
+            }
+
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "taille": pool.size(),
+                "disponibles": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+            })
+        return stats
+
+
+# Stats globales (un seul engine par process)
+pool_stats = StatsPool()
+
+
+class PoolInstrumente(QueuePool):
+    """QueuePool mesurant le temps d'attente de chaque checkout."""
+
+    def connect(self):
+        debut = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            pool_stats.enregistrer_timeout()
+            raise
+        pool_stats.enregistrer_attente(time.perf_counter() - debut)
+        pool_stats.noter_overflow(self.overflow())
+        return conn
+
+
+def instrumenter_engine(engine):
+    """Branche les compteurs sur les événements du pool de l'engine."""
+    event.listen(engine, "connect", pool_stats.on_connect)
+    event.listen(engine, "checkout", pool_stats.on_checkout)
+    event.listen(engine, "checkin", pool_stats.on_checkin)
+    event.listen(engine, "invalidate", pool_stats.on_invalidate)
+    event.listen(engine, "soft_invalidate", pool_stats.on_soft_invalidate)
@@ -0,0 +1,163 @@
+"""Registre des sondes de santé des dépendances externes.
+
+Chaque sonde est une coroutine légère (pas de génération LLM, pas de
+requête NewsAPI décomptée du quota) exécutée avec un timeout court. Toutes
+les sondes tournent en parallèle ; leurs résultats sont gardés
+HEALTH_CACHE_TTL secondes, et une sonde déjà en cours est partagée entre
+les appels simultanés.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import aiohttp
+from sqlalchemy import text
+
+from alita.briefing.cibles import charger_cibles
+from alita.config import Config
+from alita.database.db import get_engine
+from alita.modules import ollama_client, yahoo_finance
+from alita.modules.news_api import NewsAPI, quota_utilise
+from alita.modules.weather import OPENWEATHER_URL
+from alita.utils.http import get_http_session
+
+SONDES: dict[str, Callable[[], Awaitable[dict]]] = {}
+
+_resultats: dict[str, dict] = {}
+_en_cours: dict[str, asyncio.Task] = {}
+
+
+def sonde(nom: str):
+    """Décorateur : enregistre une sonde retournant {"ok", "message"}."""
+    def enregistrer(fonction: Callable[[], Awaitable[dict]]):
+        SONDES[nom] = fonction
+        return fonction
+    return enregistrer
+
+
+def _timeout() -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(total=Config.HEALTH_TIMEOUT)
+
+
+async def _executer(nom: str) -> dict:
+    debut = time.perf_counter()
+    try:
+        resultat = await asyncio.wait_for(SONDES[nom](), Config.HEALTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        resultat = {"ok": False, "message": f"Pas de réponse en {Config.HEALTH_TIMEOUT:g}s"}
+    except Exception as e:
+        resultat = {"ok": False, "message": str(e) or type(e).__name__}
+
+    resultat = {
+        "nom": nom,
+        "ok": resultat["ok"],
+        "message": resultat["message"],
+        "latence_ms": round((time.perf_counter() - debut) * 1000),
+        "verifie_a": time.monotonic(),
+    }
+    _resultats[nom] = resultat
+    return resultat
+
+
+async def verifier(nom: str, force: bool = False) -> dict:
+    """Résultat de la sonde `nom` : en cache s'il est récent, sinon sonde (partagée).
+
+    Retourne un dict avec : nom, ok, message, latence_ms, verifie_a, cache
+    """
+    resultat = _resultats.get(nom)
+    if resultat and not force and time.monotonic() - resultat["verifie_a"] < Config.HEALTH_CACHE_TTL:
+        return {**resultat, "cache": True}
+
+    tache = _en_cours.get(nom)
+    if tache is None or tache.done() or tache.get_loop() is not asyncio.get_running_loop():
+        tache = asyncio.create_task(_executer(nom))
+        _en_cours[nom] = tache
+    # shield : un appelant annulé n'interrompt pas la sonde partagée
+    return {**await asyncio.shield(tache), "cache": False}
+
+
+async def verifier_tout(force: bool = False) -> list[dict]:
+    """Sonde toutes les dépendances en parallèle (résultats dans l'ordre du registre)."""
+    return list(await asyncio.gather(*(verifier(nom, force) for nom in SONDES)))
+
+
+def _ping_db():
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+@sonde("mariadb")
+async def _sonde_db() -> dict:
+    await asyncio.to_thread(_ping_db)
+    return {"ok": True, "message": "SELECT 1 OK"}
+
+
+@sonde("ollama")
+async def _sonde_ollama() -> dict:
+    resultat = await ollama_client.test_ollama()
+    return {"ok": resultat["ok"], "message": resultat["message"]}
+
+
+@sonde("yahoo")
+async def _sonde_yahoo() -> dict:
+    data = await asyncio.to_thread(yahoo_finance.get_ticker_price, "^FCHI")
+    if not data:
+        return {"ok": False, "message": "Pas de cotation pour ^FCHI"}
+    return {"ok": True, "message": f"CAC 40 à {data['prix_actuel']}"}
+
+
+@sonde("openweather")
+async def _sonde_openweather() -> dict:
+    if not Config.OPENWEATHER_API_KEY:
+        return {"ok": False, "message": "OPENWEATHER_API_KEY non configurée"}
+    session = await get_http_session()
+    params = {"q": "Paris,FR", "appid": Config.OPENWEATHER_API_KEY}
+    async with session.get(OPENWEATHER_URL, params=params, timeout=_timeout()) as response:
+        if response.status == 401:
+            return {"ok": False, "message": "Clé API refusée (401)"}
+        return {"ok": response.status == 200, "message": f"HTTP {response.status}"}
+
+
+@sonde("newsapi")
+async def _sonde_newsapi() -> dict:
+    """Requête volontairement sans clé : NewsAPI répond 401 sans décompter de quota."""
+    if not Config.NEWSAPI_KEY:
+        return {"ok": False, "message": "NEWSAPI_KEY non configurée"}
+    session = await get_http_session()
+    async with session.get(f"{NewsAPI.BASE_URL}/top-headlines/sources", timeout=_timeout()) as response:
+        data = await response.json(content_type=None)
+    if response.status == 401 and data.get("code") == "apiKeyMissing":
+        try:
+            quota = f"{await asyncio.to_thread(quota_utilise)}/{Config.NEWSAPI_QUOTA_JOUR}"
+        except Exception:
+            quota = "inconnu"
+        return {"ok": True, "message": f"Joignable (clé non testée) - quota du jour : {quota}"}
+    return {"ok": False, "message": f"Réponse inattendue : HTTP {response.status}"}
+
+
+async def _joindre_webhook(session: aiohttp.ClientSession, cible: dict) -> tuple[str, int]:
+    # GET sur un webhook retourne sa description sans rien publier
+    async with session.get(cible["webhook_url"], timeout=_timeout()) as response:
+        return cible["nom"], response.status
+
+
+@sonde("webhook")
+async def _sonde_webhook() -> dict:
+    cibles = await asyncio.to_thread(charger_cibles)
+    if not cibles:
+        return {"ok": False, "message": "Aucune cible de livraison configurée"}
+    session = await get_http_session()
+    statuts = await asyncio.gather(*(_joindre_webhook(session, c) for c in cibles), return_exceptions=True)
+
+    echecs = []
+    for cible, statut in zip(cibles, statuts):
+        if isinstance(statut, BaseException):
+            echecs.append(f"{cible['nom']} ({str(statut) or type(statut).__name__})")
+        elif statut[1] != 200:
+            echecs.append(f"{cible['nom']} (HTTP {statut[1]})")
+
+    message = f"{len(cibles) - len(echecs)}/{len(cibles)} cibles joignables"
+    if echecs:
+        message += " - échecs : " + ", ".join(echecs)
+    return {"ok": not echecs, "message": message}
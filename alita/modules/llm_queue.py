@@ -0,0 +1,201 @@
+"""File d'attente priorisée des générations Ollama.
+
+Une seule instance Ollama locale sert le briefing planifié et les commandes
+à la demande : les générations passent par une file qui limite la concurrence
+à OLLAMA_NUM_PARALLEL et sert les jobs par priorité (briefing planifié > commandes à la demande,
+/briefing now compris). Un job
+prioritaire dont l'échéance est menacée fait annuler la génération de plus
+basse priorité en cours.
+
+La priorité et l'échéance sont portées par le contexte (contextvars) : les
+tâches créées par le pipeline du briefing en héritent.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from alita.config import Config
+from alita.utils.helpers import percentile
+from alita.utils.logger import logger
+
+PRIORITE_BRIEFING = 0
+PRIORITE_ADHOC = 1
+NOMS_PRIORITES = {PRIORITE_BRIEFING: "briefing", PRIORITE_ADHOC: "adhoc"}
+
+# Intervalle (s) entre deux vérifications de l'échéance d'un job en attente
+INTERVALLE_ECHEANCE = 0.5
+
+_priorite: contextvars.ContextVar[int] = contextvars.ContextVar("priorite_llm", default=PRIORITE_ADHOC)
+_echeance: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("echeance_llm", default=None)
+
+
+def priorite_courante() -> int:
+    """Priorité du contexte courant."""
+    return _priorite.get()
+
+
+@contextmanager
+def contexte_llm(priorite: int, echeance: Optional[float] = None):
+    """Priorité et échéance (time.monotonic) des générations lancées dans ce contexte."""
+    jeton_priorite = _priorite.set(priorite)
+    jeton_echeance = _echeance.set(echeance)
+    try:
+        yield
+    finally:
+        _priorite.reset(jeton_priorite)
+        _echeance.reset(jeton_echeance)
+
+
+class JobLLM:
+    """Une génération en attente ou en cours."""
+
+    def __init__(self, priorite: int, echeance: Optional[float], seq: int):
+        self.priorite = priorite
+        self.echeance = echeance
+        self.seq = seq
+        self.tache = asyncio.current_task()
+        self.future: Optional[asyncio.Future] = None
+        self.debut_attente = time.monotonic()
+        self.abandonne = False  # Appelant annulé pendant l'attente
+        self.annule = False  # Annulé par la file au profit d'un job prioritaire
+
+    def __lt__(self, autre: "JobLLM") -> bool:
+        return (self.priorite, self.seq) < (autre.priorite, autre.seq)
+
+
+class FileLLM:
+    """File priorisée avec plafond de générations simultanées."""
+
+    def __init__(self, nb_echantillons: int = 200):
+        self._attente: list[JobLLM] = []
+        self._actifs: set[JobLLM] = set()
+        self._seq = itertools.count()
+        self._durees = deque(maxlen=50)
+        self._attentes = {p: deque(maxlen=nb_echantillons) for p in NOMS_PRIORITES}
+        self.traites = {p: 0 for p in NOMS_PRIORITES}
+        self.annules = 0
+        self.pic_attente = 0
+
+    @property
+    def capacite(self) -> int:
+        return max(1, Config.OLLAMA_NUM_PARALLEL)
+
+    def duree_estimee(self) -> float:
+        """Durée (s) typique d'une génération : médiane récente, sinon OLLAMA_TIMEOUT / 2."""
+        if not self._durees:
+            return Config.OLLAMA_TIMEOUT / 2
+        return percentile(list(self._durees), 50)
+
+    def _demarrer(self, job: JobLLM):
+        self._actifs.add(job)
+        self._attentes[job.priorite].append(time.monotonic() - job.debut_attente)
+
+    def _servir(self):
+        while self._attente and len(self._actifs) < self.capacite:
+            job = heapq.heappop(self._attente)
+            if job.abandonne:
+                continue
+            self._demarrer(job)
+            job.future.set_result(True)
+
+    async def acquerir(self) -> JobLLM:
+        """Attend un créneau de génération selon la priorité du contexte courant."""
+        job = JobLLM(_priorite.get(), _echeance.get(), next(self._seq))
+        if len(self._actifs) < self.capacite and not self._attente:
+            self._demarrer(job)
+            return job
+
+        job.future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._attente, job)
+        self.pic_attente = max(self.pic_attente, len(self._attente))
+        self._surveiller_echeance(job)
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            if job.future.done() and not job.future.cancelled():
+                # Créneau obtenu au moment de l'annulation : le rendre
+                self.liberer(job)
+            else:
+                job.abandonne = True
+            raise
+        return job
+
+    def liberer(self, job: JobLLM, duree: Optional[float] = None):
+        """Rend le créneau d'un job terminé (ou annulé) et sert le suivant."""
+        self._actifs.discard(job)
+        if duree is not None and not job.annule:
+            self._durees.append(duree)
+            self.traites[job.priorite] += 1
+        self._servir()
+
+    @asynccontextmanager
+    async def creneau(self):
+        """Context manager : créneau de génération, rendu à la sortie."""
+        job = await self.acquerir()
+        debut = time.monotonic()
+        try:
+            yield job
+        finally:
+            self.liberer(job, time.monotonic() - debut)
+
+    def _surveiller_echeance(self, job: JobLLM):
+        """Planifie la vérification de l'échéance d'un job en attente."""
+        if job.echeance is None:
+            return
+        delai = job.echeance - self.duree_estimee() - time.monotonic()
+        asyncio.get_running_loop().call_later(max(0.0, delai), self._verifier_echeance, job)
+
+    def _verifier_echeance(self, job: JobLLM):
+        """Échéance menacée : annule la génération en cours de plus basse priorité.
+
+        Répété toutes les INTERVALLE_ECHEANCE s jusqu'à ce que le job soit servi
+        ou que son échéance soit passée.
+        """
+        if job.future.done() or job.abandonne:
+            return
+        victimes = [a for a in self._actifs if a.priorite > job.priorite and not a.annule and a.tache]
+        if victimes:
+            victime = max(victimes)  # Plus basse priorité, puis plus récente
+            victime.annule = True
+            victime.tache.cancel()
+            self.annules += 1
+            logger.warning("Génération %s annulée : échéance du job %s menacée",
+                           NOMS_PRIORITES[victime.priorite], NOMS_PRIORITES[job.priorite])
+
+        # Revérifié tant que le job attend : une génération annulée peut tarder à
+        # rendre son créneau, ou une autre génération moins prioritaire l'occuper
+        if time.monotonic() < job.echeance:
+            asyncio.get_running_loop().call_later(INTERVALLE_ECHEANCE, self._verifier_echeance, job)
+
+    def snapshot(self) -> dict:
+        """Profondeur de la file, générations en cours et temps d'attente (ms) par priorité."""
+        en_attente = {nom: 0 for nom in NOMS_PRIORITES.values()}
+        for job in self._attente:
+            if not job.abandonne:
+                en_attente[NOMS_PRIORITES[job.priorite]] += 1
+        return {
+            "capacite": self.capacite,
+            "actifs": len(self._actifs),
+            "en_attente": en_attente,
+            "pic_attente": self.pic_attente,
+            "annules": self.annules,
+            "duree_estimee_s": round(self.duree_estimee(), 1),
+            "priorites": {
+                nom: {
+                    "traites": self.traites[p],
+                    "attente_p50_ms": round(percentile([a * 1000 for a in self._attentes[p]], 50)),
+                    "attente_p95_ms": round(percentile([a * 1000 for a in self._attentes[p]], 95)),
+                }
+                for p, nom in NOMS_PRIORITES.items()
+            },
+        }
+
+
+# File globale (une seule instance Ollama par bot)
+file_llm = FileLLM()
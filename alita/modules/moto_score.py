@@ -1,14 +1,41 @@
 """Calcul du score moto basé sur la météo avec analyse des prévisions 8h-19h."""
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
+import numpy as np
+
 from alita.utils.logger import logger
 
+# Fenêtre de trajet évaluée (heures des tranches dt_txt, en UTC comme OpenWeather)
+HEURE_DEBUT, HEURE_FIN = 8, 19
+
+
+def parser_trajet(texte: str) -> list[str]:
+    """Étapes du trajet : villes ou coordonnées "lat,lon", séparées par des points-virgules."""
+    return [etape.strip() for etape in (texte or "").split(";") if etape.strip()]
+
+
+def combiner_previsions(trajet: list[str], previsions: list[Optional[list]]) -> Optional[list]:
+    """Concatène les prévisions des étapes du trajet (chaque tranche marquée de son `lieu`).
+
+    Les étapes sans prévisions sont ignorées ; None si aucune n'en a.
+    """
+    combinees = []
+    for lieu, tranches in zip(trajet, previsions):
+        if tranches is None:
+            logger.warning("Prévisions indisponibles pour l'étape %s du trajet", lieu)
+            continue
+        combinees.extend({**t, "lieu": lieu} for t in tranches)
+    return combinees or None
+
 
 def _extraire_pire_conditions(hourly_forecast: list) -> dict:
     """Analyse les prévisions horaires entre 8h et 19h pour trouver les pires conditions.
 
+    Avec un trajet, les prévisions de toutes les étapes sont combinées :
+    le pire est pris sur l'ensemble du trajet.
+
     Retourne un dict avec les pires valeurs de la journée de travail.
     """
     pire = {
@@ -28,7 +55,7 @@ def _extraire_pire_conditions(hourly_forecast: list) -> dict:
                 heure = datetime.strptime(dt_txt, "%Y-%m-%d %H:%M:%S").hour
             except ValueError:
                 continue
-            if heure < 8 or heure > 19:
+            if heure < HEURE_DEBUT or heure > HEURE_FIN:
                 continue
 
         pluie = h.get("pluie_3h", 0)
@@ -56,15 +83,13 @@ def calculer_score_moto(meteo: dict, hourly_forecast: Optional[list] = None,
 
     Args:
         meteo: Données météo actuelles (depuis weather.get_weather)
-        hourly_forecast: Prévisions horaires (depuis weather.get_hourly_forecast)
+        hourly_forecast: Prévisions horaires (weather.get_hourly_forecast, ou
+            combiner_previsions pour un trajet)
         seuil_vent: Vitesse de vent max acceptable (km/h) - conservé pour compatibilité
         seuil_pluie: Probabilité de pluie max acceptable (%) - conservé pour compatibilité
 
     Retourne un dict avec : score, details (liste des pénalités), verdict
     """
-    score = 10
-    details = []
-
     if meteo is None:
         return {"score": 0, "details": ["❌ Données météo indisponibles"], "verdict": "🚫 NON - Conditions dangereuses"}
 
@@ -87,7 +112,19 @@ def calculer_score_moto(meteo: dict, hourly_forecast: Optional[list] = None,
         visibilite = 10000
         source = "météo actuelle"
 
-    logger.debug("Score moto basé sur %s", source)
+    resultat = evaluer_conditions(pluie, pop, vent, temp_min, temp_max, visibilite)
+    logger.debug("Score moto calculé : %d/10 (%s)", resultat["score"], source)
+    return resultat
+
+
+def evaluer_conditions(pluie: float, pop: float, vent: float, temp_min: float,
+                       temp_max: float, visibilite: float) -> dict:
+    """Score de 0 à 10 pour des conditions données (pop en %, vent en km/h).
+
+    Retourne un dict avec : score, details (liste des pénalités), verdict
+    """
+    score = 10
+    details = []
 
     # === PLUIE = RÉDHIBITOIRE ===
     if pluie > 0.5 or pop > 40:
@@ -149,10 +186,59 @@ def calculer_score_moto(meteo: dict, hourly_forecast: Optional[list] = None,
     if not details:
         details.append("✅ Aucune pénalité, conditions parfaites !")
 
-    logger.debug("Score moto calculé : %d/10 (%s)", score, source)
-
     return {
         "score": score,
         "details": details,
         "verdict": verdict,
     }
+
+
+def scores_par_jour(previsions: list) -> list[dict]:
+    """Score moto de la fenêtre 8h-19h de chaque jour des prévisions 5 jours.
+
+    Les tranches (de plusieurs étapes d'un trajet le cas échéant) sont
+    regroupées par jour UTC à partir de leur timestamp `dt` ; les pires
+    conditions de chaque jour sont calculées par opérations vectorisées.
+
+    Retourne une liste (par date croissante) de dicts : date, nb_tranches,
+    score, details, verdict
+    """
+    if not previsions:
+        return []
+
+    # Colonnes : dt, pluie, pop, vent, température, visibilité
+    tableau = np.array([
+        (p["dt"], p.get("pluie_3h", 0), p.get("pop", 0), p.get("vent_vitesse", 0),
+         p.get("temperature", 20), p.get("visibilite", 10000))
+        for p in previsions
+    ], dtype=float)
+    dt = tableau[:, 0].astype(np.int64)
+    heures = dt % 86400 // 3600
+    tableau = tableau[(heures >= HEURE_DEBUT) & (heures <= HEURE_FIN)]
+    if not len(tableau):
+        return []
+
+    jours, groupes = np.unique(tableau[:, 0].astype(np.int64) // 86400, return_inverse=True)
+
+    def pire(colonne: int, ufunc: np.ufunc, initial: float) -> np.ndarray:
+        resultat = np.full(len(jours), initial)
+        ufunc.at(resultat, groupes, tableau[:, colonne])
+        return resultat
+
+    pluie = pire(1, np.maximum, 0)
+    pop = pire(2, np.maximum, 0) * 100
+    vent = pire(3, np.maximum, 0)
+    temp_min = pire(4, np.minimum, 50)
+    temp_max = pire(4, np.maximum, -50)
+    visibilite = pire(5, np.minimum, 10000)
+    nb_tranches = np.bincount(groupes, minlength=len(jours))
+
+    return [
+        {
+            "date": date.fromordinal(date(1970, 1, 1).toordinal() + int(jour)),
+            "nb_tranches": int(nb_tranches[i]),
+            **evaluer_conditions(float(pluie[i]), float(pop[i]), float(vent[i]),
+                                 float(temp_min[i]), float(temp_max[i]), int(visibilite[i])),
+        }
+        for i, jour in enumerate(jours)
+    ]
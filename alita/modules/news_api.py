@@ -1,12 +1,70 @@
-"""Module de récupération d'actualités via NewsAPI.org."""
-
+"""Module de récupération d'actualités via NewsAPI.org.
+
+Les réponses sont gardées en cache (api_cache, préfixe "news:") avec une
+durée de fraîcheur propre à chaque requête (NEWS_TTL_*), jamais au-delà de
+minuit : chaque jour repart d'une réponse neuve. Chaque requête envoyée est
+décomptée d'un quota journalier persistant : au-delà de
+NEWSAPI_QUOTA_JOUR - NEWSAPI_RESERVE, seuls les appels du briefing planifié
+(`planifie=True`) peuvent encore interroger l'API ; les autres reçoivent le
+dernier résultat en cache, même périmé.
+"""
+
+import hashlib
+import json
 import logging
+import time
 import requests
 from typing import List, Dict
 from datetime import datetime, timedelta
 
+from alita.config import Config
+from alita.database.cache import ecrire_cache, incrementer_compteur, lire_cache
+from alita.utils.helpers import now_paris
+
 logger = logging.getLogger(__name__)
 
+# Conservation des réponses (s) : au-delà de leur fraîcheur, elles servent de repli
+RETENTION_CACHE = 48 * 3600
+
+
+def _cle_quota() -> str:
+    return f"quota:newsapi:{datetime.utcnow():%Y-%m-%d}"
+
+
+def quota_utilise() -> int:
+    """Requêtes NewsAPI envoyées aujourd'hui (jour UTC)."""
+    entree = lire_cache(_cle_quota())
+    return entree.get("valeur", 0) if entree else 0
+
+
+def _reserver_requete(planifie: bool) -> bool:
+    """Décompte une requête du quota du jour ; False si la limite applicable est atteinte.
+
+    Le briefing planifié peut puiser dans la réserve, pas les autres appels.
+    """
+    limite = Config.NEWSAPI_QUOTA_JOUR
+    if not planifie:
+        limite -= Config.NEWSAPI_RESERVE
+    try:
+        return incrementer_compteur(_cle_quota(), limite, ttl=2 * 24 * 3600) is not None
+    except Exception as e:
+        # Quota inconnu : ne pas priver le briefing d'actualités
+        logger.warning("Compteur de quota NewsAPI indisponible : %s", e)
+        return True
+
+
+def _fraicheur(ttl: int) -> float:
+    """Fin de fraîcheur (timestamp) d'une réponse : `ttl` secondes, sans dépasser minuit."""
+    maintenant = now_paris()
+    minuit = (maintenant + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return time.time() + min(ttl, (minuit - maintenant).total_seconds())
+
+
+def cle_cache(endpoint: str, params: dict) -> str:
+    """Clé de cache d'une requête (sans la clé d'API)."""
+    empreinte = json.dumps({"endpoint": endpoint, **params}, sort_keys=True)
+    return "news:" + hashlib.sha256(empreinte.encode()).hexdigest()
+
 
 class NewsAPI:
     """Client pour NewsAPI.org (free tier : 100 requêtes/jour)."""
@@ -16,80 +74,91 @@ class NewsAPI:
     def __init__(self, api_key: str):
         self.api_key = api_key
 
-    def get_top_headlines(self, category: str = "general", country: str = "fr", max_results: int = 3) -> List[Dict]:
-        """Récupère les headlines importantes.
-
-        Categories : general, technology, business, science
-
-        Returns: Liste d'articles avec title, description, url, source
-        """
+    def _articles(self, endpoint: str, params: dict, ttl: int, planifie: bool) -> List[Dict]:
+        """Articles bruts d'une requête : cache frais, sinon API si le quota le permet,
+        sinon dernier résultat en cache (liste vide à défaut)."""
+        cle = cle_cache(endpoint, params)
         try:
-            url = f"{self.BASE_URL}/top-headlines"
-            params = {
-                "apiKey": self.api_key,
-                "country": country,
-                "category": category,
-                "pageSize": max_results,
-            }
+            entree = lire_cache(cle)
+        except Exception as e:
+            logger.warning("Lecture du cache NewsAPI impossible : %s", e)
+            entree = None
+        if entree and time.time() < entree["frais_jusqu_a"]:
+            return entree["articles"]
+
+        perime = entree["articles"] if entree else []
+        if not _reserver_requete(planifie):
+            logger.warning("Quota NewsAPI du jour presque atteint : %s servi depuis le cache (%d articles)",
+                           endpoint, len(perime))
+            return perime
 
-            response = requests.get(url, params=params, timeout=10)
+        try:
+            response = requests.get(f"{self.BASE_URL}/{endpoint}", params={**params, "apiKey": self.api_key},
+                                    timeout=10)
             response.raise_for_status()
-
-            data = response.json()
-            articles = data.get("articles", [])
-
-            return [
-                {
-                    "title": article["title"],
-                    "description": article.get("description", ""),
-                    "url": article["url"],
-                    "source": article["source"]["name"],
-                    "published_at": article["publishedAt"],
-                }
-                for article in articles
-                if article.get("title") and article.get("url")
-            ]
-
+            articles = response.json().get("articles", [])
         except requests.exceptions.RequestException as e:
-            logger.error("Erreur NewsAPI : %s", e)
-            return []
-
-    def get_tech_ai_news(self, max_results: int = 2) -> List[Dict]:
-        """Récupère les news tech/IA spécifiquement.
+            logger.error("Erreur NewsAPI (%s) : %s", endpoint, e)
+            return perime
 
-        Recherche sur mots-clés : AI, artificial intelligence, machine learning
-        """
         try:
-            url = f"{self.BASE_URL}/everything"
+            ecrire_cache(cle, {"articles": articles, "frais_jusqu_a": _fraicheur(ttl)}, RETENTION_CACHE)
+        except Exception as e:
+            logger.warning("Écriture du cache NewsAPI impossible : %s", e)
+        return articles
 
-            yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-
-            params = {
-                "apiKey": self.api_key,
-                "q": 'AI OR "artificial intelligence" OR "machine learning"',
-                "language": "en",
-                "sortBy": "popularity",
-                "from": yesterday,
-                "pageSize": max_results,
-            }
+    def get_top_headlines(self, category: str = "general", country: str = "fr", max_results: int = 3,
+                          planifie: bool = False) -> List[Dict]:
+        """Récupère les headlines importantes (en cache NEWS_TTL_HEADLINES secondes).
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+        Categories : general, technology, business, science
+        `planifie` : appel du briefing planifié, autorisé à puiser dans la réserve du quota.
 
-            data = response.json()
-            articles = data.get("articles", [])
+        Returns: Liste d'articles avec title, description, url, source
+        """
+        params = {
+            "country": country,
+            "category": category,
+            "pageSize": max_results,
+        }
+        articles = self._articles("top-headlines", params, Config.NEWS_TTL_HEADLINES, planifie)
+
+        return [
+            {
+                "title": article["title"],
+                "description": article.get("description", ""),
+                "url": article["url"],
+                "source": article["source"]["name"],
+                "published_at": article["publishedAt"],
+            }
+            for article in articles
+            if article.get("title") and article.get("url")
+        ]
 
-            return [
-                {
-                    "title": article["title"],
-                    "description": article.get("description", ""),
-                    "url": article["url"],
-                    "source": article["source"]["name"],
-                }
-                for article in articles
-                if article.get("title") and article.get("url")
-            ]
+    def get_tech_ai_news(self, max_results: int = 2, planifie: bool = False) -> List[Dict]:
+        """Récupère les news tech/IA spécifiquement (en cache NEWS_TTL_TECH secondes).
 
-        except requests.exceptions.RequestException as e:
-            logger.error("Erreur NewsAPI tech : %s", e)
-            return []
+        Recherche sur mots-clés : AI, artificial intelligence, machine learning
+        `planifie` : appel du briefing planifié, autorisé à puiser dans la réserve du quota.
+        """
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+
+        params = {
+            "q": 'AI OR "artificial intelligence" OR "machine learning"',
+            "language": "en",
+            "sortBy": "popularity",
+            "from": yesterday,
+            "pageSize": max_results,
+        }
+        articles = self._articles("everything", params, Config.NEWS_TTL_TECH, planifie)
+
+        return [
+            {
+                "title": article["title"],
+                "description": article.get("description", ""),
+                "url": article["url"],
+                "source": article["source"]["name"],
+            }
+            for article in articles
+            if article.get("title") and article.get("url")
+        ]
@@ -0,0 +1,161 @@
+"""Détection des actualités quasi identiques (MinHash + LSH).
+
+Chaque article (titre + description) est réduit à une signature MinHash de
+ses 4-grammes de caractères. Les signatures des articles livrés ces
+NEWS_DEDUP_JOURS derniers jours sont indexées par bandes (LSH) et gardées
+en DB (api_cache, clé "dedup:news") : un article candidat n'est comparé
+qu'aux quelques articles qui partagent une bande avec lui.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+
+from alita.config import Config
+from alita.database.cache import ecrire_cache, lire_cache
+from alita.utils.logger import logger
+
+CLE_INDEX = "dedup:news"
+TAILLE_SHINGLE = 4
+NB_BANDES, LIGNES_PAR_BANDE = 32, 2
+NB_PERMUTATIONS = NB_BANDES * LIGNES_PAR_BANDE
+_PREMIER = (1 << 31) - 1
+
+# Permutations fixes : les signatures restent comparables d'un démarrage à l'autre
+_rng = np.random.default_rng(20240315)
+_A = _rng.integers(1, _PREMIER, NB_PERMUTATIONS, dtype=np.int64)
+_B = _rng.integers(0, _PREMIER, NB_PERMUTATIONS, dtype=np.int64)
+
+
+def normaliser(article: dict) -> str:
+    """Titre et description en minuscules, sans accents, ponctuation ni suffixe « - Source »."""
+    titre = article.get("title") or ""
+    source = article.get("source") or ""
+    if source and titre.endswith(f" - {source}"):
+        titre = titre[: -len(source) - 3]
+    texte = unicodedata.normalize("NFKD", f"{titre} {article.get('description') or ''}".lower())
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", texte).strip()
+
+
+def signature(article: dict) -> np.ndarray:
+    """Signature MinHash (NB_PERMUTATIONS entiers) de l'article."""
+    texte = normaliser(article)
+    shingles = {texte[i:i + TAILLE_SHINGLE] for i in range(max(1, len(texte) - TAILLE_SHINGLE + 1))}
+    # crc32 plutôt que hash() : stable entre processus
+    valeurs = np.fromiter((zlib.crc32(s.encode()) % _PREMIER for s in shingles), dtype=np.int64)
+    return ((_A[:, None] * valeurs[None, :] + _B[:, None]) % _PREMIER).min(axis=1)
+
+
+def _bandes(sig: np.ndarray) -> list[bytes]:
+    return [bytes([b]) + sig[b * LIGNES_PAR_BANDE:(b + 1) * LIGNES_PAR_BANDE].tobytes()
+            for b in range(NB_BANDES)]
+
+
+class IndexDoublons:
+    """Signatures d'articles indexées par bandes LSH."""
+
+    def __init__(self):
+        self.signatures: list[np.ndarray] = []
+        self.horodatages: list[float] = []
+        self._buckets: dict[bytes, list[int]] = {}
+
+    def ajouter(self, sig: np.ndarray, horodatage: Optional[float] = None):
+        indice = len(self.signatures)
+        self.signatures.append(sig)
+        self.horodatages.append(time.time() if horodatage is None else horodatage)
+        for bande in _bandes(sig):
+            self._buckets.setdefault(bande, []).append(indice)
+
+    def similarite_max(self, sig: np.ndarray) -> float:
+        """Similarité (Jaccard estimée) avec l'article indexé le plus proche."""
+        candidats = {i for bande in _bandes(sig) for i in self._buckets.get(bande, ())}
+        if not candidats:
+            return 0.0
+        proches = np.stack([self.signatures[i] for i in candidats])
+        return float((proches == sig).mean(axis=1).max())
+
+    def purger(self, avant: float) -> "IndexDoublons":
+        """Nouvel index sans les articles livrés avant `avant`."""
+        index = IndexDoublons()
+        for sig, horodatage in zip(self.signatures, self.horodatages):
+            if horodatage >= avant:
+                index.ajouter(sig, horodatage)
+        return index
+
+    def vers_dict(self) -> dict:
+        return {"signatures": [s.tolist() for s in self.signatures], "horodatages": self.horodatages}
+
+    @classmethod
+    def depuis_dict(cls, data: dict) -> "IndexDoublons":
+        index = cls()
+        for sig, horodatage in zip(data.get("signatures", []), data.get("horodatages", [])):
+            if len(sig) == NB_PERMUTATIONS:
+                index.ajouter(np.array(sig, dtype=np.int64), horodatage)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+
+_index: Optional[IndexDoublons] = None
+_verrou = threading.Lock()
+
+
+def _get_index() -> IndexDoublons:
+    """Index des articles livrés (chargé depuis la DB au premier appel)."""
+    global _index
+    if _index is None:
+        try:
+            data = lire_cache(CLE_INDEX)
+        except Exception as e:
+            logger.warning("Lecture de l'index des actualités livrées impossible : %s", e)
+            data = None
+        _index = IndexDoublons.depuis_dict(data or {})
+    return _index
+
+
+def filtrer_articles(articles: list[dict], nombre: int, deja: Iterable[dict] = ()) -> list[dict]:
+    """Les `nombre` premiers articles qui ne doublonnent ni un article livré récemment,
+    ni un article déjà retenu (`deja` ou plus haut dans la liste)."""
+    seuil = Config.NEWS_SIMILARITE
+    retenus = IndexDoublons()
+    for article in deja:
+        retenus.ajouter(signature(article))
+
+    with _verrou:
+        livres = _get_index()
+        gardes = []
+        for article in articles:
+            if len(gardes) >= nombre:
+                break
+            sig = signature(article)
+            if livres.similarite_max(sig) >= seuil or retenus.similarite_max(sig) >= seuil:
+                logger.debug("Actualité écartée (doublon) : %s", article.get("title"))
+                continue
+            retenus.ajouter(sig)
+            gardes.append(article)
+    return gardes
+
+
+def enregistrer_livres(articles: list[dict]):
+    """Ajoute les articles livrés à l'index et le sauvegarde (sans les articles expirés)."""
+    global _index
+    if not articles:
+        return
+    retention = Config.NEWS_DEDUP_JOURS * 86400
+    with _verrou:
+        index = _get_index().purger(time.time() - retention)
+        for article in articles:
+            index.ajouter(signature(article))
+        _index = index
+        data = index.vers_dict()
+    try:
+        ecrire_cache(CLE_INDEX, data, retention)
+    except Exception as e:
+        logger.warning("Sauvegarde de l'index des actualités livrées impossible : %s", e)
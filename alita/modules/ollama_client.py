@@ -1,133 +1,272 @@
-"""Client pour l'API Ollama (LLM local)."""
+"""Client asynchrone pour l'API Ollama (LLM local).
 
-from typing import Optional
-import requests
-
-from alita.config import Config
-from alita.utils.logger import logger
+Les requêtes passent par la session HTTP partagée (keep-alive) et ne
+bloquent pas l'event loop. Les générations passent par la file priorisée
+(llm_queue) limitée à OLLAMA_NUM_PARALLEL, le nombre de requêtes que le
+serveur traite en parallèle.
+Les réponses sont mises en cache en DB : des entrées identiques (marché fermé
+le week-end...) sont servies sans regénération.
+"""
 
+import asyncio
+import hashlib
+import json
+import re
+import time
+from typing import AsyncIterator, Callable, Optional
 
-def generate(prompt: str, temperature: float = 0.3) -> Optional[str]:
-    """Envoie un prompt à Ollama et retourne la réponse.
+import aiohttp
 
-    Args:
-        prompt: Le prompt à envoyer
-        temperature: Température de génération (0.0 = déterministe, 1.0 = créatif)
+from alita.config import Config
+from alita.database.cache import ecrire_cache, lire_cache
+from alita.modules.llm_queue import NOMS_PRIORITES, file_llm
+from alita.modules.prompts import NUM_PREDICT, num_ctx, nombre, pourcentage, tableau
+from alita.utils.http import get_http_session
+from alita.utils.logger import logger
 
-    Retourne la réponse texte ou None en cas d'erreur.
-    """
-    url = f"{Config.OLLAMA_HOST}/api/generate"
 
+def _payload(prompt: str, temperature: float, format_json: bool = False,
+             num_predict: int = NUM_PREDICT) -> dict:
     payload = {
         "model": Config.OLLAMA_MODEL,
         "prompt": prompt,
-        "stream": False,
+        "keep_alive": Config.OLLAMA_KEEP_ALIVE,
         "options": {
             "temperature": temperature,
-            "num_predict": 500,
+            "num_predict": num_predict,
+            # Contexte dimensionné sur le prompt (le défaut du modèle est souvent bien plus grand)
+            "num_ctx": num_ctx(prompt, num_predict),
         },
     }
+    if format_json:
+        payload["format"] = "json"
+    return payload
+
 
+def cle_cache(payload: dict) -> str:
+    """Clé de cache : empreinte du modèle, du prompt, de la température et des options."""
+    # keep_alive est sans effet sur le texte généré
+    significatif = {k: v for k, v in payload.items() if k != "keep_alive"}
+    brut = json.dumps(significatif, sort_keys=True, ensure_ascii=False)
+    return "llm:" + hashlib.sha256(brut.encode("utf-8")).hexdigest()
+
+
+async def _lire_cache(cle: str) -> Optional[str]:
+    if Config.LLM_CACHE_TTL <= 0:
+        return None
     try:
-        response = requests.post(url, json=payload, timeout=Config.OLLAMA_TIMEOUT)
+        data = await asyncio.to_thread(lire_cache, cle)
+    except Exception as e:
+        logger.warning("Lecture du cache LLM impossible : %s", e)
+        return None
+    return data.get("response") if data else None
+
+
+async def _ecrire_cache(cle: str, reponse: str):
+    if Config.LLM_CACHE_TTL <= 0:
+        return
+    try:
+        await asyncio.to_thread(
+            ecrire_cache, cle, {"model": Config.OLLAMA_MODEL, "response": reponse},
+            Config.LLM_CACHE_TTL, Config.LLM_CACHE_MAX,
+        )
+    except Exception as e:
+        logger.warning("Écriture du cache LLM impossible : %s", e)
+
+
+async def _flux(payload: dict) -> AsyncIterator[str]:
+    """Fragments d'une génération en streaming ; OLLAMA_TIMEOUT couvre la génération complète."""
+    session = await get_http_session()
+    url = f"{Config.OLLAMA_HOST}/api/generate"
+    timeout = aiohttp.ClientTimeout(total=Config.OLLAMA_TIMEOUT)
+
+    async with session.post(url, json={**payload, "stream": True}, timeout=timeout) as response:
         response.raise_for_status()
+        async for ligne in response.content:
+            if not ligne.strip():
+                continue
+            data = json.loads(ligne)
+            if data.get("error"):
+                raise aiohttp.ClientError(data["error"])
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                return
+
+
+async def _generer(payload: dict, on_token: Optional[Callable[[str], None]]) -> str:
+    if on_token:
+        fragments = []
+        async for fragment in _flux(payload):
+            fragments.append(fragment)
+            on_token("".join(fragments))
+        return "".join(fragments).strip()
+
+    session = await get_http_session()
+    url = f"{Config.OLLAMA_HOST}/api/generate"
+    timeout = aiohttp.ClientTimeout(total=Config.OLLAMA_TIMEOUT)
+    async with session.post(url, json={**payload, "stream": False}, timeout=timeout) as response:
+        response.raise_for_status()
+        data = await response.json(content_type=None)
+    return data.get("response", "").strip()
+
 
-        data = response.json()
-        result = data.get("response", "").strip()
+async def generate(prompt: str, temperature: float = 0.3,
+                   on_token: Optional[Callable[[str], None]] = None,
+                   cache: bool = True, format_json: bool = False,
+                   num_predict: int = NUM_PREDICT) -> Optional[str]:
+    """Envoie un prompt à Ollama et retourne la réponse.
+
+    Args:
+        prompt: Le prompt à envoyer
+        temperature: Température de génération (0.0 = déterministe, 1.0 = créatif)
+        on_token: Si fourni, génération en streaming ; appelé avec le texte
+            cumulé à chaque fragment reçu (affichage progressif)
+        cache: Consulter et alimenter le cache des réponses
+        format_json: Contraindre la sortie à un objet JSON (format Ollama)
+        num_predict: Nombre max de tokens générés
+
+    La priorité de la génération est celle du contexte (llm_queue.contexte_llm).
+
+    Retourne la réponse texte ou None en cas d'erreur ou d'annulation par la file.
+    """
+    payload = _payload(prompt, temperature, format_json, num_predict)
+    cle = cle_cache(payload) if cache else None
+    if cle:
+        result = await _lire_cache(cle)
+        if result:
+            logger.info("Réponse Ollama servie depuis le cache (%d caractères)", len(result))
+            if on_token:
+                on_token(result)
+            return result
+
+    job = None
+    try:
+        async with file_llm.creneau() as job:
+            result = await _generer(payload, on_token)
 
         if not result:
             logger.warning("Ollama a retourné une réponse vide")
             return None
 
         logger.info("Réponse Ollama reçue (%d caractères)", len(result))
+        if cle:
+            await _ecrire_cache(cle, result)
         return result
 
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         logger.error("Timeout Ollama après %ds", Config.OLLAMA_TIMEOUT)
         return None
-    except requests.exceptions.ConnectionError:
+    except aiohttp.ClientConnectionError:
         logger.error("Impossible de se connecter à Ollama (%s)", Config.OLLAMA_HOST)
         return None
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         logger.error("Erreur Ollama : %s", e)
         return None
+    except ValueError as e:
+        logger.error("Réponse Ollama invalide : %s", e)
+        return None
+    except asyncio.CancelledError:
+        if job is None or not job.annule:
+            raise
+        # Annulée par la file au profit d'un job prioritaire : pas une annulation de l'appelant
+        asyncio.current_task().uncancel()
+        logger.warning("Génération Ollama (%s) abandonnée", NOMS_PRIORITES[job.priorite])
+        return None
 
 
-def test_ollama() -> dict:
-    """Teste la connexion à Ollama.
+def _modele_correspond(nom: str) -> bool:
+    """Vrai si `nom` désigne le modèle configuré (avec ou sans tag : mistral vs mistral:7b)."""
+    return nom == Config.OLLAMA_MODEL or nom.split(":")[0] == Config.OLLAMA_MODEL.split(":")[0]
 
-    Retourne un dict avec : ok (bool), message, modele
+
+async def precharger_modele() -> bool:
+    """Charge le modèle en mémoire sans générer (requête sans prompt).
+
+    Le modèle reste chargé OLLAMA_KEEP_ALIVE : la première génération du
+    briefing ne paie pas le temps de chargement. Retourne True si chargé.
     """
+    debut = time.perf_counter()
     try:
-        # Vérifier que le serveur répond
-        url = f"{Config.OLLAMA_HOST}/api/tags"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
+        session = await get_http_session()
+        url = f"{Config.OLLAMA_HOST}/api/generate"
+        payload = {"model": Config.OLLAMA_MODEL, "keep_alive": Config.OLLAMA_KEEP_ALIVE}
+        timeout = aiohttp.ClientTimeout(total=Config.OLLAMA_TIMEOUT)
+        async with session.post(url, json=payload, timeout=timeout) as response:
+            response.raise_for_status()
+            await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Préchargement du modèle %s échoué : %s", Config.OLLAMA_MODEL, str(e) or "timeout")
+        return False
 
-        data = response.json()
-        modeles = [m["name"] for m in data.get("models", [])]
-
-        if Config.OLLAMA_MODEL not in modeles:
-            # Vérifier aussi avec le tag complet (ex: mistral:7b vs mistral:7b-instruct)
-            model_base = Config.OLLAMA_MODEL.split(":")[0]
-            modeles_base = [m.split(":")[0] for m in modeles]
-            if model_base not in modeles_base:
-                return {
-                    "ok": False,
-                    "message": f"Modèle {Config.OLLAMA_MODEL} non trouvé. Disponibles : {', '.join(modeles)}",
-                    "modele": Config.OLLAMA_MODEL,
-                }
-
-        # Test de génération rapide
-        test_result = generate("Dis 'OK' en un mot.")
-        if test_result:
-            return {
-                "ok": True,
-                "message": f"Ollama OK - Modèle {Config.OLLAMA_MODEL} fonctionnel",
-                "modele": Config.OLLAMA_MODEL,
-            }
-        else:
-            return {
-                "ok": False,
-                "message": "Ollama connecté mais génération échouée",
-                "modele": Config.OLLAMA_MODEL,
-            }
+    logger.info("Modèle %s préchargé en %.1fs (keep_alive %s)",
+                Config.OLLAMA_MODEL, time.perf_counter() - debut, Config.OLLAMA_KEEP_ALIVE)
+    return True
+
+
+async def test_ollama() -> dict:
+    """Sonde de disponibilité d'Ollama, sans génération.
+
+    Vérifie que le serveur répond, que le modèle est installé (/api/tags)
+    et s'il est déjà chargé en mémoire (/api/ps).
+
+    Retourne un dict avec : ok (bool), message, modele, charge (bool)
+    """
+    resultat = {"ok": False, "modele": Config.OLLAMA_MODEL, "charge": False}
+    try:
+        session = await get_http_session()
+        timeout = aiohttp.ClientTimeout(total=5)
+        async with session.get(f"{Config.OLLAMA_HOST}/api/tags", timeout=timeout) as response:
+            response.raise_for_status()
+            installes = [m["name"] for m in (await response.json(content_type=None)).get("models", [])]
+
+        if not any(_modele_correspond(m) for m in installes):
+            resultat["message"] = f"Modèle {Config.OLLAMA_MODEL} non trouvé. Disponibles : {', '.join(installes)}"
+            return resultat
 
-    except requests.exceptions.RequestException as e:
-        return {
-            "ok": False,
-            "message": f"Connexion Ollama échouée : {e}",
-            "modele": Config.OLLAMA_MODEL,
-        }
+        async with session.get(f"{Config.OLLAMA_HOST}/api/ps", timeout=timeout) as response:
+            response.raise_for_status()
+            charges = [m["name"] for m in (await response.json(content_type=None)).get("models", [])]
 
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        resultat["message"] = f"Connexion Ollama échouée : {str(e) or 'timeout'}"
+        return resultat
 
-def analyse_cac40(cac40_perf: float, top_gainers: list, top_losers: list) -> Optional[str]:
+    resultat["ok"] = True
+    resultat["charge"] = any(_modele_correspond(m) for m in charges)
+    etat = "chargé en mémoire" if resultat["charge"] else "installé, non chargé (premier appel plus lent)"
+    resultat["message"] = f"Ollama OK - Modèle {Config.OLLAMA_MODEL} {etat}"
+    return resultat
+
+
+async def analyse_cac40(cac40_perf: float, top_gainers: list, top_losers: list,
+                        on_token: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """Génère une analyse CAC40 via LLM.
 
     Args:
         cac40_perf: Performance globale en %
         top_gainers: Liste des 5 meilleures performances
         top_losers: Liste des 5 pires performances
+        on_token: Callback de streaming (voir generate)
 
     Retourne l'analyse texte ou None.
     """
-    gainers_str = "\n".join(
-        f"  - {g['ticker']} : {g['variation_pct']:+.2f}% ({g['prix_actuel']}€)"
-        for g in top_gainers
-    )
-    losers_str = "\n".join(
-        f"  - {l['ticker']} : {l['variation_pct']:+.2f}% ({l['prix_actuel']}€)"
-        for l in top_losers
-    )
+    return await generate(prompt_cac40(cac40_perf, top_gainers, top_losers), temperature=0.3, on_token=on_token)
+
+
+def prompt_cac40(cac40_perf: float, top_gainers: list, top_losers: list) -> str:
+    """Prompt de l'analyse CAC40 (tableaux compacts ticker|var %|cours)."""
+    def lignes(actions: list) -> str:
+        return "\n".join(f"{a['ticker']}|{pourcentage(a['variation_pct'])}|{nombre(a['prix_actuel'])}" for a in actions)
 
-    prompt = f"""Tu es un analyste financier concis qui s'adresse à un investisseur particulier.
+    return f"""Tu es un analyste financier concis qui s'adresse à un investisseur particulier.
 
-Données CAC40 hier :
-- Performance globale : {cac40_perf:+.2f}%
-- Top 5 hausses :
-{gainers_str}
-- Top 5 baisses :
-{losers_str}
+Données CAC40 hier (performance globale {pourcentage(cac40_perf)}%).
+Colonnes : ticker|variation %|cours €
+Top hausses :
+{lignes(top_gainers)}
+Top baisses :
+{lignes(top_losers)}
 
 Mission :
 1. Résume en 2-3 phrases le contexte macro
@@ -136,32 +275,180 @@ Mission :
 
 Format : bullet points, factuel, actionnable. Réponds en français."""
 
-    return generate(prompt, temperature=0.3)
 
+def lignes_portfolio(actions: list, historiques: dict) -> list[tuple[float, str]]:
+    """Lignes (signal, texte) du portfolio : ticker|nom|qté|PRU|cours|var j %|écart moy 5j %|var 5j %.
 
-def analyse_portfolio_alertes(portfolio_data: str, historical_prices: str) -> Optional[str]:
-    """Génère des alertes sur le portfolio via LLM.
-
-    Args:
-        portfolio_data: Tableau du portfolio actuel
-        historical_prices: Historique 5 jours des prix
-
-    Retourne les alertes texte ou None.
+    L'historique est résumé en deux chiffres plutôt qu'en série de clôtures ;
+    le signal est le plus fort mouvement de la ligne.
     """
-    prompt = f"""Analyse ce portfolio d'un investisseur particulier :
+    lignes = []
+    for a in actions:
+        cours = float(a["prix_actuel"])
+        clotures = [h["cloture"] for h in historiques.get(a["ticker"], [])]
+        if clotures:
+            moyenne = sum(clotures) / len(clotures)
+            ecart_moy = (cours - moyenne) / moyenne * 100 if moyenne else 0.0
+            var_5j = (cours - clotures[0]) / clotures[0] * 100 if clotures[0] else 0.0
+            colonnes_5j = f"{pourcentage(ecart_moy)}|{pourcentage(var_5j)}"
+        else:
+            ecart_moy = var_5j = 0.0
+            colonnes_5j = "?|?"
+        signal = max(abs(a["variation_jour"]), abs(ecart_moy), abs(var_5j))
+        lignes.append((signal, (
+            f"{a['ticker']}|{a['nom']}|{a['quantite']}|{nombre(a['prix_achat'])}|{nombre(cours)}"
+            f"|{pourcentage(a['variation_jour'])}|{colonnes_5j}"
+        )))
+    return lignes
 
-{portfolio_data}
 
-Historique 5 derniers jours :
-{historical_prices}
+def prompt_alertes(actions: list, historiques: dict) -> str:
+    """Prompt des alertes portfolio, borné par LLM_BUDGET_PROMPT quelle que soit la taille du portfolio."""
+    gabarit = """Analyse ce portfolio d'un investisseur particulier :
+
+{tableau}
 
 Détecte :
-- Mouvements anormaux (variation > ±2% par rapport à la moyenne 5 jours)
+- Mouvements anormaux (écart à la moyenne 5 jours au-delà de ±2%)
 - Signaux d'alerte importants
 
 Format : "⚠️ [Action] : [Raison courte]"
 Maximum 3 alertes, uniquement si critiques.
 Si rien d'anormal, écris "✅ Aucune alerte critique."
 Réponds en français."""
+    entete = "Colonnes : ticker|nom|quantité|prix achat €|cours €|var jour %|écart moy 5j %|var 5j %"
+    return gabarit.format(tableau=tableau(entete, lignes_portfolio(actions, historiques), gabarit))
+
 
-    return generate(prompt, temperature=0.2)
+async def analyse_portfolio_alertes(actions: list, historiques: dict,
+                                    on_token: Optional[Callable[[str], None]] = None) -> Optional[str]:
+    """Génère des alertes sur le portfolio via LLM.
+
+    Args:
+        actions: Actions du portfolio (voir portfolio.get_portfolio_pour_briefing)
+        historiques: Historique 5 jours par ticker
+        on_token: Callback de streaming (voir generate)
+
+    Retourne les alertes texte ou None.
+    """
+    return await generate(prompt_alertes(actions, historiques), temperature=0.2, on_token=on_token)
+
+
+# Clés de la réponse JSON de l'analyse combinée
+CLES_COMBINEES = ("analyse_cac40", "alertes")
+
+
+def prompt_combine(cac40_data: dict, actions: list, historiques: dict) -> str:
+    """Prompt unique (préambule commun) pour l'analyse CAC40 et les alertes portfolio."""
+    gainers = "\n".join(
+        f"{a['ticker']}|{pourcentage(a['variation_pct'])}|{nombre(a['prix_actuel'])}" for a in cac40_data["top_gainers"]
+    )
+    losers = "\n".join(
+        f"{a['ticker']}|{pourcentage(a['variation_pct'])}|{nombre(a['prix_actuel'])}" for a in cac40_data["top_losers"]
+    )
+    gabarit = f"""Tu es un analyste financier concis qui s'adresse à un investisseur particulier. Réponds en français.
+
+## Marché
+CAC40 hier : performance globale {pourcentage(cac40_data['performance_globale'])}%.
+Colonnes : ticker|variation %|cours €
+Top hausses :
+{gainers}
+Top baisses :
+{losers}
+
+## Portfolio
+{{tableau}}
+
+## Tâches
+"analyse_cac40" : 2-3 phrases de contexte macro, 2 opportunités d'achat parmi les baisses
+(explique pourquoi) et 1 action à éviter (piège à valeur). Bullet points, factuel, actionnable.
+"alertes" : mouvements anormaux du portfolio (écart à la moyenne 5 jours au-delà de ±2%)
+et signaux d'alerte importants, au format "⚠️ [Action] : [Raison courte]", 3 au maximum,
+uniquement si critiques. Si rien d'anormal : "✅ Aucune alerte critique."
+
+Réponds uniquement avec un objet JSON : {{{{"analyse_cac40": "...", "alertes": "..."}}}}"""
+    entete = "Colonnes : ticker|nom|quantité|prix achat €|cours €|var jour %|écart moy 5j %|var 5j %"
+    return gabarit.format(tableau=tableau(entete, lignes_portfolio(actions, historiques), gabarit))
+
+
+def _texte(valeur) -> Optional[str]:
+    """Valeur d'un champ JSON en texte (les listes de puces sont acceptées)."""
+    if isinstance(valeur, list):
+        valeur = "\n".join(str(v) for v in valeur)
+    if isinstance(valeur, str) and valeur.strip():
+        return valeur.strip()
+    return None
+
+
+def parser_reponse_combinee(reponse: str) -> Optional[dict]:
+    """Sépare la réponse JSON combinée ; None si elle est illisible ou incomplète."""
+    try:
+        data = json.loads(reponse)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    sections = {cle: _texte(data.get(cle)) for cle in CLES_COMBINEES}
+    if not all(sections.values()):
+        return None
+    return sections
+
+
+def champs_partiels(texte: str) -> dict:
+    """Valeurs (même incomplètes) des champs de la réponse combinée en cours de streaming."""
+    champs = {}
+    for cle in CLES_COMBINEES:
+        m = re.search(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)' % cle, texte, re.S)
+        if not m:
+            continue
+        brut = m.group(1).rstrip("\\")
+        try:
+            champs[cle] = json.loads(f'"{brut}"')
+        except ValueError:
+            champs[cle] = brut
+    return champs
+
+
+async def analyses_briefing(cac40_data: dict, actions: list, historiques: dict,
+                            on_token: Optional[Callable[[str, str], None]] = None) -> dict:
+    """Analyse CAC40 et alertes portfolio en une seule requête Ollama.
+
+    Le préambule et les consignes ne sont évalués qu'une fois. Si une seule
+    des deux analyses a des données, ou si la réponse JSON est illisible,
+    les analyses sont générées séparément (deux appels en parallèle).
+
+    Args:
+        on_token: Callback de streaming appelé avec (clé, texte partiel)
+
+    Retourne un dict avec : analyse_cac40, alertes (None si indisponible)
+    """
+    def relayer(cle: str):
+        return (lambda texte: on_token(cle, texte)) if on_token else None
+
+    a_marche = bool(cac40_data.get("top_gainers"))
+    if a_marche and actions and Config.LLM_ANALYSE_COMBINEE:
+        def relayer_combine(texte: str):
+            for cle, valeur in champs_partiels(texte).items():
+                on_token(cle, valeur)
+
+        reponse = await generate(
+            prompt_combine(cac40_data, actions, historiques), temperature=0.3,
+            on_token=relayer_combine if on_token else None,
+            format_json=True, num_predict=2 * NUM_PREDICT,
+        )
+        if reponse is None:
+            return {"analyse_cac40": None, "alertes": None}
+        sections = parser_reponse_combinee(reponse)
+        if sections:
+            return sections
+        logger.warning("Réponse combinée illisible, repli sur deux appels Ollama")
+
+    async def aucune():
+        return None
+
+    analyse, alertes = await asyncio.gather(
+        analyse_cac40(cac40_data["performance_globale"], cac40_data["top_gainers"], cac40_data["top_losers"],
+                      on_token=relayer("analyse_cac40")) if a_marche else aucune(),
+        analyse_portfolio_alertes(actions, historiques, on_token=relayer("alertes")) if actions else aucune(),
+    )
+    return {"analyse_cac40": analyse, "alertes": alertes}
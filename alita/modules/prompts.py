@@ -0,0 +1,73 @@
+"""Construction des prompts LLM avec budget de tokens.
+
+Sur CPU, l'évaluation du prompt domine la latence d'Ollama : les tableaux
+sont compactés et, au-delà du budget, les lignes au plus faible signal sont
+omises. `num_ctx` est dimensionné sur le prompt réel plutôt que sur le
+défaut du modèle.
+"""
+
+import math
+
+from alita.config import Config
+
+# Tokens max générés par réponse
+NUM_PREDICT = 500
+
+
+def estimer_tokens(texte: str) -> int:
+    """Estimation prudente du nombre de tokens (tokenizers type Mistral/Llama).
+
+    Les chiffres sont découpés un par un ; le reste compte ~3,5 caractères par token.
+    """
+    chiffres = sum(c.isdigit() for c in texte)
+    return chiffres + math.ceil((len(texte) - chiffres) / 3.5)
+
+
+def num_ctx(prompt: str, num_predict: int = NUM_PREDICT) -> int:
+    """Taille de contexte couvrant le prompt et la réponse, arrondie au multiple de 512."""
+    besoin = estimer_tokens(prompt) + num_predict + 64
+    return max(1024, math.ceil(besoin / 512) * 512)
+
+
+def nombre(valeur: float) -> str:
+    """Nombre compact : 2 décimales max, sans zéros inutiles (145.20 → 145.2)."""
+    return f"{round(float(valeur), 2):g}"
+
+
+def pourcentage(valeur: float) -> str:
+    """Pourcentage signé à 1 décimale (+1.2)."""
+    return f"{float(valeur):+.1f}"
+
+
+def selectionner_lignes(lignes: list[tuple[float, str]], budget: int) -> tuple[list[str], int]:
+    """Garde les lignes au plus fort signal dans la limite de `budget` tokens.
+
+    Args:
+        lignes: (signal, texte) ; le signal ordonne l'omission, pas l'affichage
+        budget: Tokens disponibles pour l'ensemble des lignes
+
+    Retourne (lignes gardées dans leur ordre d'origine, nombre de lignes omises).
+    """
+    par_signal = sorted(range(len(lignes)), key=lambda i: -lignes[i][0])
+    gardees, total = set(), 0
+    for i in par_signal:
+        cout = estimer_tokens(lignes[i][1]) + 1
+        if total + cout > budget:
+            break
+        gardees.add(i)
+        total += cout
+    return [lignes[i][1] for i in sorted(gardees)], len(lignes) - len(gardees)
+
+
+def tableau(entete: str, lignes: list[tuple[float, str]], gabarit: str) -> str:
+    """Tableau compact (colonnes séparées par |) tenant dans le budget du prompt.
+
+    `gabarit` est le prompt sans le tableau, avec un emplacement {tableau} :
+    le budget des lignes est LLM_BUDGET_PROMPT moins le coût du gabarit.
+    """
+    budget = Config.LLM_BUDGET_PROMPT - estimer_tokens(gabarit) - estimer_tokens(entete)
+    gardees, omises = selectionner_lignes(lignes, max(budget, 0))
+    texte = "\n".join([entete] + gardees)
+    if omises:
+        texte += f"\n({omises} lignes sans mouvement notable omises)"
+    return texte
@@ -1,104 +1,276 @@
-"""Client API OpenWeatherMap."""
+"""Client API OpenWeatherMap.
 
+Une seule requête /forecast (5 jours, tranches de 3 h) par ville et par
+tranche : la réponse est gardée jusqu'à la fin de la tranche courante et
+sert à la fois la météo « actuelle » et les prévisions horaires.
+
+Les noms de ville sont géocodés une fois (API Geocoding, résultat gardé en
+DB sous le préfixe "geo:") : les requêtes météo utilisent des coordonnées.
+"""
+
+import re
+import threading
+import time
 from typing import Optional
+
 import requests
 
 from alita.config import Config
+from alita.database.cache import ecrire_cache, lire_cache, supprimer_cache
 from alita.utils.logger import logger
 
 OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
 OPENWEATHER_FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+OPENWEATHER_GEO_URL = "https://api.openweathermap.org/geo/1.0/direct"
 
+# Durée de conservation d'un géocodage (s) ; invalidé par /config set
+DUREE_GEOCODAGE = 365 * 24 * 3600
+# Durée de conservation d'un échec de géocodage (s) : ville introuvable ou API en erreur
+DUREE_ECHEC_GEOCODAGE = 30 * 60
 
-def get_weather(ville: str = "Marseille") -> Optional[dict]:
-    """Récupère la météo actuelle pour une ville.
+# Coordonnées "lat,lon" (ex : 43.53,5.45) acceptées à la place d'un nom de ville
+RE_COORDONNEES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
 
-    Retourne : temperature, description, vent_vitesse, pluie, humidite, icone
+# Durée d'une tranche de prévision (s) ; les tranches démarrent à 0h, 3h, 6h... UTC
+TRANCHE = 3 * 3600
+
+_session: Optional[requests.Session] = None
+_cache: dict[str, tuple[float, dict]] = {}
+_verrous: dict[str, threading.Lock] = {}
+_verrou_cache = threading.Lock()
+# Géocodages résolus : clé "geo:..." -> (valable jusqu'à, position ou None si échec)
+_coordonnees: dict[str, tuple[float, Optional[dict]]] = {}
+
+
+def _get_session() -> requests.Session:
+    """Session HTTP réutilisée (keep-alive) pour OpenWeather."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def fin_tranche(timestamp: float) -> float:
+    """Début de la tranche de 3 h suivant `timestamp` (expiration du cache)."""
+    return (timestamp // TRANCHE + 1) * TRANCHE
+
+
+def _verrou(cle: str) -> threading.Lock:
+    """Verrou propre à une clé (ville ou géocodage)."""
+    with _verrou_cache:
+        return _verrous.setdefault(cle, threading.Lock())
+
+
+def vider_cache():
+    """Oublie les prévisions en cache (toutes villes)."""
+    with _verrou_cache:
+        _cache.clear()
+
+
+def _cle_geo(ville: str) -> str:
+    return f"geo:{ville.strip().lower()}"
+
+
+def _resoudre(ville: str) -> Optional[dict]:
+    """Interroge l'API Geocoding ; None si la ville est introuvable.
+
+    Lève requests.exceptions.RequestException si l'API est injoignable.
     """
-    try:
+    params = {"q": f"{ville},FR", "limit": 1, "appid": Config.OPENWEATHER_API_KEY}
+    response = _get_session().get(OPENWEATHER_GEO_URL, params=params, timeout=10)
+    response.raise_for_status()
+    resultats = response.json()
+    if not resultats:
+        return None
+    return {
+        "nom": resultats[0].get("local_names", {}).get("fr", resultats[0].get("name", ville)),
+        "lat": round(resultats[0]["lat"], 4),
+        "lon": round(resultats[0]["lon"], 4),
+    }
+
+
+def geocoder(ville: str) -> Optional[dict]:
+    """Coordonnées d'une ville française : {"nom", "lat", "lon"}, ou None si introuvable.
+
+    Résolues une fois via l'API Geocoding puis gardées en mémoire et en DB.
+    Un échec est gardé DUREE_ECHEC_GEOCODAGE secondes avant de réessayer.
+    """
+    cle = _cle_geo(ville)
+    with _verrou(cle):
+        memoire = _coordonnees.get(cle)
+        if memoire and time.time() < memoire[0]:
+            return memoire[1]
+
+        try:
+            position = lire_cache(cle)
+        except Exception as e:
+            logger.warning("Lecture du géocodage de %s impossible : %s", ville, e)
+            position = None
+
+        if position is None:
+            try:
+                position = _resoudre(ville)
+            except requests.exceptions.RequestException as e:
+                logger.error("Erreur API géocodage : %s", e)
+                _coordonnees[cle] = (time.time() + DUREE_ECHEC_GEOCODAGE, None)
+                return None
+
+            if position:
+                logger.info("Ville %s géocodée : %s (%s, %s)",
+                            ville, position["nom"], position["lat"], position["lon"])
+            else:
+                logger.warning("Ville introuvable au géocodage : %s", ville)
+            try:
+                ecrire_cache(cle, position or {"introuvable": True},
+                             DUREE_GEOCODAGE if position else DUREE_ECHEC_GEOCODAGE)
+            except Exception as e:
+                logger.warning("Enregistrement du géocodage de %s impossible : %s", ville, e)
+
+        if position is None or position.get("introuvable"):
+            _coordonnees[cle] = (time.time() + DUREE_ECHEC_GEOCODAGE, None)
+            return None
+        _coordonnees[cle] = (float("inf"), position)
+        return position
+
+
+def invalider_geocodage(villes: list[str]) -> dict:
+    """Oublie puis résout à nouveau le géocodage des villes (changement de configuration).
+
+    Retourne {ville: position ou None} ; les coordonnées "lat,lon" sont ignorées.
+    """
+    positions = {}
+    for ville in villes:
+        if RE_COORDONNEES.match(ville):
+            continue
+        cle = _cle_geo(ville)
+        with _verrou(cle):
+            _coordonnees.pop(cle, None)
+            try:
+                supprimer_cache(cle)
+            except Exception as e:
+                logger.warning("Suppression du géocodage de %s impossible : %s", ville, e)
+        with _verrou_cache:
+            _cache.pop(ville.lower(), None)
+        positions[ville] = geocoder(ville)
+    return positions
+
+
+def _params_lieu(lieu: str) -> dict:
+    """Paramètres de localisation OpenWeather : coordonnées données ou géocodées.
+
+    Si le géocodage échoue, la résolution du nom est laissée à OpenWeather.
+    """
+    coordonnees = RE_COORDONNEES.match(lieu)
+    if coordonnees:
+        return {"lat": coordonnees.group(1), "lon": coordonnees.group(2)}
+    position = geocoder(lieu)
+    if position:
+        return {"lat": position["lat"], "lon": position["lon"]}
+    return {"q": f"{lieu},FR"}
+
+
+def get_forecast(ville: str = "Marseille") -> Optional[dict]:
+    """Réponse brute /forecast de la ville (ou de coordonnées "lat,lon"), en cache
+    jusqu'à la fin de la tranche.
+
+    Les appels simultanés pour une même ville attendent la même requête.
+    Retourne None en cas d'erreur.
+    """
+    cle = ville.lower()
+    with _verrou(cle):
+        entree = _cache.get(cle)
+        if entree and time.time() < entree[0]:
+            return entree[1]
+
         params = {
-            "q": f"{ville},FR",
+            **_params_lieu(ville),
             "appid": Config.OPENWEATHER_API_KEY,
             "units": "metric",
             "lang": "fr",
         }
+        try:
+            response = _get_session().get(OPENWEATHER_FORECAST_URL, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error("Erreur API prévisions : %s", e)
+            return None
 
-        response = requests.get(OPENWEATHER_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Extraction des données
-        weather_main = data["weather"][0] if data.get("weather") else {}
-        main = data.get("main", {})
-        wind = data.get("wind", {})
-        rain = data.get("rain", {})
-
-        return {
-            "ville": ville,
-            "temperature": round(main.get("temp", 0), 1),
-            "ressenti": round(main.get("feels_like", 0), 1),
-            "description": weather_main.get("description", "N/A"),
-            "icone": weather_main.get("icon", ""),
-            "humidite": main.get("humidity", 0),
-            "vent_vitesse": round(wind.get("speed", 0) * 3.6, 1),  # m/s → km/h
-            "vent_rafales": round(wind.get("gust", 0) * 3.6, 1),
-            "pluie_1h": rain.get("1h", 0),
-            "nuages": data.get("clouds", {}).get("all", 0),
-        }
-    except requests.exceptions.RequestException as e:
-        logger.error("Erreur API météo : %s", e)
+        _cache[cle] = (fin_tranche(time.time()), data)
+        return data
+
+
+def _tranche(item: dict) -> dict:
+    """Prévision d'une tranche de 3 h."""
+    weather_main = item["weather"][0] if item.get("weather") else {}
+    main = item.get("main", {})
+    wind = item.get("wind", {})
+    rain = item.get("rain", {})
+
+    return {
+        "dt": item["dt"],
+        "dt_txt": item.get("dt_txt", ""),
+        "temperature": round(main.get("temp", 0), 1),
+        "ressenti": round(main.get("feels_like", main.get("temp", 0)), 1),
+        "humidite": main.get("humidity", 0),
+        "description": weather_main.get("description", "N/A"),
+        "icone": weather_main.get("icon", ""),
+        "vent_vitesse": round(wind.get("speed", 0) * 3.6, 1),  # m/s → km/h
+        "vent_rafales": round(wind.get("gust", 0) * 3.6, 1),
+        "pluie_3h": rain.get("3h", 0),
+        "pop": item.get("pop", 0),  # Probabilité de précipitation (0-1)
+        "visibilite": item.get("visibility", 10000),
+        "nuages": item.get("clouds", {}).get("all", 0),
+    }
+
+
+def _tranches_a_venir(data: dict) -> list[dict]:
+    """Tranches à partir de celle en cours (les tranches passées du cache sont écartées)."""
+    debut = time.time() // TRANCHE * TRANCHE
+    items = data.get("list", [])
+    a_venir = [item for item in items if item["dt"] >= debut]
+    # Réponse plus ancienne que toutes ses tranches : garder la dernière
+    return a_venir or items[-1:]
+
+
+def get_weather(ville: str = "Marseille") -> Optional[dict]:
+    """Météo actuelle d'une ville, tirée de la tranche de prévision en cours.
+
+    Retourne : temperature, description, vent_vitesse, pluie, humidite, icone
+    """
+    data = get_forecast(ville)
+    if data is None:
         return None
+    try:
+        tranche = _tranche(_tranches_a_venir(data)[0])
     except (KeyError, IndexError) as e:
         logger.error("Erreur parsing météo : %s", e)
         return None
 
+    return {
+        "ville": ville,
+        "temperature": tranche["temperature"],
+        "ressenti": tranche["ressenti"],
+        "description": tranche["description"],
+        "icone": tranche["icone"],
+        "humidite": tranche["humidite"],
+        "vent_vitesse": tranche["vent_vitesse"],
+        "vent_rafales": tranche["vent_rafales"],
+        "pluie_1h": round(tranche["pluie_3h"] / 3, 2),
+        "nuages": tranche["nuages"],
+    }
 
-def get_hourly_forecast(ville: str = "Marseille", hours: int = 12) -> Optional[list]:
-    """Récupère les prévisions horaires via l'API Forecast 5j/3h.
 
-    Utilise l'endpoint /forecast (gratuit) qui retourne des prévisions par tranche de 3h.
-    Filtre pour ne garder que les `hours` premières heures.
+def get_hourly_forecast(ville: str = "Marseille", hours: int = 12) -> Optional[list]:
+    """Prévisions horaires des `hours` prochaines heures (tranches de 3 h).
 
     Returns: Liste des prévisions avec temperature, vent, pluie, visibilite, description
     """
-    try:
-        params = {
-            "q": f"{ville},FR",
-            "appid": Config.OPENWEATHER_API_KEY,
-            "units": "metric",
-            "lang": "fr",
-            "cnt": max(1, hours // 3 + 1),  # Nombre de tranches de 3h
-        }
-
-        response = requests.get(OPENWEATHER_FORECAST_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        forecasts = []
-        for item in data.get("list", []):
-            weather_main = item["weather"][0] if item.get("weather") else {}
-            main = item.get("main", {})
-            wind = item.get("wind", {})
-            rain = item.get("rain", {})
-
-            forecasts.append({
-                "dt": item["dt"],
-                "dt_txt": item.get("dt_txt", ""),
-                "temperature": round(main.get("temp", 0), 1),
-                "description": weather_main.get("description", "N/A"),
-                "vent_vitesse": round(wind.get("speed", 0) * 3.6, 1),  # m/s → km/h
-                "vent_rafales": round(wind.get("gust", 0) * 3.6, 1),
-                "pluie_3h": rain.get("3h", 0),
-                "pop": item.get("pop", 0),  # Probabilité de précipitation (0-1)
-                "visibilite": item.get("visibility", 10000),
-                "nuages": item.get("clouds", {}).get("all", 0),
-            })
-
-        return forecasts
-
-    except requests.exceptions.RequestException as e:
-        logger.error("Erreur API prévisions horaires : %s", e)
+    data = get_forecast(ville)
+    if data is None:
         return None
+    try:
+        return [_tranche(item) for item in _tranches_a_venir(data)[:max(1, hours // 3 + 1)]]
     except (KeyError, IndexError) as e:
         logger.error("Erreur parsing prévisions : %s", e)
         return None
@@ -118,22 +118,34 @@ def get_ticker_history(ticker: str, period: str = "5d") -> Optional[list]:
         if hist.empty:
             return None
 
-        results = []
-        for date, row in hist.iterrows():
-            results.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "ouverture": round(float(row["Open"]), 2),
-                "cloture": round(float(row["Close"]), 2),
-                "haut": round(float(row["High"]), 2),
-                "bas": round(float(row["Low"]), 2),
-                "volume": int(row["Volume"]),
-            })
-        return results
+        # Conversion colonne par colonne (tolist) plutôt que ligne par ligne (iterrows)
+        prix = hist[["Open", "Close", "High", "Low"]].astype(float).round(2)
+        return [
+            {"date": date, "ouverture": o, "cloture": c, "haut": h, "bas": b, "volume": v}
+            for date, o, c, h, b, v in zip(
+                hist.index.strftime("%Y-%m-%d"),
+                prix["Open"].tolist(),
+                prix["Close"].tolist(),
+                prix["High"].tolist(),
+                prix["Low"].tolist(),
+                hist["Volume"].astype("int64").tolist(),
+            )
+        ]
     except Exception as e:
         logger.error("Erreur historique pour %s : %s", ticker, e)
         return None
 
 
+def get_tickers_history(tickers: list[str], period: str = "5d") -> dict:
+    """Historique de plusieurs tickers (ticker → liste), sans les tickers en erreur."""
+    historiques = {}
+    for ticker in tickers:
+        hist = get_ticker_history(ticker, period)
+        if hist:
+            historiques[ticker] = hist
+    return historiques
+
+
 def get_cac40_movers() -> dict:
     """Récupère les top hausses et baisses du CAC40.
 
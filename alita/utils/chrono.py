@@ -0,0 +1,68 @@
+"""Chronométrage de phases nommées (démarrage, étapes du briefing...)."""
+
+import time
+from contextlib import contextmanager
+
+
+class Chronometre:
+    """Mesure la durée de phases nommées, éventuellement concurrentes.
+
+    Chaque phase est repérée par son instant de début relatif à la création
+    du chronomètre, ce qui permet de visualiser les recouvrements.
+    """
+
+    def __init__(self):
+        self._origine = time.perf_counter()
+        self._debuts: dict[str, float] = {}
+        self._fins: dict[str, float] = {}
+
+    def demarrer(self, nom: str):
+        """Démarre (ou redémarre) une phase."""
+        self._debuts[nom] = time.perf_counter()
+        self._fins.pop(nom, None)
+
+    def arreter(self, nom: str) -> float | None:
+        """Termine une phase et retourne sa durée en secondes.
+
+        Sans effet si la phase n'a pas été démarrée ou est déjà terminée.
+        """
+        if nom not in self._debuts or nom in self._fins:
+            return None
+        self._fins[nom] = time.perf_counter()
+        return self._fins[nom] - self._debuts[nom]
+
+    @contextmanager
+    def mesurer(self, nom: str):
+        """Context manager chronométrant le bloc sous le nom donné."""
+        self.demarrer(nom)
+        try:
+            yield
+        finally:
+            self.arreter(nom)
+
+    def duree(self, nom: str) -> float | None:
+        """Durée en secondes d'une phase terminée (None sinon)."""
+        if nom not in self._fins:
+            return None
+        return self._fins[nom] - self._debuts[nom]
+
+    def durees(self) -> dict[str, float]:
+        """Durées (ms) des phases terminées, dans l'ordre de démarrage."""
+        return {
+            nom: round((self._fins[nom] - debut) * 1000, 1)
+            for nom, debut in sorted(self._debuts.items(), key=lambda x: x[1])
+            if nom in self._fins
+        }
+
+    def total(self) -> float:
+        """Temps écoulé (s) depuis la création du chronomètre."""
+        return time.perf_counter() - self._origine
+
+    def resume(self) -> str:
+        """Résumé lisible : durée et instant de début de chaque phase."""
+        parties = []
+        for nom, duree_ms in self.durees().items():
+            decalage_ms = (self._debuts[nom] - self._origine) * 1000
+            parties.append(f"{nom} {duree_ms:.0f} ms (+{decalage_ms:.0f})")
+        parties.append(f"total {self.total() * 1000:.0f} ms")
+        return " | ".join(parties)
@@ -37,3 +37,19 @@ def tronquer(texte: str, max_len: int = 1024) -> str:
     if len(texte) <= max_len:
         return texte
     return texte[: max_len - 3] + "..."
+
+
+def delai_backoff(tentative: int, base: float = 0.25, maximum: float = 5.0) -> float:
+    """Délai exponentiel (s) avant la tentative suivante, plafonné à `maximum`."""
+    return min(maximum, base * (2 ** tentative))
+
+
+def percentile(valeurs: list, p: float) -> float:
+    """Percentile `p` (0-100) par interpolation linéaire ; 0 si la liste est vide."""
+    if not valeurs:
+        return 0.0
+    tries = sorted(valeurs)
+    rang = (len(tries) - 1) * p / 100
+    bas = int(rang)
+    haut = min(bas + 1, len(tries) - 1)
+    return tries[bas] + (tries[haut] - tries[bas]) * (rang - bas)
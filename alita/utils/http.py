@@ -0,0 +1,34 @@
+"""Session HTTP asynchrone partagée (keep-alive) pour les appels sortants."""
+
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from alita.utils.logger import logger
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Crée ou retourne la session aiohttp partagée de l'event loop courant."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+        _session_loop = loop
+        logger.debug("Session HTTP partagée créée")
+    return _session
+
+
+async def close_http_session():
+    """Ferme la session partagée (à l'arrêt du bot)."""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
@@ -0,0 +1,61 @@
+"""Pool de processus optionnel pour les traitements lourds du briefing.
+
+Le parsing yfinance/pandas tient le GIL : exécuté dans un thread du bot, il
+retarde l'event loop (heartbeat de la gateway Discord). Avec WORKER_PROCESSES > 0,
+ces traitements tournent dans des processus séparés qui ne renvoient que des
+résultats sérialisables (dicts, listes). Avec 0, ils restent dans un thread.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from alita.config import Config
+from alita.utils.logger import logger
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if Config.WORKER_PROCESSES <= 0:
+        return None
+    if _pool is None:
+        # spawn : pas de fork d'un process qui a des threads (scheduler, to_thread)
+        _pool = ProcessPoolExecutor(
+            max_workers=Config.WORKER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info("Pool de %d processus worker démarré", Config.WORKER_PROCESSES)
+    return _pool
+
+
+async def executer_worker(fonction: Callable, *args) -> Any:
+    """Exécute `fonction(*args)` dans un processus worker (ou un thread si désactivé).
+
+    `fonction` doit être une fonction de module et ses arguments/résultat picklables.
+    Si le pool est cassé (worker tué), il est recréé et l'appel rejoué dans un thread.
+    """
+    global _pool
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.to_thread(fonction, *args)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, fonction, *args)
+    except BrokenProcessPool:
+        logger.error("Pool de workers cassé pendant %s, exécution dans un thread", fonction.__name__)
+        _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        return await asyncio.to_thread(fonction, *args)
+
+
+def fermer_workers():
+    """Arrête le pool de workers (à l'arrêt du bot)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
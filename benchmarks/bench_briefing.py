@@ -0,0 +1,348 @@
+"""Benchmark hors-ligne du briefing complet.
+
+Exécute `generer_briefing` de bout en bout contre des réponses enregistrées
+(Yahoo Finance, OpenWeather, NewsAPI, Ollama) avec une latence injectée
+configurable, sur une base SQLite temporaire.
+
+Usage :
+    python -m benchmarks.bench_briefing --iterations 5 --latence-ollama 2
+    python -m benchmarks.bench_briefing --output avant.json
+    python -m benchmarks.bench_briefing --comparer avant.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pandas as pd
+
+from alita.config import Config
+from alita.utils.logger import logger
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def charger_fixture(nom: str) -> dict:
+    with open(os.path.join(FIXTURES, nom), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ReponseFixture:
+    """Réponse HTTP minimale compatible avec l'usage de `requests` dans alita."""
+
+    def __init__(self, data: dict, status_code: int = 200):
+        self._data = data
+        self.status_code = status_code
+
+    def json(self) -> dict:
+        return self._data
+
+    def raise_for_status(self):
+        pass
+
+
+class Fixtures:
+    """Faux transports servant les réponses enregistrées avec latence injectée."""
+
+    def __init__(self, latences: dict):
+        self.latences = latences
+        self.yahoo = charger_fixture("yahoo_history.json")
+        self.openweather = charger_fixture("openweather.json")
+        self.newsapi = charger_fixture("newsapi.json")
+        self.ollama = charger_fixture("ollama.json")
+        self.appels = {"yahoo": 0, "meteo": 0, "news": 0, "ollama": 0}
+
+    def _attendre(self, service: str):
+        self.appels[service] += 1
+        if self.latences[service]:
+            time.sleep(self.latences[service])
+
+    # --- Yahoo Finance (remplace yf.Ticker) ---
+    def ticker(self, symbole: str):
+        fixtures = self
+
+        class TickerFixture:
+            def history(self, period: str = "5d"):
+                fixtures._attendre("yahoo")
+                donnees = fixtures.yahoo["tickers"].get(symbole)
+                if donnees is None:
+                    return pd.DataFrame()
+                nb = int(period.rstrip("d"))
+                index = pd.to_datetime(fixtures.yahoo["dates"])
+                return pd.DataFrame(donnees, index=index).tail(nb)
+
+        return TickerFixture()
+
+    # --- requests.get (news_api) et session de weather ---
+    def get(self, url: str, params: dict = None, timeout: int = None, **kwargs):
+        if "openweathermap" in url:
+            return self.get_meteo(url, params)
+        if "newsapi" in url:
+            return self.get_news(url, params)
+        raise RuntimeError(f"Appel réseau non simulé : {url}")
+
+    # --- OpenWeather ---
+    def get_meteo(self, url: str, params: dict = None):
+        if "/geo/" in url:
+            # Géocodage : une seule fois, gardé en DB d'une itération à l'autre
+            ville = self.openweather["forecast"]["city"]
+            return ReponseFixture([{"name": ville["name"], **ville["coord"]}])
+        self._attendre("meteo")
+        if "forecast" in url:
+            forecast = dict(self.openweather["forecast"])
+            cnt = (params or {}).get("cnt")
+            if cnt:
+                forecast["list"] = forecast["list"][:cnt]
+            return ReponseFixture(forecast)
+        return ReponseFixture(self.openweather["weather"])
+
+    # --- NewsAPI ---
+    def get_news(self, url: str, params: dict = None):
+        self._attendre("news")
+        cle = "top_headlines" if "top-headlines" in url else "everything"
+        data = dict(self.newsapi[cle])
+        data["articles"] = data["articles"][: (params or {}).get("pageSize", 20)]
+        return ReponseFixture(data)
+
+    # --- Ollama (remplace la session aiohttp partagée du client) ---
+    async def session_ollama(self):
+        return SessionOllamaFixture(self)
+
+
+class SessionOllamaFixture:
+    """Session aiohttp minimale : latence asynchrone, réponse enregistrée."""
+
+    def __init__(self, fixtures: Fixtures):
+        self.fixtures = fixtures
+
+    def post(self, url: str, json: dict = None, timeout=None, **kwargs):
+        payload = json or {}
+        if payload.get("format") == "json":
+            reponse = combiner_reponses(self.fixtures.ollama)
+        else:
+            cle = "alertes" if "portfolio" in payload.get("prompt", "") else "analyse_cac40"
+            reponse = self.fixtures.ollama[cle]
+        return ReponseOllamaFixture(self.fixtures, {"response": reponse, "done": True})
+
+
+def combiner_reponses(ollama: dict) -> str:
+    """Réponse JSON de l'analyse combinée construite depuis les deux réponses enregistrées."""
+    return json.dumps({"analyse_cac40": ollama["analyse_cac40"], "alertes": ollama["alertes"]}, ensure_ascii=False)
+
+
+class ReponseOllamaFixture:
+    """Réponse aiohttp (context manager asynchrone) servie après la latence Ollama."""
+
+    def __init__(self, fixtures: Fixtures, data: dict):
+        self.fixtures = fixtures
+        self.data = data
+        self.status = 200
+
+    async def __aenter__(self):
+        self.fixtures.appels["ollama"] += 1
+        await asyncio.sleep(self.fixtures.latences["ollama"])
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self, content_type=None) -> dict:
+        return self.data
+
+    @property
+    async def content(self):
+        yield json.dumps(self.data).encode("utf-8")
+
+
+def preparer_db(chemin: str, nb_actions: int):
+    """Crée une base SQLite avec la configuration par défaut et un portfolio."""
+    from alita.database import db
+    from alita.database.models import ConfigDB, Portfolio
+    from alita.modules.yahoo_finance import CAC40_TICKERS, get_ticker_name
+
+    db._engine = None
+    db._SessionLocal = None
+    db.init_schema()
+
+    with db.get_session() as session:
+        for cle, valeur in [("meteo_ville", "Marseille"), ("briefing_heure", "07:30"),
+                            ("moto_seuil_vent", "20"), ("moto_seuil_pluie", "50")]:
+            session.add(ConfigDB(cle=cle, valeur=valeur))
+        for ticker in CAC40_TICKERS[:nb_actions]:
+            session.add(Portfolio(
+                ticker=ticker, nom=get_ticker_name(ticker), prix_achat=Decimal("100.00"),
+                quantite=10, date_achat=datetime(2024, 1, 2), actif=True,
+            ))
+
+
+async def executer_iteration(tracer: bool) -> dict:
+    """Exécute un briefing complet et retourne ses mesures."""
+    from alita.briefing import generator
+    from alita.database.cache import purger_cache
+    from alita.modules import weather
+
+    # Briefing à froid : ni étapes mémorisées ni réponses LLM, météo ou actualités en cache
+    generator._memo_etapes.vider()
+    purger_cache("llm:")
+    purger_cache("news:")
+    purger_cache("quota:")
+    weather.vider_cache()
+    gc.collect()
+    gc_avant = sum(s["collections"] for s in gc.get_stats())
+    blocs_avant = sys.getallocatedblocks()
+    if tracer:
+        tracemalloc.start()
+
+    debut = time.perf_counter()
+    result = await generator.generer_briefing(delai=3600)
+    duree = time.perf_counter() - debut
+
+    mesures = {
+        "duree_ms": round(duree * 1000, 1),
+        "etapes_ms": result["chrono"].durees(),
+        "embeds": len(result["embeds"]),
+        "erreurs": result["erreurs"],
+        "blocs_alloues_nets": sys.getallocatedblocks() - blocs_avant,
+        "collections_gc": sum(s["collections"] for s in gc.get_stats()) - gc_avant,
+    }
+    if tracer:
+        courant, pic = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        mesures["memoire_pic_ko"] = round(pic / 1024, 1)
+        mesures["memoire_finale_ko"] = round(courant / 1024, 1)
+        mesures["allocations_vivantes"] = sum(st.count for st in snapshot.statistics("filename"))
+    return mesures
+
+
+def resumer(iterations: list[dict]) -> dict:
+    """Médiane / min / max du temps total, médiane par étape, pic mémoire max."""
+    durees = [it["duree_ms"] for it in iterations]
+    etapes = {}
+    for it in iterations:
+        for nom, ms in it["etapes_ms"].items():
+            etapes.setdefault(nom, []).append(ms)
+
+    resume = {
+        "duree_mediane_ms": round(statistics.median(durees), 1),
+        "duree_min_ms": min(durees),
+        "duree_max_ms": max(durees),
+        "etapes_mediane_ms": {nom: round(statistics.median(v), 1) for nom, v in etapes.items()},
+    }
+    pics = [it["memoire_pic_ko"] for it in iterations if "memoire_pic_ko" in it]
+    if pics:
+        resume["memoire_pic_max_ko"] = max(pics)
+    return resume
+
+
+def afficher(resultats: dict, reference: dict | None = None):
+    """Affiche le résumé, avec l'écart relatif à une exécution de référence."""
+    resume = resultats["resume"]
+    ref = reference["resume"] if reference else {}
+
+    def ecart(valeur, ancienne):
+        if not ancienne:
+            return ""
+        return f"  ({(valeur - ancienne) / ancienne * 100:+.1f}%)"
+
+    print(f"Briefing complet : médiane {resume['duree_mediane_ms']} ms "
+          f"(min {resume['duree_min_ms']}, max {resume['duree_max_ms']})"
+          f"{ecart(resume['duree_mediane_ms'], ref.get('duree_mediane_ms'))}")
+    if "memoire_pic_max_ko" in resume:
+        print(f"Pic mémoire : {resume['memoire_pic_max_ko']} Ko"
+              f"{ecart(resume['memoire_pic_max_ko'], ref.get('memoire_pic_max_ko'))}")
+    print("Étapes (médiane) :")
+    etapes_ref = ref.get("etapes_mediane_ms", {})
+    for nom, ms in sorted(resume["etapes_mediane_ms"].items(), key=lambda x: -x[1]):
+        print(f"  {nom:<16}{ms:>10.1f} ms{ecart(ms, etapes_ref.get(nom))}")
+    print(f"Appels simulés par itération : {resultats['appels_par_iteration']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne du briefing Alita")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--actions", type=int, default=3, help="Nombre d'actions en portfolio")
+    parser.add_argument("--latence-yahoo", type=float, default=0.02, help="Latence (s) par appel Yahoo")
+    parser.add_argument("--latence-meteo", type=float, default=0.1, help="Latence (s) par appel OpenWeather")
+    parser.add_argument("--latence-news", type=float, default=0.15, help="Latence (s) par appel NewsAPI")
+    parser.add_argument("--latence-ollama", type=float, default=1.0, help="Latence (s) par génération Ollama")
+    parser.add_argument("--facteur-rate-limit", type=float, default=0.0,
+                        help="Facteur appliqué aux pauses de rate limiting Yahoo (1 = réel)")
+    parser.add_argument("--verbeux", action="store_true", help="Conserve les logs INFO d'alita")
+    parser.add_argument("--sans-tracemalloc", action="store_true", help="Désactive la mesure mémoire")
+    parser.add_argument("--output", default="bench_briefing.json", help="Fichier de résultats JSON")
+    parser.add_argument("--comparer", help="Résultats JSON d'une exécution précédente")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.verbeux:
+        logger.setLevel("WARNING")
+    fixtures = Fixtures({
+        "yahoo": args.latence_yahoo,
+        "meteo": args.latence_meteo,
+        "news": args.latence_news,
+        "ollama": args.latence_ollama,
+    })
+    sleep_reel = time.sleep
+    rate_limit = SimpleNamespace(sleep=lambda s: sleep_reel(s * args.facteur_rate_limit))
+
+    with tempfile.TemporaryDirectory() as dossier, \
+            patch.object(Config, "get_db_url", classmethod(lambda cls: f"sqlite:///{dossier}/bench.db")), \
+            patch.object(Config, "OPENWEATHER_API_KEY", "bench"), \
+            patch.object(Config, "NEWSAPI_KEY", "bench"), \
+            patch("alita.modules.yahoo_finance.yf.Ticker", fixtures.ticker), \
+            patch("alita.modules.yahoo_finance.time", rate_limit), \
+            patch("requests.get", fixtures.get), \
+            patch("alita.modules.weather._get_session", lambda: fixtures), \
+            patch("alita.modules.ollama_client.get_http_session", fixtures.session_ollama):
+        preparer_db(os.path.join(dossier, "bench.db"), args.actions)
+
+        iterations = []
+        for i in range(args.iterations):
+            mesures = asyncio.run(executer_iteration(tracer=not args.sans_tracemalloc))
+            iterations.append(mesures)
+            print(f"Itération {i + 1}/{args.iterations} : {mesures['duree_ms']} ms", file=sys.stderr)
+
+        from alita.database import db
+        db.get_engine().dispose()
+
+    resultats = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parametres": vars(args),
+        "appels_par_iteration": {k: v // args.iterations for k, v in fixtures.appels.items()},
+        "iterations": iterations,
+        "resume": resumer(iterations),
+    }
+
+    reference = None
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            reference = json.load(f)
+    afficher(resultats, reference)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
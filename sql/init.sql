@@ -64,6 +64,53 @@ CREATE TABLE IF NOT EXISTS briefings_log (
     INDEX idx_date (date_envoi)
 ) ENGINE=InnoDB;
 
+-- Embeds rendus des briefings (JSON compressé zlib) pour renvoi instantané
+CREATE TABLE IF NOT EXISTS briefings_payload (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    briefing_id INT NOT NULL UNIQUE,
+    donnees MEDIUMBLOB NOT NULL,
+    taille_brute INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (briefing_id) REFERENCES briefings_log(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- Durée de chaque étape des briefings
+CREATE TABLE IF NOT EXISTS briefing_stage_timings (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    briefing_id INT NOT NULL,
+    etape VARCHAR(50) NOT NULL,
+    duree_ms INT NOT NULL,
+    statut ENUM('OK', 'ERREUR', 'RETARD') NOT NULL,
+    FOREIGN KEY (briefing_id) REFERENCES briefings_log(id) ON DELETE CASCADE,
+    INDEX idx_briefing (briefing_id)
+) ENGINE=InnoDB;
+
+-- Cibles de livraison du briefing (sections NULL = toutes)
+CREATE TABLE IF NOT EXISTS delivery_targets (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    nom VARCHAR(50) NOT NULL UNIQUE,
+    webhook_url VARCHAR(255) NOT NULL,
+    sections JSON,
+    actif BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_actif (actif)
+) ENGINE=InnoDB;
+
+-- Statut de livraison de chaque briefing par cible
+CREATE TABLE IF NOT EXISTS briefings_delivery (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    briefing_id INT NOT NULL,
+    target_id INT,
+    cible VARCHAR(50) NOT NULL,
+    statut ENUM('SUCCESS', 'ERREUR') NOT NULL,
+    nb_embeds INT NOT NULL DEFAULT 0,
+    duree_ms INT,
+    message_erreur TEXT,
+    FOREIGN KEY (briefing_id) REFERENCES briefings_log(id) ON DELETE CASCADE,
+    FOREIGN KEY (target_id) REFERENCES delivery_targets(id) ON DELETE SET NULL,
+    INDEX idx_briefing (briefing_id)
+) ENGINE=InnoDB;
+
 -- Données de test portfolio
 INSERT INTO portfolio (ticker, nom, prix_achat, quantite, date_achat) VALUES
 ('AIR.PA', 'Airbus', 145.20, 10, NOW()),
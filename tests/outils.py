@@ -0,0 +1,92 @@
+"""Outils partagés par les tests."""
+
+import asyncio
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+
+from alita.config import Config
+from alita.database import db
+
+
+def base_temporaire(test: unittest.TestCase):
+    """Base SQLite temporaire (schéma créé) pour la durée du test."""
+    dossier = tempfile.TemporaryDirectory()
+    url = f"sqlite:///{dossier.name}/test.db"
+    patcher = patch.object(Config, "get_db_url", classmethod(lambda cls: url))
+    patcher.start()
+    db._engine, db._SessionLocal = None, None
+    db.init_schema()
+
+    def nettoyer():
+        db.get_engine().dispose()
+        db._engine, db._SessionLocal = None, None
+        patcher.stop()
+        dossier.cleanup()
+    test.addCleanup(nettoyer)
+
+
+class ReponseHttp:
+    """Réponse aiohttp simulée (context manager asynchrone)."""
+
+    def __init__(self, session: "SessionHttp", data, status: int = 200, lignes=()):
+        self.session = session
+        self.data = data
+        self.status = status
+        self.lignes = lignes
+
+    async def __aenter__(self):
+        self.session.en_cours += 1
+        self.session.pic = max(self.session.pic, self.session.en_cours)
+        await asyncio.sleep(self.session.latence)
+        self.session.en_cours -= 1
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(MagicMock(), (), status=self.status)
+
+    async def json(self, content_type=None):
+        return self.data
+
+    async def read(self):
+        return json.dumps(self.data).encode()
+
+    @property
+    async def content(self):
+        for ligne in self.lignes:
+            yield ligne
+
+
+class SessionHttp:
+    """Session aiohttp simulée : enregistre les requêtes et compte les requêtes simultanées.
+
+    POST répond au format Ollama avec `repondre(payload)` (ou les `lignes` en
+    streaming) ; GET sert `reponses_get` selon le dernier segment de l'URL.
+    """
+
+    def __init__(self, latence: float = 0.0, lignes=(), reponses_get: dict = None,
+                 repondre=None, status: int = 200):
+        self.latence = latence
+        self.repondre = repondre or (lambda payload: "OK")
+        self.lignes = lignes
+        self.reponses_get = reponses_get or {}
+        self.status = status
+        self.payloads = []
+        self.requetes = []
+        self.en_cours = 0
+        self.pic = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.payloads.append(json)
+        return ReponseHttp(self, {"response": self.repondre(json), "done": True}, self.status, self.lignes)
+
+    def get(self, url, params=None, timeout=None):
+        self.requetes.append((url, params))
+        return ReponseHttp(self, self.reponses_get[url.rsplit("/", 1)[-1]], self.status)
@@ -0,0 +1,839 @@
+"""Tests pour la génération et le stockage du briefing."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+import discord
+
+from alita.briefing import telemetry
+from alita.briefing.delivery import envoyer_webhook, livrer_cibles
+from alita.briefing.payload import serialiser_sections, deserialiser_sections
+from alita.briefing.pipeline import Etape, MemoEtapes, executer_pipeline, ordre_topologique
+from alita.bot.progression import LIMITE_MESSAGE, MessageProgressif
+from alita.config import Config
+from alita.database import db
+from alita.database.cache import ecrire_cache, lire_cache
+from alita.database.models import BriefingLog
+from alita.modules import ollama_client, prompts
+from alita.modules.llm_queue import (
+    PRIORITE_ADHOC, PRIORITE_BRIEFING, FileLLM, contexte_llm,
+)
+from alita.utils import workers
+from alita.utils.chrono import Chronometre
+from alita.utils.helpers import percentile
+from tests.outils import SessionHttp, base_temporaire
+
+
+class TestPayload(unittest.TestCase):
+    """Tests de la sérialisation des sections."""
+
+    def test_aller_retour(self):
+        """Les sections relues sont identiques aux sections stockées."""
+        embed = discord.Embed(title="📊 Briefing Matinal Alita", description="*01/01/2024*", color=0x2ECC71)
+        embed.add_field(name="📈 CAC40", value="Performance globale : +1.20%", inline=False)
+        embed.set_footer(text="Alita Bot v1.0 | ASMO-01 Homelab")
+
+        donnees, taille_brute = serialiser_sections([("marche", embed), ("meteo", discord.Embed(title="🌦️ Météo"))])
+        sections = deserialiser_sections(donnees)
+
+        self.assertEqual([nom for nom, _ in sections], ["marche", "meteo"])
+        self.assertEqual(sections[0][1].to_dict(), embed.to_dict())
+        self.assertEqual(sections[1][1].title, "🌦️ Météo")
+        self.assertGreater(taille_brute, 0)
+
+
+class TestPipeline(unittest.TestCase):
+    """Tests de l'exécution des étapes du briefing."""
+
+    def test_etapes_independantes_concurrentes(self):
+        """Deux étapes indépendantes s'exécutent en même temps."""
+        rendez_vous = threading.Barrier(2, timeout=5)
+
+        def lente(entrees):
+            rendez_vous.wait()  # BrokenBarrierError si les étapes étaient séquentielles
+            return 1
+
+        execution = asyncio.run(executer_pipeline([Etape("a", lente), Etape("b", lente)]))
+
+        self.assertEqual(execution["resultats"], {"a": 1, "b": 1})
+
+    def test_dependances_transmises(self):
+        """Une étape reçoit le résultat de ses dépendances."""
+        async def somme(entrees):
+            return entrees["a"] + entrees["b"]
+
+        etapes = [
+            Etape("total", somme, ("a", "b")),
+            Etape("a", lambda e: 2),
+            Etape("b", lambda e: 3),
+        ]
+        execution = asyncio.run(executer_pipeline(etapes))
+
+        self.assertEqual(execution["resultats"]["total"], 5)
+        self.assertEqual(set(execution["chrono"].durees()), {"a", "b", "total"})
+
+    def test_echec_valeur_defaut(self):
+        """Une étape en échec prend sa valeur par défaut et remonte son libellé."""
+        def echec(entrees):
+            raise RuntimeError("timeout")
+
+        etapes = [
+            Etape("cac40", echec, defaut=dict, libelle="CAC40"),
+            Etape("analyse", lambda e: len(e["cac40"]), ("cac40",)),
+        ]
+        execution = asyncio.run(executer_pipeline(etapes))
+
+        self.assertEqual(execution["resultats"]["cac40"], {})
+        self.assertEqual(execution["resultats"]["analyse"], 0)
+        self.assertEqual(execution["erreurs"], ["CAC40 : timeout"])
+
+    def test_budget_depasse(self):
+        """Une étape hors budget et ses dépendantes sont livrées en complément."""
+        def lente(entrees):
+            time.sleep(0.3)
+            return "analyse"
+
+        etapes = [
+            Etape("rapide", lambda e: 1),
+            Etape("llm", lente, budget=0.05),
+            Etape("rendu", lambda e: e["llm"].upper(), ("llm",)),
+        ]
+
+        async def scenario():
+            execution = await executer_pipeline(etapes)
+            complet = await execution["suite"]
+            return execution, complet
+
+        debut = time.perf_counter()
+        execution, complet = asyncio.run(scenario())
+
+        self.assertEqual(execution["en_retard"], {"llm", "rendu"})
+        self.assertEqual(execution["resultats"], {"rapide": 1})
+        self.assertEqual(complet["resultats"]["rendu"], "ANALYSE")
+        self.assertLess(time.perf_counter() - debut, 2)
+
+    def test_echeance_globale(self):
+        """Les étapes non terminées à l'échéance sont en retard ; le pipeline ne les attend pas."""
+        liberee = threading.Event()
+
+        def lente(entrees):
+            liberee.wait(5)
+            return 1
+
+        async def scenario():
+            execution = await executer_pipeline([Etape("a", lente), Etape("b", lambda e: 2)], delai=0.05)
+            encore_bloquee = not liberee.is_set()
+            liberee.set()
+            complet = await execution["suite"]
+            return execution, encore_bloquee, complet
+
+        execution, encore_bloquee, complet = asyncio.run(scenario())
+
+        self.assertTrue(encore_bloquee)
+        self.assertEqual(execution["en_retard"], {"a"})
+        self.assertEqual(complet["resultats"]["a"], 1)
+
+    def test_memo_reutilise_etapes_fraiches(self):
+        """Seules les étapes périmées ou aux entrées modifiées sont recalculées."""
+        appels = {"marche": 0, "analyse": 0, "prix": 0}
+        prix = iter([10, 10, 11])
+
+        def marche(entrees):
+            appels["marche"] += 1
+            return {"cac40": 1.2}
+
+        def analyse(entrees):
+            appels["analyse"] += 1
+            return f"analyse {entrees['marche']['cac40']}"
+
+        def cours(entrees):
+            appels["prix"] += 1
+            return next(prix)
+
+        etapes = [
+            Etape("marche", marche, fraicheur=600),
+            Etape("analyse", analyse, ("marche",), fraicheur=600),
+            Etape("prix", cours, fraicheur=0),
+            Etape("valo", lambda e: e["prix"] * 2, ("prix",), fraicheur=600),
+        ]
+        memo = MemoEtapes()
+
+        async def scenario():
+            await executer_pipeline(etapes, memo=memo)
+            return await executer_pipeline(etapes, memo=memo, reutiliser=True)
+
+        execution = asyncio.run(scenario())
+
+        self.assertEqual(appels, {"marche": 1, "analyse": 1, "prix": 2})
+        self.assertEqual(execution["reutilisees"], {"marche", "analyse", "valo"})
+        self.assertEqual(execution["resultats"]["analyse"], "analyse 1.2")
+
+    def test_memo_oublier(self):
+        """Une étape oubliée est recalculée, et ses dépendantes avec elle si elle a changé."""
+        positions = iter([["AIR.PA"], ["AIR.PA", "BNP.PA"]])
+        appels = {"historique": 0}
+
+        def historique(entrees):
+            appels["historique"] += 1
+            return {t: [] for t in entrees["portfolio"]}
+
+        etapes = [
+            Etape("portfolio", lambda e: next(positions), fraicheur=600),
+            Etape("historique", historique, ("portfolio",), fraicheur=600),
+        ]
+        memo = MemoEtapes()
+
+        async def scenario():
+            await executer_pipeline(etapes, memo=memo)
+            memo.oublier("portfolio")
+            return await executer_pipeline(etapes, memo=memo, reutiliser=True)
+
+        execution = asyncio.run(scenario())
+
+        self.assertEqual(execution["reutilisees"], set())
+        self.assertEqual(appels["historique"], 2)
+        self.assertEqual(execution["resultats"]["historique"], {"AIR.PA": [], "BNP.PA": []})
+
+    def test_dependance_circulaire(self):
+        with self.assertRaises(ValueError):
+            ordre_topologique([Etape("a", None, ("b",)), Etape("b", None, ("a",))])
+
+
+def _erreur_http(status: int, headers: dict = None) -> discord.HTTPException:
+    response = MagicMock()
+    response.status = status
+    response.reason = "Erreur"
+    response.headers = headers or {}
+    return discord.HTTPException(response, "erreur")
+
+
+class TestLivraison(unittest.TestCase):
+    """Tests de l'envoi webhook avec retries."""
+
+    @patch("alita.briefing.delivery.asyncio.sleep", new_callable=AsyncMock)
+    @patch("alita.briefing.delivery.discord.Webhook.from_url")
+    @patch("alita.briefing.delivery.get_http_session", new_callable=AsyncMock)
+    def test_erreur_reseau_retentee(self, mock_session, mock_from_url, mock_sleep):
+        """Une erreur réseau est retentée avec backoff."""
+        webhook = MagicMock()
+        webhook.send = AsyncMock(side_effect=[aiohttp.ClientConnectionError("reset"), None])
+        mock_from_url.return_value = webhook
+
+        ok = asyncio.run(envoyer_webhook("https://discord.test/api/webhooks/1/abc", [], "Alita"))
+
+        self.assertTrue(ok)
+        self.assertEqual(webhook.send.await_count, 2)
+        mock_sleep.assert_awaited_once_with(1.0)
+
+    @patch("alita.briefing.delivery.asyncio.sleep", new_callable=AsyncMock)
+    @patch("alita.briefing.delivery.discord.Webhook.from_url")
+    @patch("alita.briefing.delivery.get_http_session", new_callable=AsyncMock)
+    def test_erreur_http_non_retentee(self, mock_session, mock_from_url, mock_sleep):
+        """Une erreur HTTP n'est pas retentée : discord.py a déjà retenté 429 et 5xx."""
+        for status in (400, 429, 503):
+            webhook = MagicMock()
+            webhook.send = AsyncMock(side_effect=_erreur_http(status, {"Retry-After": "2.5"}))
+            mock_from_url.return_value = webhook
+
+            ok = asyncio.run(envoyer_webhook("https://discord.test/api/webhooks/1/abc", [], "Alita"))
+
+            self.assertFalse(ok)
+            self.assertEqual(webhook.send.await_count, 1)
+        mock_sleep.assert_not_awaited()
+
+    @patch("alita.briefing.delivery.envoyer_webhook", new_callable=AsyncMock)
+    def test_livraison_cibles_filtrees(self, mock_envoyer):
+        """Chaque cible reçoit ses sections ; un échec n'empêche pas les autres livraisons."""
+        mock_envoyer.side_effect = lambda url, embeds, username: url != "https://echec"
+        marche, meteo = discord.Embed(title="📊"), discord.Embed(title="🌦️")
+        cibles = [
+            {"id": 1, "nom": "principal", "webhook_url": "https://ok", "sections": None},
+            {"id": 2, "nom": "moto", "webhook_url": "https://echec", "sections": ["meteo"]},
+            {"id": 3, "nom": "bourse", "webhook_url": "https://ok", "sections": ["portfolio"]},
+        ]
+
+        statuts = asyncio.run(livrer_cibles([("marche", marche), ("meteo", meteo)], cibles))
+
+        par_cible = {s["cible"]: s for s in statuts}
+        self.assertEqual(set(par_cible), {"principal", "moto"})  # bourse : aucune section
+        self.assertTrue(par_cible["principal"]["ok"])
+        self.assertEqual(par_cible["principal"]["nb_embeds"], 2)
+        self.assertFalse(par_cible["moto"]["ok"])
+        self.assertEqual(par_cible["moto"]["nb_embeds"], 1)
+
+
+class TestWorkers(unittest.TestCase):
+    """Tests du pool de processus worker."""
+
+    def tearDown(self):
+        workers.fermer_workers()
+
+    def test_sans_worker_thread(self):
+        """Avec WORKER_PROCESSES=0, la fonction tourne dans le process du bot."""
+        with patch.object(Config, "WORKER_PROCESSES", 0):
+            pid = asyncio.run(workers.executer_worker(os.getpid))
+        self.assertEqual(pid, os.getpid())
+
+    def test_worker_processus_separe(self):
+        """Avec WORKER_PROCESSES>0, la fonction tourne dans un autre process."""
+        with patch.object(Config, "WORKER_PROCESSES", 1):
+            pid = asyncio.run(workers.executer_worker(os.getpid))
+        self.assertNotEqual(pid, os.getpid())
+
+
+class TestOllamaAsync(unittest.TestCase):
+    """Tests du client Ollama asynchrone."""
+
+    def _generer_en_parallele(self, nb_parallele: int) -> tuple[float, int]:
+        session = SessionHttp(latence=0.2)
+
+        async def scenario():
+            return await asyncio.gather(*(ollama_client.generate(f"prompt {i}") for i in range(2)))
+
+        with patch.object(Config, "OLLAMA_NUM_PARALLEL", nb_parallele), \
+                patch.object(Config, "LLM_CACHE_TTL", 0), \
+                patch("alita.modules.ollama_client.get_http_session", AsyncMock(return_value=session)):
+            debut = time.perf_counter()
+            resultats = asyncio.run(scenario())
+            duree = time.perf_counter() - debut
+
+        self.assertEqual(resultats, ["OK", "OK"])
+        return duree, session.pic
+
+    def test_prompts_concurrents(self):
+        """Deux prompts indépendants sont générés en même temps."""
+        duree, pic = self._generer_en_parallele(2)
+        self.assertEqual(pic, 2)
+
+    def test_sonde_sans_generation(self):
+        """test_ollama interroge /api/tags et /api/ps sans générer de texte."""
+        session = SessionHttp(reponses_get={
+            "tags": {"models": [{"name": "mistral:7b"}, {"name": "llama3:8b"}]},
+            "ps": {"models": [{"name": "mistral:7b"}]},
+        })
+        with patch.object(Config, "OLLAMA_MODEL", "mistral:7b"), \
+                patch("alita.modules.ollama_client.get_http_session", AsyncMock(return_value=session)):
+            result = asyncio.run(ollama_client.test_ollama())
+
+        self.assertTrue(result["ok"])
+        self.assertTrue(result["charge"])
+        self.assertEqual(session.payloads, [])
+
+    def test_prechargement(self):
+        """Le préchargement envoie une requête sans prompt avec keep_alive."""
+        session = SessionHttp()
+        with patch.object(Config, "OLLAMA_KEEP_ALIVE", "45m"), \
+                patch("alita.modules.ollama_client.get_http_session", AsyncMock(return_value=session)):
+            ok = asyncio.run(ollama_client.precharger_modele())
+
+        self.assertTrue(ok)
+        self.assertNotIn("prompt", session.payloads[0])
+        self.assertEqual(session.payloads[0]["keep_alive"], "45m")
+
+    def test_parallelisme_limite(self):
+        """OLLAMA_NUM_PARALLEL=1 sérialise les générations."""
+        duree, pic = self._generer_en_parallele(1)
+        self.assertEqual(pic, 1)
+        self.assertGreaterEqual(duree, 0.4)
+
+
+class TestFileLLM(unittest.TestCase):
+    """Tests de la file priorisée des générations."""
+
+    def test_ordre_des_priorites(self):
+        """Un créneau libéré va au job le plus prioritaire, puis au plus ancien."""
+        file, ordre = FileLLM(), []
+
+        async def job(nom, priorite):
+            with contexte_llm(priorite):
+                async with file.creneau():
+                    ordre.append(nom)
+                    await asyncio.sleep(0.01)
+
+        async def scenario():
+            await asyncio.gather(
+                job("adhoc1", PRIORITE_ADHOC), job("adhoc2", PRIORITE_ADHOC),
+                job("briefing", PRIORITE_BRIEFING), job("adhoc3", PRIORITE_ADHOC),
+            )
+
+        with patch.object(Config, "OLLAMA_NUM_PARALLEL", 1):
+            asyncio.run(scenario())
+
+        self.assertEqual(ordre, ["adhoc1", "briefing", "adhoc2", "adhoc3"])
+        stats = file.snapshot()
+        self.assertEqual(stats["pic_attente"], 3)
+        self.assertEqual(stats["priorites"]["adhoc"]["traites"], 3)
+        self.assertEqual(sum(stats["en_attente"].values()), 0)
+
+    def test_annulation_si_echeance_menacee(self):
+        """Un briefing proche de son échéance fait annuler la génération à la demande en cours."""
+        file, session = FileLLM(), SessionHttp(latence=0.5)
+
+        async def briefing():
+            await asyncio.sleep(0.05)
+            with contexte_llm(PRIORITE_BRIEFING, time.monotonic() + 0.1):
+                return await ollama_client.generate("briefing")
+
+        async def scenario():
+            return await asyncio.gather(ollama_client.generate("adhoc"), briefing())
+
+        with patch.object(Config, "OLLAMA_NUM_PARALLEL", 1), \
+                patch.object(Config, "LLM_CACHE_TTL", 0), \
+                patch("alita.modules.ollama_client.file_llm", file), \
+                patch("alita.modules.ollama_client.get_http_session", AsyncMock(return_value=session)):
+            resultats = asyncio.run(scenario())
+
+        self.assertEqual(resultats, [None, "OK"])
+        self.assertEqual(file.snapshot()["annules"], 1)
+
+
+    def test_echeance_reverifiee(self):
+        """Une génération qui ignore son annulation n'empêche pas d'en annuler une autre ensuite."""
+        file, servi = FileLLM(), {}
+
+        async def adhoc(ignorer_annulation):
+            async with file.creneau():
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    if not ignorer_annulation:
+                        raise
+                    await asyncio.sleep(5)
+
+        async def briefing():
+            await asyncio.sleep(0.02)
+            with contexte_llm(PRIORITE_BRIEFING, time.monotonic() + 0.5):
+                debut = time.monotonic()
+                async with file.creneau():
+                    servi["attente"] = time.monotonic() - debut
+
+        async def scenario():
+            taches = [asyncio.create_task(c) for c in (adhoc(False), adhoc(True), briefing())]
+            await taches[2]
+            for tache in taches[:2]:
+                tache.cancel()
+            await asyncio.gather(*taches, return_exceptions=True)
+
+        with patch.object(Config, "OLLAMA_NUM_PARALLEL", 2), patch.object(Config, "OLLAMA_TIMEOUT", 10), \
+                patch("alita.modules.llm_queue.INTERVALLE_ECHEANCE", 0.05):
+            asyncio.run(scenario())
+
+        # Première vérification : la plus récente ignore l'annulation ; la suivante annule l'autre
+        self.assertEqual(file.snapshot()["annules"], 2)
+        self.assertLess(servi["attente"], 2.5)  # Sans nouvelle vérification : 5 s
+
+    def test_briefing_a_la_demande_adhoc(self):
+        """Les analyses de /briefing now restent en priorité adhoc ; le briefing planifié passe devant."""
+        from alita.briefing import generator
+        from alita.modules.llm_queue import priorite_courante
+        priorites = []
+
+        async def analyses(*args, **kwargs):
+            priorites.append(priorite_courante())
+            return {}
+
+        async def scenario():
+            entrees = {"cac40": {}, "portfolio": {}, "historique": {}}
+            await generator._etape_analyses(entrees)
+            with contexte_llm(PRIORITE_BRIEFING):
+                await generator._etape_analyses(entrees)
+
+        with patch("alita.modules.ollama_client.analyses_briefing", analyses):
+            asyncio.run(scenario())
+
+        self.assertEqual(priorites, [PRIORITE_ADHOC, PRIORITE_BRIEFING])
+
+
+class TestPrompts(unittest.TestCase):
+    """Tests du budget de tokens des prompts."""
+
+    @staticmethod
+    def _portfolio(nb: int) -> tuple[list, dict]:
+        actions = [
+            {"ticker": f"T{i}.PA", "nom": f"Action {i}", "quantite": 10, "prix_achat": 100.0,
+             "prix_actuel": 100.0, "variation_jour": 0.1}
+            for i in range(nb)
+        ]
+        actions[nb // 2]["variation_jour"] = -6.5  # seule ligne à fort signal
+        historiques = {a["ticker"]: [{"cloture": 100.0}] * 5 for a in actions}
+        return actions, historiques
+
+    def test_prompt_borne(self):
+        """Le prompt reste dans le budget quelle que soit la taille du portfolio."""
+        petit = ollama_client.prompt_alertes(*self._portfolio(3))
+        grand = ollama_client.prompt_alertes(*self._portfolio(500))
+
+        self.assertIn("T1.PA", petit)
+        self.assertNotIn("omises", petit)
+        self.assertLessEqual(prompts.estimer_tokens(grand), Config.LLM_BUDGET_PROMPT)
+        self.assertIn("T250.PA|Action 250|10|100|100|-6.5", grand)
+        self.assertIn("lignes sans mouvement notable omises", grand)
+
+    def test_selection_par_signal(self):
+        """Les lignes au plus faible signal sont omises en premier, l'ordre est conservé."""
+        lignes = [(0.1, "a" * 35), (5.0, "b" * 35), (0.2, "c" * 35), (3.0, "d" * 35)]
+        gardees, omises = prompts.selectionner_lignes(lignes, budget=25)
+
+        self.assertEqual(gardees, ["b" * 35, "d" * 35])
+        self.assertEqual(omises, 2)
+
+    def test_num_ctx(self):
+        """num_ctx couvre le prompt et la réponse."""
+        prompt = ollama_client.prompt_alertes(*self._portfolio(500))
+        contexte = ollama_client._payload(prompt, 0.2, False)["options"]["num_ctx"]
+
+        self.assertGreaterEqual(contexte, prompts.estimer_tokens(prompt) + prompts.NUM_PREDICT)
+        self.assertEqual(contexte % 512, 0)
+
+
+class TestAnalyseCombinee(unittest.TestCase):
+    """Tests de l'analyse CAC40 + alertes en une requête."""
+
+    CAC40 = {
+        "performance_globale": 0.4,
+        "top_gainers": [{"ticker": "AIR.PA", "variation_pct": 2.1, "prix_actuel": 150.0}],
+        "top_losers": [{"ticker": "BNP.PA", "variation_pct": -1.5, "prix_actuel": 60.0}],
+    }
+    ACTIONS = [{"ticker": "AIR.PA", "nom": "Airbus", "quantite": 10, "prix_achat": 140.0,
+                "prix_actuel": 150.0, "variation_jour": 2.1}]
+
+    def _analyser(self, repondre) -> tuple[dict, SessionHttp]:
+        session = SessionHttp(repondre=repondre)
+        with patch.object(Config, "LLM_CACHE_TTL", 0), \
+                patch.object(Config, "LLM_ANALYSE_COMBINEE", True), \
+                patch("alita.modules.ollama_client.get_http_session", AsyncMock(return_value=session)):
+            result = asyncio.run(ollama_client.analyses_briefing(self.CAC40, self.ACTIONS, {}))
+        return result, session
+
+    def test_une_seule_requete(self):
+        """La réponse JSON est séparée en analyse CAC40 et alertes."""
+        result, session = self._analyser(
+            lambda p: json.dumps({"analyse_cac40": "- Marché calme", "alertes": ["⚠️ AIR.PA : hausse", "⚠️ X"]})
+        )
+
+        self.assertEqual(result, {"analyse_cac40": "- Marché calme", "alertes": "⚠️ AIR.PA : hausse\n⚠️ X"})
+        self.assertEqual(len(session.payloads), 1)
+        self.assertEqual(session.payloads[0]["format"], "json")
+
+    def test_repli_deux_appels(self):
+        """Une réponse JSON illisible déclenche les deux requêtes séparées."""
+        def repondre(payload):
+            if payload.get("format") == "json":
+                return '{"analyse_cac40": "tronqué'
+            return "alertes" if "portfolio" in payload["prompt"] else "analyse"
+
+        result, session = self._analyser(repondre)
+
+        self.assertEqual(result, {"analyse_cac40": "analyse", "alertes": "alertes"})
+        self.assertEqual(len(session.payloads), 3)
+
+    def test_echec_non_memorise(self):
+        """Une analyse combinée sans résultat est recalculée au briefing suivant."""
+        from alita.briefing import generator
+        appels = []
+
+        async def analyses(*args, **kwargs):
+            appels.append(args)
+            return {"analyse_cac40": None, "alertes": None}
+
+        with patch.object(Config, "LLM_ANALYSE_COMBINEE", True):
+            etapes = [
+                Etape("cac40", lambda e: self.CAC40, fraicheur=600),
+                Etape("portfolio", lambda e: {"actions": self.ACTIONS}, fraicheur=600),
+                Etape("historique", lambda e: {}, ("portfolio",), fraicheur=600),
+                *generator._etapes_llm(None, budget_llm=5),
+            ]
+        memo = MemoEtapes()
+
+        async def scenario():
+            await executer_pipeline(etapes, memo=memo)
+            return await executer_pipeline(etapes, memo=memo, reutiliser=True)
+
+        with patch("alita.modules.ollama_client.analyses_briefing", analyses):
+            execution = asyncio.run(scenario())
+
+        self.assertEqual(len(appels), 2)
+        self.assertNotIn("analyses", execution["reutilisees"])
+        self.assertIsNone(execution["resultats"]["analyse_cac40"])
+        self.assertIsNone(execution["resultats"]["alertes"])
+
+    def test_champs_partiels(self):
+        """Le streaming de la réponse JSON expose le texte partiel de chaque champ."""
+        champs = ollama_client.champs_partiels('{"analyse_cac40": "Hausse\\n- AI", "alertes": "⚠️ B')
+        self.assertEqual(champs, {"analyse_cac40": "Hausse\n- AI", "alertes": "⚠️ B"})
+
+
+class TestCacheLLM(unittest.TestCase):
+    """Tests du cache persistant des réponses LLM (base SQLite temporaire)."""
+
+    def setUp(self):
+        base_temporaire(self)
+
+    def test_expiration(self):
+        """Une entrée expirée n'est plus servie."""
+        ecrire_cache("llm:a", {"response": "A"}, ttl=60)
+        ecrire_cache("llm:b", {"response": "B"}, ttl=-1)
+
+        self.assertEqual(lire_cache("llm:a"), {"response": "A"})
+        self.assertIsNone(lire_cache("llm:b"))
+
+    def test_eviction_taille_max(self):
+        """Au-delà de la taille max, les entrées qui expirent le plus tôt sont évincées."""
+        for i in range(5):
+            ecrire_cache(f"llm:{i}", {"response": str(i)}, ttl=60 + i, max_entrees=3)
+        ecrire_cache("geo:x", {"lat": 0}, ttl=10, max_entrees=3)
+
+        self.assertIsNone(lire_cache("llm:0"))
+        self.assertIsNone(lire_cache("llm:1"))
+        self.assertEqual(lire_cache("llm:4"), {"response": "4"})
+        self.assertEqual(lire_cache("geo:x"), {"lat": 0})  # autre préfixe non compté
+
+    def test_generate_entrees_identiques(self):
+        """Un prompt déjà généré est servi sans appeler Ollama ; un autre modèle regénère."""
+        session = SessionHttp()
+
+        async def scenario():
+            premiere = await ollama_client.generate("Données CAC40 identiques")
+            seconde = await ollama_client.generate("Données CAC40 identiques")
+            with patch.object(Config, "OLLAMA_MODEL", "llama3:8b"):
+                autre_modele = await ollama_client.generate("Données CAC40 identiques")
+            return premiere, seconde, autre_modele
+
+        with patch("alita.modules.ollama_client.get_http_session", AsyncMock(return_value=session)):
+            resultats = asyncio.run(scenario())
+
+        self.assertEqual(resultats, ("OK", "OK", "OK"))
+        self.assertEqual(len(session.payloads), 2)
+
+
+class TestStreaming(unittest.TestCase):
+    """Tests de la génération Ollama en streaming et de l'affichage progressif."""
+
+    @patch.object(Config, "LLM_CACHE_TTL", 0)
+    @patch("alita.modules.ollama_client.get_http_session", new_callable=AsyncMock)
+    def test_generate_streaming(self, mock_session):
+        """Chaque fragment reçu est relayé avec le texte cumulé."""
+        lignes = [
+            json.dumps({"response": "Marché ", "done": False}).encode() + b"\n",
+            b"\n",
+            json.dumps({"response": "haussier.", "done": False}).encode() + b"\n",
+            json.dumps({"response": "", "done": True}).encode() + b"\n",
+        ]
+        session = SessionHttp(lignes=lignes)
+        mock_session.return_value = session
+        partiels = []
+
+        result = asyncio.run(ollama_client.generate("prompt", on_token=partiels.append))
+
+        self.assertEqual(result, "Marché haussier.")
+        self.assertEqual(partiels, ["Marché ", "Marché haussier."])
+        self.assertTrue(session.payloads[0]["stream"])
+
+    def test_contenu_progressif_tronque(self):
+        """Le message garde l'en-tête et la fin de chaque texte sous la limite Discord."""
+        progression = MessageProgressif(MagicMock(), "⏳ En cours", libelles={"alertes": "Alertes"})
+        progression.maj("alertes", "début " + "x" * 3000 + " fin")
+        progression.maj("analyse_cac40", "court")
+
+        contenu = progression.contenu()
+
+        self.assertLessEqual(len(contenu), LIMITE_MESSAGE)
+        self.assertTrue(contenu.startswith("⏳ En cours"))
+        self.assertIn("**Alertes**", contenu)
+        self.assertIn("x fin", contenu)
+        self.assertIn("court", contenu)
+
+    def test_editions_limitees(self):
+        """Les mises à jour rapprochées ne déclenchent qu'une édition par intervalle."""
+        message = MagicMock()
+        message.edit = AsyncMock()
+
+        async def scenario():
+            progression = MessageProgressif(message, "⏳", intervalle=0.05)
+            progression.demarrer()
+            for i in range(50):
+                progression.maj("analyse_cac40", "mot " * i)
+                await asyncio.sleep(0.002)
+            await progression.terminer("✅")
+
+        asyncio.run(scenario())
+
+        self.assertLess(message.edit.await_count, 10)
+        self.assertEqual(message.edit.await_args.kwargs["content"], "✅")
+
+
+class TestTelemetrie(unittest.TestCase):
+    """Tests des durées d'étapes persistées et de leurs percentiles (base SQLite temporaire)."""
+
+    def setUp(self):
+        base_temporaire(self)
+
+    @staticmethod
+    def _briefing(age_jours: float, durees: dict, **statuts) -> int:
+        with db.get_session() as session:
+            log = BriefingLog(date_envoi=datetime.utcnow() - timedelta(days=age_jours), statut="SUCCESS")
+            session.add(log)
+            session.flush()
+            briefing_id = log.id
+        chrono = MagicMock(spec=Chronometre)
+        chrono.durees.return_value = durees
+        telemetry.enregistrer_timings(briefing_id, chrono, **statuts)
+        return briefing_id
+
+    def test_stats_par_etape(self):
+        """Percentiles et comptes RETARD/ERREUR par étape, sur la fenêtre de `jours`."""
+        self._briefing(1, {"marche": 100.0, "news": 400.0}, en_retard={"news"}, total_ms=500)
+        self._briefing(2, {"marche": 300.0, "news": 200.0}, echecs={"marche"}, total_ms=350)
+        self._briefing(40, {"marche": 9000.0, "meteo": 50.0}, echecs={"marche"})
+
+        stats = {s["etape"]: s for s in telemetry.stats_etapes(jours=30)}
+
+        self.assertEqual(set(stats), {"marche", "news", telemetry.ETAPE_TOTAL})
+        self.assertEqual(
+            {k: stats["marche"][k] for k in ("n", "p50_ms", "p95_ms", "max_ms", "retards", "erreurs")},
+            {"n": 2, "p50_ms": 200, "p95_ms": 290, "max_ms": 300, "retards": 0, "erreurs": 1},
+        )
+        self.assertEqual((stats["news"]["retards"], stats["news"]["erreurs"]), (1, 0))
+        self.assertEqual((stats[telemetry.ETAPE_TOTAL]["retards"], stats[telemetry.ETAPE_TOTAL]["max_ms"]), (1, 500))
+        self.assertEqual(telemetry.stats_etapes(jours=30)[0]["etape"], telemetry.ETAPE_TOTAL)  # p95 décroissant
+
+
+class TestRenvoiBriefing(unittest.TestCase):
+    """Tests du rechargement et du renvoi d'un briefing stocké (base SQLite temporaire)."""
+
+    def setUp(self):
+        base_temporaire(self)
+        patcher = patch.object(Config, "TIMEZONE", "Europe/Paris")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _stocker(date_envoi: datetime, titre: str) -> int:
+        from alita.briefing import generator
+        briefing_id = generator.log_briefing("SUCCESS", sections=[("marche", discord.Embed(title=titre))])
+        with db.get_session() as session:
+            session.get(BriefingLog, briefing_id).date_envoi = date_envoi
+        return briefing_id
+
+    def test_charger_par_jour_heure_de_paris(self):
+        """Le jour demandé est celui de Paris ; un jour sans briefing ne renvoie rien."""
+        from alita.briefing import generator
+        veille = self._stocker(datetime(2024, 3, 9, 22, 30), "23h30 à Paris le 09/03")
+        minuit = self._stocker(datetime(2024, 3, 9, 23, 30), "00h30 à Paris le 10/03")
+
+        briefing_id, sections = generator.charger_briefing(date(2024, 3, 9))
+        self.assertEqual(briefing_id, veille)
+        self.assertEqual(sections[0][1].title, "23h30 à Paris le 09/03")
+        self.assertEqual(generator.charger_briefing(date(2024, 3, 10))[0], minuit)
+        self.assertEqual(generator.charger_briefing()[0], minuit)
+        self.assertIsNone(generator.charger_briefing(date(2024, 3, 11)))
+
+    def test_renvoi_sans_regeneration(self):
+        """Le renvoi livre les sections stockées sans appeler Yahoo ni Ollama."""
+        from alita.briefing import generator
+        briefing_id = self._stocker(datetime(2024, 3, 9, 6, 0), "Briefing stocké")
+        livrer = AsyncMock(return_value=[{"target_id": None, "cible": "defaut", "ok": True,
+                                          "nb_embeds": 1, "duree_ms": 5.0, "erreur": None}])
+
+        with patch.object(generator, "yahoo_finance") as yahoo, \
+                patch.object(generator, "ollama_client") as ollama, \
+                patch.object(generator, "livrer_briefing", livrer):
+            resultat = asyncio.run(generator.renvoyer_briefing(date(2024, 3, 9)))
+
+        self.assertTrue(resultat["ok"])
+        self.assertIn(f"#{briefing_id}", resultat["message"])
+        sections = livrer.call_args.args[0]
+        self.assertEqual([(nom, embed.title) for nom, embed in sections], [("marche", "Briefing stocké")])
+        self.assertEqual(yahoo.mock_calls, [])
+        self.assertEqual(ollama.mock_calls, [])
+
+    def test_renvoi_jour_sans_briefing(self):
+        """Sans briefing stocké ce jour-là, rien n'est livré."""
+        from alita.briefing import generator
+        livrer = AsyncMock(return_value=[])
+
+        with patch.object(generator, "livrer_briefing", livrer):
+            resultat = asyncio.run(generator.renvoyer_briefing(date(2024, 3, 11)))
+
+        self.assertFalse(resultat["ok"])
+        self.assertIn("11/03/2024", resultat["message"])
+        livrer.assert_not_called()
+
+
+class TestComplement(unittest.TestCase):
+    """Tests du briefing envoyé à l'échéance puis complété (base SQLite temporaire)."""
+
+    ARTICLES = {
+        "monde": [{"title": "Sommet européen sur l'énergie", "source": "AFP", "url": "https://a.example/1"}],
+        "tech": [{"title": "Nouveau modèle open source", "source": "Wired", "url": "https://b.example/2"}],
+    }
+
+    def setUp(self):
+        base_temporaire(self)
+
+    def test_sections_en_retard_en_complement(self):
+        """Une étape hors délai donne un placeholder, puis le complément contient exactement sa section."""
+        from alita.briefing import generator
+        from alita.briefing.templates import FOOTER_COMPLEMENT, PLACEHOLDER_RETARD
+        liberee = threading.Event()
+
+        def articles(entrees, planifie=False):
+            liberee.wait(5)
+            return self.ARTICLES
+
+        async def scenario():
+            result = await generator.generer_briefing(delai=0.5)
+            liberee.set()
+            return result, await result["complement"]
+
+        analyses = AsyncMock(return_value={"analyse_cac40": "- Marché calme", "alertes": "✅ Aucune alerte."})
+        with patch.object(Config, "LLM_ANALYSE_COMBINEE", True), \
+                patch.object(generator, "_memo_etapes", MemoEtapes()), \
+                patch.object(generator, "_etape_cac40", lambda e: generator._cac40_vide()), \
+                patch.object(generator, "_etape_portfolio", lambda e: generator._portfolio_vide()), \
+                patch.object(generator, "_etape_historique", lambda e: {}), \
+                patch.object(generator, "_etape_meteo", lambda e: None), \
+                patch.object(generator, "_etape_previsions", lambda e: None), \
+                patch.object(generator, "_etape_moto", lambda e: {"score": 8, "verdict": "Roule", "details": []}), \
+                patch.object(generator, "_etape_articles", articles), \
+                patch("alita.modules.ollama_client.analyses_briefing", analyses):
+            result, complement = asyncio.run(scenario())
+
+        self.assertEqual(result["en_retard"], {"articles", "news"})
+        principal = dict(result["sections"])
+        self.assertEqual(principal["news"].description, PLACEHOLDER_RETARD)
+        self.assertEqual(principal["alertes"].description, "✅ Aucune alerte.")
+
+        self.assertEqual([nom for nom, _ in complement["sections"]], ["news"])
+        news = complement["sections"][0][1]
+        self.assertIn("Sommet européen", news.fields[0].value)
+        self.assertEqual(news.footer.text, FOOTER_COMPLEMENT)
+
+
+class TestPercentile(unittest.TestCase):
+    """Tests du calcul de percentile partagé par les statistiques."""
+
+    def test_liste_vide(self):
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_valeur_unique(self):
+        self.assertEqual(percentile([42], 50), 42)
+        self.assertEqual(percentile([42], 95), 42)
+
+    def test_interpolation(self):
+        valeurs = [40, 10, 30, 20]  # Non triées
+        self.assertEqual(percentile(valeurs, 0), 10)
+        self.assertEqual(percentile(valeurs, 50), 25)
+        self.assertAlmostEqual(percentile(valeurs, 95), 38.5)
+        self.assertEqual(percentile(valeurs, 100), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""Tests du démarrage et de la base : attente de la DB, arrêt sans DB, pool et chronométrage."""
+
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from alita.bot.discord_bot import AlitaBot, ArbreCommandes
+from alita.database import db
+from alita.database.pool import PoolInstrumente, StatsPool, instrumenter_engine
+from alita.utils.chrono import Chronometre
+
+
+class TestAttendreDB(unittest.TestCase):
+    """Tests du backoff d'attente de la base de données."""
+
+    def _attendre(self, resultats, **kwargs):
+        sommeil = AsyncMock()
+        with patch("alita.database.db.test_connection", side_effect=resultats) as connexion, \
+                patch("alita.database.db.asyncio.sleep", sommeil):
+            ok = asyncio.run(db.attendre_db(**kwargs))
+        return ok, connexion.call_count, [c.args[0] for c in sommeil.await_args_list]
+
+    def test_disponible_apres_echecs(self):
+        """La DB répond à la 4e tentative, après des délais croissants."""
+        ok, tentatives, delais = self._attendre([False, False, False, True], delai_base=0.25, delai_max=5.0)
+
+        self.assertTrue(ok)
+        self.assertEqual(tentatives, 4)
+        self.assertEqual(delais, [0.25, 0.5, 1.0])
+
+    def test_indisponible(self):
+        """Sans DB, l'attente s'arrête après max_tentatives avec des délais plafonnés."""
+        ok, tentatives, delais = self._attendre([False] * 6, max_tentatives=6, delai_base=1.0, delai_max=4.0)
+
+        self.assertFalse(ok)
+        self.assertEqual(tentatives, 6)
+        self.assertEqual(delais, [1.0, 2.0, 4.0, 4.0, 4.0, 4.0])
+
+
+class TestDemarrageBot(unittest.TestCase):
+    """Tests du chemin DB indisponible et des commandes reçues pendant la préparation de la DB."""
+
+    def setUp(self):
+        patcher_user = patch.object(AlitaBot, "user", new_callable=PropertyMock)
+        patcher_user.start()
+        self.addCleanup(patcher_user.stop)
+
+    def test_db_indisponible_arret(self):
+        """DB injoignable : le bot se ferme sans scheduler et run_bot retourne False."""
+        async def scenario():
+            bot = AlitaBot()
+            with patch("alita.bot.discord_bot.attendre_db", AsyncMock(return_value=False)), \
+                    patch.object(AlitaBot, "close", AsyncMock()) as fermer:
+                bot._db_prete = asyncio.create_task(bot._preparer_db())
+                await bot.on_ready()
+            return bot, fermer
+
+        bot, fermer = asyncio.run(scenario())
+
+        fermer.assert_awaited_once()
+        self.assertTrue(bot.db_indisponible)
+        self.assertIsNone(bot.scheduler)
+
+        with patch("alita.bot.discord_bot.Config.DISCORD_BOT_TOKEN", "jeton"), \
+                patch("alita.bot.discord_bot.AlitaBot.run",
+                      lambda self, *a, **kw: setattr(self, "db_indisponible", True)):
+            from alita.bot.discord_bot import run_bot
+            self.assertFalse(run_bot())
+
+        with patch("alita.bot.discord_bot.run_bot", return_value=False), \
+                patch("alita.main.Config.DISCORD_BOT_TOKEN", "jeton"):
+            from alita.main import main
+            with self.assertRaises(SystemExit) as sortie:
+                main()
+        self.assertEqual(sortie.exception.code, 1)
+
+    def _verifier(self, nom_commande, preparation):
+        """interaction_check d'une commande pendant `preparation` (coroutine de préparation DB)."""
+        async def scenario():
+            bot = AlitaBot()
+            bot._db_prete = asyncio.create_task(preparation())
+            interaction = MagicMock()
+            interaction.command.qualified_name = nom_commande
+            interaction.response.send_message = AsyncMock()
+            autorise = await ArbreCommandes.interaction_check(bot.tree, interaction)
+            bot._db_prete.cancel()
+            return autorise, interaction.response.send_message
+
+        with patch("alita.bot.discord_bot.ATTENTE_DB_COMMANDE", 0.05):
+            return asyncio.run(scenario())
+
+    def test_commande_attend_schema(self):
+        """Une commande DB reçue avant la fin de init_schema est retenue ; /health passe."""
+        async def lente():
+            await asyncio.sleep(1)
+            return True
+
+        async def rapide():
+            await asyncio.sleep(0.01)
+            return True
+
+        autorise, reponse = self._verifier("portfolio list", lente)
+        self.assertFalse(autorise)
+        self.assertIn("démarrage", reponse.await_args.args[0])
+
+        autorise, reponse = self._verifier("portfolio list", rapide)
+        self.assertTrue(autorise)
+        reponse.assert_not_awaited()
+
+        autorise, _ = self._verifier("health", lente)
+        self.assertTrue(autorise)
+
+
+class TestPoolInstrumente(unittest.TestCase):
+    """Tests des compteurs et temps d'attente du pool (/stats pool), sur SQLite."""
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.stats = StatsPool()
+        patcher = patch("alita.database.pool.pool_stats", self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.engine = create_engine(f"sqlite:///{dossier.name}/pool.db", poolclass=PoolInstrumente,
+                                    pool_size=2, max_overflow=1, pool_timeout=0.05)
+        instrumenter_engine(self.engine)
+        self.addCleanup(self.engine.dispose)
+
+    def test_checkouts_et_attentes(self):
+        """Chaque checkout est compté et chronométré ; pic d'usage et overflow sont retenus."""
+        connexions = [self.engine.connect() for _ in range(3)]
+        connexions[0].execute(text("SELECT 1"))
+        en_cours = self.stats.snapshot(self.engine.pool)["en_cours"]
+        for conn in connexions:
+            conn.close()
+        with self.engine.connect():
+            pass  # Connexion réutilisée depuis le pool
+
+        stats = self.stats.snapshot(self.engine.pool)
+        self.assertEqual(en_cours, 3)
+        self.assertEqual(stats["checkouts"], 4)
+        self.assertEqual(stats["en_cours"], 0)
+        self.assertEqual(stats["pic_en_cours"], 3)
+        self.assertEqual(stats["pic_overflow"], 1)
+        self.assertEqual(stats["connexions_creees"], 3)
+        self.assertEqual(len(self.stats._attentes), 4)
+        self.assertGreaterEqual(stats["attente_max_ms"], stats["attente_p95_ms"])
+        self.assertGreaterEqual(stats["attente_p95_ms"], stats["attente_p50_ms"])
+        self.assertEqual(stats["taille"], 2)
+
+    def test_timeout_compte(self):
+        """Pool épuisé : le checkout expire après pool_timeout et le timeout est compté."""
+        connexions = [self.engine.connect() for _ in range(3)]
+        with self.assertRaises(PoolTimeoutError):
+            self.engine.connect()
+        for conn in connexions:
+            conn.close()
+
+        stats = self.stats.snapshot(self.engine.pool)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["checkouts"], 3)
+        self.assertEqual(len(self.stats._attentes), 3)  # Checkout expiré non échantillonné
+
+
+class TestChronometre(unittest.TestCase):
+    """Tests du chronométrage des phases de démarrage."""
+
+    def test_phases_concurrentes(self):
+        """Durées et décalages des phases, y compris lorsqu'elles se recouvrent."""
+        instants = iter([10.0, 10.5, 11.0, 11.25, 12.0, 12.5])
+        with patch("alita.utils.chrono.time.perf_counter", lambda: next(instants)):
+            chrono = Chronometre()           # origine 10.0
+            chrono.demarrer("db")            # 10.5
+            chrono.demarrer("gateway")       # 11.0
+            self.assertAlmostEqual(chrono.arreter("db"), 0.75)  # 11.25
+            self.assertIsNone(chrono.arreter("db"))  # Déjà terminée
+            self.assertIsNone(chrono.arreter("inconnue"))
+            chrono.arreter("gateway")        # 12.0
+
+            self.assertEqual(chrono.durees(), {"db": 750.0, "gateway": 1000.0})
+            self.assertIsNone(chrono.duree("inconnue"))
+            self.assertEqual(chrono.resume(), "db 750 ms (+500) | gateway 1000 ms (+1000) | total 2500 ms")
+
+    def test_mesurer_en_cas_d_erreur(self):
+        """Le bloc chronométré est arrêté même s'il lève une exception."""
+        chrono = Chronometre()
+        with self.assertRaises(RuntimeError):
+            with chrono.mesurer("init_schema"):
+                raise RuntimeError("échec")
+        self.assertIsNotNone(chrono.duree("init_schema"))
+
+
+if __name__ == "__main__":
+    unittest.main()
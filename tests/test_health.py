@@ -0,0 +1,88 @@
+"""Tests du registre des sondes de santé."""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from alita.config import Config
+from alita.modules import health
+from tests.outils import SessionHttp
+
+
+class TestHealth(unittest.TestCase):
+    """Tests de l'exécution parallèle, du cache et des timeouts des sondes."""
+
+    def setUp(self):
+        self.appels = []
+        self.en_cours = self.pic_en_cours = 0
+        patcher_resultats = patch.dict(health._resultats, clear=True)
+        patcher_resultats.start()
+        self.addCleanup(patcher_resultats.stop)
+
+    def _sonde(self, nom, duree=0.2, ok=True):
+        async def sonder():
+            self.appels.append(nom)
+            self.en_cours += 1
+            self.pic_en_cours = max(self.pic_en_cours, self.en_cours)
+            try:
+                await asyncio.sleep(duree)
+            finally:
+                self.en_cours -= 1
+            return {"ok": ok, "message": f"{nom} OK" if ok else f"{nom} KO"}
+        return sonder
+
+    def test_sondes_paralleles_et_cache(self):
+        """Les sondes tournent en parallèle ; un second appel rapproché est servi du cache."""
+        sondes = {"a": self._sonde("a"), "b": self._sonde("b", ok=False)}
+
+        async def scenario():
+            return await health.verifier_tout(), await health.verifier_tout()
+
+        with patch.dict(health.SONDES, sondes, clear=True), patch.object(Config, "HEALTH_CACHE_TTL", 30):
+            premier, second = asyncio.run(scenario())
+
+        self.assertEqual(self.pic_en_cours, 2)
+        self.assertEqual([(r["nom"], r["ok"]) for r in premier], [("a", True), ("b", False)])
+        self.assertGreaterEqual(premier[0]["latence_ms"], 150)
+        self.assertFalse(premier[0]["cache"])
+        self.assertTrue(all(r["cache"] for r in second))
+        self.assertEqual(sorted(self.appels), ["a", "b"])
+
+    def test_sonde_partagee(self):
+        """Deux vérifications simultanées ne lancent qu'une sonde."""
+        async def scenario():
+            return await asyncio.gather(health.verifier("a"), health.verifier("a"))
+
+        with patch.dict(health.SONDES, {"a": self._sonde("a")}, clear=True):
+            resultats = asyncio.run(scenario())
+
+        self.assertEqual(self.appels, ["a"])
+        self.assertTrue(all(r["ok"] for r in resultats))
+
+    def test_timeout(self):
+        """Une sonde trop lente est en échec après HEALTH_TIMEOUT."""
+        with patch.dict(health.SONDES, {"lente": self._sonde("lente", duree=10)}, clear=True), \
+                patch.object(Config, "HEALTH_TIMEOUT", 0.05):
+            resultat = asyncio.run(health.verifier("lente"))
+
+        self.assertFalse(resultat["ok"])
+        self.assertIn("Pas de réponse", resultat["message"])
+        self.assertLess(resultat["latence_ms"], 5000)
+
+    def test_newsapi_sans_quota(self):
+        """La sonde NewsAPI n'envoie pas la clé (aucune requête décomptée)."""
+        session = SessionHttp(status=401, reponses_get={"sources": {"status": "error", "code": "apiKeyMissing"}})
+        with patch.object(Config, "NEWSAPI_KEY", "secret"), \
+                patch("alita.modules.health.quota_utilise", return_value=12), \
+                patch("alita.modules.health.get_http_session", AsyncMock(return_value=session)):
+            resultat = asyncio.run(health.verifier("newsapi"))
+
+        self.assertTrue(resultat["ok"])
+        self.assertIn("12/", resultat["message"])
+        url, params = session.requetes[0]
+        self.assertNotIn("secret", url)
+        self.assertIsNone(params)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,13 @@
 """Tests pour le module Yahoo Finance."""
 
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
 from datetime import datetime
 
 from alita.modules.yahoo_finance import get_ticker_price, get_ticker_history, CAC40_TICKERS
+from tests.outils import base_temporaire
 
 
 class TestYahooFinance(unittest.TestCase):
@@ -67,6 +69,11 @@ class TestYahooFinance(unittest.TestCase):
         self.assertEqual(len(result), 5)
         self.assertIn("date", result[0])
         self.assertIn("cloture", result[0])
+        self.assertEqual(result[-1], {
+            "date": "2024-01-05", "ouverture": 144.0, "cloture": 145.0,
+            "haut": 146.0, "bas": 143.0, "volume": 1400000,
+        })
+        self.assertIs(type(result[0]["volume"]), int)
 
     def test_cac40_tickers_non_vide(self):
         """Vérifie que la liste CAC40 est définie."""
@@ -77,28 +84,330 @@ class TestYahooFinance(unittest.TestCase):
 class TestWeather(unittest.TestCase):
     """Tests du module météo."""
 
-    @patch("alita.modules.weather.requests.get")
-    def test_get_weather_succes(self, mock_get):
-        """Test récupération météo avec réponse valide."""
+    def setUp(self):
+        from alita.modules import weather
+        weather.vider_cache()
+        self.addCleanup(weather.vider_cache)
+        patcher = patch("alita.modules.weather.geocoder",
+                        return_value={"nom": "Marseille", "lat": 43.2965, "lon": 5.3698})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _session(maintenant: float) -> MagicMock:
+        """Session renvoyant 4 tranches de prévision à partir de la tranche en cours."""
+        debut = int(maintenant // 10800 * 10800)
         mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "weather": [{"description": "ciel dégagé", "icon": "01d"}],
-            "main": {"temp": 22.5, "feels_like": 21.0, "humidity": 45},
-            "wind": {"speed": 3.5, "gust": 5.0},
-            "rain": {},
-            "clouds": {"all": 10},
-        }
+        mock_response.json.return_value = {"list": [
+            {
+                "dt": debut + i * 10800,
+                "dt_txt": "",
+                "weather": [{"description": "ciel dégagé", "icon": "01d"}],
+                "main": {"temp": 22.5 + i, "feels_like": 21.0, "humidity": 45},
+                "wind": {"speed": 3.5, "gust": 5.0},
+                "rain": {"3h": 0.3} if i == 0 else {},
+                "clouds": {"all": 10},
+            }
+            for i in range(4)
+        ]}
         mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
+        session = MagicMock()
+        session.get.return_value = mock_response
+        return session
 
-        from alita.modules.weather import get_weather
-        result = get_weather("Marseille")
+    def test_get_weather_succes(self):
+        """Test récupération météo avec réponse valide."""
+        from alita.modules import weather
+        with patch("alita.modules.weather._get_session", return_value=self._session(time.time())):
+            result = weather.get_weather("Marseille")
 
         self.assertIsNotNone(result)
         self.assertEqual(result["ville"], "Marseille")
         self.assertEqual(result["temperature"], 22.5)
+        self.assertEqual(result["pluie_1h"], 0.1)
         self.assertIn("dégagé", result["description"])
 
+    def test_une_requete_par_tranche(self):
+        """Météo actuelle et prévisions partagent une requête, valable jusqu'à la tranche suivante."""
+        from alita.modules import weather
+        maintenant = time.time()
+        session = self._session(maintenant)
+        with patch("alita.modules.weather._get_session", return_value=session):
+            meteo = weather.get_weather("Marseille")
+            previsions = weather.get_hourly_forecast("Marseille", hours=6)
+            self.assertEqual(session.get.call_count, 1)
+
+            with patch("alita.modules.weather.time.time", return_value=weather.fin_tranche(maintenant) + 1):
+                weather.get_weather("Marseille")
+            self.assertEqual(session.get.call_count, 2)
+
+        self.assertEqual(meteo["temperature"], previsions[0]["temperature"])
+        self.assertEqual(len(previsions), 3)
+
+
+class TestGeocodage(unittest.TestCase):
+    """Tests du géocodage persistant des villes (base SQLite temporaire)."""
+
+    def setUp(self):
+        from alita.modules import weather
+        base_temporaire(self)
+        weather._coordonnees.clear()
+        weather.vider_cache()
+        self.addCleanup(weather._coordonnees.clear)
+        self.addCleanup(weather.vider_cache)
+
+        reponse_geo = MagicMock()
+        reponse_geo.json.return_value = [{"name": "Marseille", "lat": 43.29648, "lon": 5.36978}]
+        reponse_forecast = MagicMock()
+        reponse_forecast.json.return_value = {"list": []}
+        self.session = MagicMock()
+        self.session.get.side_effect = lambda url, **kw: reponse_geo if "/geo/" in url else reponse_forecast
+
+    def _appels_geo(self) -> int:
+        return sum("/geo/" in c.args[0] for c in self.session.get.call_args_list)
+
+    def test_coordonnees_persistantes(self):
+        """Le nom est géocodé une fois ; les prévisions sont demandées par coordonnées."""
+        from alita.modules import weather
+        with patch("alita.modules.weather._get_session", return_value=self.session):
+            weather.get_forecast("Marseille")
+            weather._coordonnees.clear()  # Redémarrage : relu depuis la DB
+            weather.vider_cache()
+            weather.get_forecast("Marseille")
+
+        self.assertEqual(self._appels_geo(), 1)
+        params = self.session.get.call_args.kwargs["params"]
+        self.assertEqual((params["lat"], params["lon"]), (43.2965, 5.3698))
+        self.assertNotIn("q", params)
+
+    def test_invalidation(self):
+        """Changer la ville configurée force un nouveau géocodage."""
+        from alita.modules import weather
+        with patch("alita.modules.weather._get_session", return_value=self.session):
+            weather.geocoder("Marseille")
+            positions = weather.invalider_geocodage(["Marseille", "43.5,5.4"])
+
+        self.assertEqual(self._appels_geo(), 2)
+        self.assertEqual(list(positions), ["Marseille"])
+        self.assertEqual(positions["Marseille"]["nom"], "Marseille")
+
+
+    def test_echec_garde_en_cache(self):
+        """Une ville introuvable n'est pas regéocodée avant DUREE_ECHEC_GEOCODAGE."""
+        from alita.modules import weather
+        introuvable = MagicMock()
+        introuvable.json.return_value = []
+        self.session.get.side_effect = None
+        self.session.get.return_value = introuvable
+        maintenant = time.time()
+        with patch("alita.modules.weather._get_session", return_value=self.session):
+            self.assertIsNone(weather.geocoder("Atlantide"))
+            weather._coordonnees.clear()  # Redémarrage : l'échec est relu depuis la DB
+            self.assertIsNone(weather.geocoder("Atlantide"))
+            self.assertEqual(self._appels_geo(), 1)
+
+            apres = maintenant + weather.DUREE_ECHEC_GEOCODAGE + 1
+            with patch("alita.modules.weather.time.time", return_value=apres), \
+                    patch("alita.modules.weather.lire_cache", return_value=None):
+                weather.geocoder("Atlantide")
+        self.assertEqual(self._appels_geo(), 2)
+
+
+class TestNewsAPI(unittest.TestCase):
+    """Tests du cache et du quota NewsAPI (base SQLite temporaire)."""
+
+    def setUp(self):
+        base_temporaire(self)
+        reponse = MagicMock()
+        reponse.json.return_value = {"articles": [{
+            "title": "Titre", "url": "https://exemple.fr/a", "source": {"name": "Exemple"},
+            "publishedAt": "2024-03-15T08:00:00Z",
+        }]}
+        patcher = patch("alita.modules.news_api.requests.get", return_value=reponse)
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cache_par_requete(self):
+        """Une requête encore fraîche n'est pas renvoyée à l'API ; chaque requête a son entrée."""
+        from alita.modules.news_api import NewsAPI, quota_utilise
+        news = NewsAPI("secret")
+        premier = news.get_top_headlines(max_results=2)
+        second = news.get_top_headlines(max_results=2)
+        news.get_top_headlines(max_results=3)
+
+        self.assertEqual(premier, second)
+        self.assertEqual(self.get.call_count, 2)
+        self.assertEqual(quota_utilise(), 2)
+
+    def test_reserve_du_briefing_planifie(self):
+        """Quota presque atteint : les appels à la demande reçoivent le cache, le briefing planifié passe."""
+        from alita.config import Config
+        from alita.modules.news_api import NewsAPI, quota_utilise
+        news = NewsAPI("secret")
+        with patch.object(Config, "NEWSAPI_QUOTA_JOUR", 3), patch.object(Config, "NEWSAPI_RESERVE", 1), \
+                patch.object(Config, "NEWS_TTL_HEADLINES", 0):
+            news.get_top_headlines()
+            news.get_top_headlines()
+            perime = news.get_top_headlines()
+            self.assertEqual(self.get.call_count, 2)
+            self.assertEqual(perime[0]["title"], "Titre")
+
+            news.get_top_headlines(planifie=True)
+            news.get_top_headlines(planifie=True)
+
+        self.assertEqual(self.get.call_count, 3)
+        self.assertEqual(quota_utilise(), 3)
+
+    def test_fraicheur_par_requete(self):
+        """Chaque requête garde sa propre fraîcheur (NEWS_TTL_*), jamais au-delà de minuit."""
+        from alita.config import Config
+        from alita.modules import news_api
+        news = news_api.NewsAPI("secret")
+        maintenant = time.time()
+        with patch.object(Config, "NEWS_TTL_HEADLINES", 3600), patch.object(Config, "NEWS_TTL_TECH", 7200), \
+                patch("alita.modules.news_api.now_paris", return_value=datetime(2024, 3, 15, 8, 0)):
+            news.get_top_headlines(max_results=20)
+            news.get_tech_ai_news(max_results=20)
+
+            dans_90_min = maintenant + 90 * 60
+            with patch("alita.modules.news_api.time.time", return_value=dans_90_min):
+                news.get_top_headlines(max_results=20)
+                news.get_tech_ai_news(max_results=20)
+            self.assertEqual(self.get.call_count, 3)  # Seuls les gros titres sont périmés
+
+            with patch("alita.modules.news_api.now_paris", return_value=datetime(2024, 3, 15, 23, 50)):
+                news.get_top_headlines(max_results=5)
+            with patch("alita.modules.news_api.time.time", return_value=maintenant + 11 * 60):
+                news.get_top_headlines(max_results=5)
+        self.assertEqual(self.get.call_count, 5)  # Réponse de 23h50 périmée à minuit
+
+
+class TestDoublonsNews(unittest.TestCase):
+    """Tests de la déduplication MinHash des actualités (base SQLite temporaire)."""
+
+    BCE_MONDE = {"title": "La BCE maintient ses taux directeurs inchangés - Le Monde", "source": "Le Monde",
+                 "description": "La Banque centrale européenne a décidé jeudi de maintenir ses taux."}
+    BCE_ECHOS = {"title": "BCE : les taux directeurs restent inchangés - Les Echos", "source": "Les Echos",
+                 "description": "La Banque centrale européenne a décidé ce jeudi de maintenir ses taux directeurs."}
+    IPHONE = {"title": "Apple dévoile un nouvel iPhone", "source": "Tech",
+              "description": "Le géant californien présente sa nouvelle gamme."}
+    METEO = {"title": "Tempête attendue sur la Bretagne", "source": "Ouest",
+             "description": "Des rafales à 120 km/h sont prévues ce week-end."}
+
+    def setUp(self):
+        from alita.modules import news_dedup
+        base_temporaire(self)
+        news_dedup._index = None
+        self.addCleanup(setattr, news_dedup, "_index", None)
+
+    def test_doublons_du_lot(self):
+        """Le même sujet repris par deux sources n'est servi qu'une fois."""
+        from alita.modules.news_dedup import filtrer_articles
+        articles = [self.BCE_MONDE, self.BCE_ECHOS, self.IPHONE, self.METEO]
+        self.assertEqual(filtrer_articles(articles, 2), [self.BCE_MONDE, self.IPHONE])
+        self.assertEqual(filtrer_articles(articles, 2, deja=[self.IPHONE]), [self.BCE_MONDE, self.METEO])
+
+    def test_articles_deja_livres(self):
+        """Un sujet livré la veille est écarté, y compris après redémarrage, puis oublié après la rétention."""
+        from alita.modules import news_dedup
+        news_dedup.enregistrer_livres([self.BCE_MONDE])
+        news_dedup._index = None  # Redémarrage : index relu depuis la DB
+
+        self.assertEqual(news_dedup.filtrer_articles([self.BCE_ECHOS, self.IPHONE], 2), [self.IPHONE])
+
+        plus_tard = time.time() + 4 * 86400
+        with patch("alita.modules.news_dedup.time.time", return_value=plus_tard):
+            news_dedup.enregistrer_livres([self.METEO])
+        self.assertEqual(len(news_dedup._get_index()), 1)
+
+    def test_memo_sans_articles_livres(self):
+        """Les candidats mémorisés sont refiltrés : un article livré entre-temps n'est pas resservi."""
+        import asyncio
+        from alita.briefing import generator
+        from alita.briefing.pipeline import MemoEtapes, executer_pipeline
+        candidats = {"monde": [self.BCE_MONDE, self.METEO], "tech": [self.IPHONE]}
+        with patch("alita.briefing.generator._etape_articles", return_value=candidats) as articles:
+            etapes = [e for e in generator.construire_etapes() if e.nom in ("articles", "news")]
+            memo = MemoEtapes()
+            premier = asyncio.run(executer_pipeline(etapes, memo=memo))["resultats"]["news"]
+            asyncio.run(generator.marquer_news_livrees({"resultats": {"news": {"monde": [self.BCE_MONDE]}}}))
+            second = asyncio.run(executer_pipeline(etapes, memo=memo, reutiliser=True))["resultats"]["news"]
+
+        self.assertEqual(articles.call_count, 1)
+        self.assertEqual(premier["monde"], [self.BCE_MONDE, self.METEO])
+        self.assertEqual(second, {"monde": [self.METEO], "tech": [self.IPHONE]})
+
+
+class TestTrajetMoto(unittest.TestCase):
+    """Tests du score moto sur un trajet à plusieurs étapes."""
+
+    @staticmethod
+    def _tranche(pluie=0.0, vent=10.0):
+        return {"dt_txt": "2024-03-15 09:00:00", "temperature": 15, "pluie_3h": pluie, "pop": 0,
+                "vent_vitesse": vent, "visibilite": 10000}
+
+    def test_parser_trajet(self):
+        """Étapes séparées par des points-virgules, coordonnées comprises."""
+        from alita.modules.moto_score import parser_trajet
+        self.assertEqual(parser_trajet(" Marseille ; 43.53,5.45;; "), ["Marseille", "43.53,5.45"])
+        self.assertEqual(parser_trajet(""), [])
+
+    def test_pire_conditions_du_trajet(self):
+        """La pluie sur une seule étape rend le trajet rédhibitoire ; une étape indisponible est ignorée."""
+        from alita.modules.moto_score import calculer_score_moto, combiner_previsions
+        previsions = combiner_previsions(
+            ["Marseille", "Aix", "Toulon"],
+            [[self._tranche()], [self._tranche(pluie=2.0)], None],
+        )
+        self.assertEqual([t["lieu"] for t in previsions], ["Marseille", "Aix"])
+        self.assertEqual(calculer_score_moto({"temperature": 15}, previsions)["score"], 0)
+
+        previsions = combiner_previsions(["Marseille", "Aix"], [[self._tranche()], [self._tranche(vent=30)]])
+        self.assertEqual(calculer_score_moto({"temperature": 15}, previsions)["score"], 8)
+        self.assertIsNone(combiner_previsions(["Aix"], [None]))
+
+    def test_coordonnees(self):
+        """Une étape "lat,lon" interroge OpenWeather par coordonnées."""
+        from alita.modules import weather
+        weather.vider_cache()
+        self.addCleanup(weather.vider_cache)
+        session = MagicMock()
+        session.get.return_value.json.return_value = {"list": []}
+        with patch("alita.modules.weather._get_session", return_value=session):
+            weather.get_forecast("43.53, 5.45")
+
+        params = session.get.call_args.kwargs["params"]
+        self.assertEqual((params["lat"], params["lon"]), ("43.53", "5.45"))
+        self.assertNotIn("q", params)
+
+
+class TestScoresParJour(unittest.TestCase):
+    """Tests du score moto sur 5 jours."""
+
+    @staticmethod
+    def _tranche(jour, heure, pluie=0.0, vent=10.0, temperature=15):
+        dt = (datetime(2024, 3, jour) - datetime(1970, 1, 1)).days * 86400 + heure * 3600
+        return {"dt": dt, "dt_txt": f"2024-03-{jour:02d} {heure:02d}:00:00", "pluie_3h": pluie, "pop": 0,
+                "vent_vitesse": vent, "temperature": temperature, "visibilite": 10000}
+
+    def test_fenetre_par_jour(self):
+        """Chaque jour est noté sur ses seules tranches 8h-19h UTC."""
+        from alita.modules.moto_score import calculer_score_moto, scores_par_jour
+        previsions = [
+            self._tranche(15, 9), self._tranche(15, 12, pluie=2.0),
+            self._tranche(16, 6, pluie=5.0), self._tranche(16, 9, vent=30), self._tranche(16, 21, pluie=5.0),
+            self._tranche(17, 21, pluie=5.0),
+        ]
+        jours = scores_par_jour(previsions)
+
+        self.assertEqual([j["date"].day for j in jours], [15, 16])
+        self.assertEqual([j["nb_tranches"] for j in jours], [2, 1])
+        self.assertEqual(jours[0]["score"], 0)
+        self.assertEqual(jours[1]["score"], 8)
+        # Même résultat que le score du briefing sur les tranches du 16
+        self.assertEqual(jours[1]["score"], calculer_score_moto({"temperature": 15}, previsions[2:5])["score"])
+        self.assertEqual(scores_par_jour([]), [])
+
 
 if __name__ == "__main__":
     unittest.main()